@@ -1,20 +1,25 @@
 from django.contrib import admin
+
+from core.admin import LargeTableAdminMixin
+from core.search import FullTextAdminSearchMixin
+
 from .models import BlogPost
 
 
 @admin.register(BlogPost)
-class BlogPostAdmin(admin.ModelAdmin):
+class BlogPostAdmin(LargeTableAdminMixin, FullTextAdminSearchMixin, admin.ModelAdmin):
     list_display = ('title', 'created_at', 'is_published', 'views_count')
+    list_only = ('id', 'title', 'created_at', 'is_published', 'views_count')
     list_filter = ('is_published', 'created_at')
     search_fields = ('title', 'content')
     prepopulated_fields = {'slug': ('title',)}
-    readonly_fields = ('views_count', 'created_at')
+    readonly_fields = ('views_count', 'created_at', 'last_modified')
 
     fieldsets = (
         (None, {
             'fields': ('title', 'slug', 'content', 'preview_image')
         }),
         ('Публикация', {
-            'fields': ('is_published', 'created_at', 'views_count')
+            'fields': ('is_published', 'created_at', 'last_modified', 'views_count')
         }),
     )
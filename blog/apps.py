@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class BlogConfig(AppConfig):
     name = "blog"
+
+    def ready(self):
+        # Подключаем обработчики сигналов модели BlogPost
+        from . import signals  # noqa: F401
@@ -0,0 +1,128 @@
+import atexit
+import logging
+import os
+import threading
+from collections import Counter
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db import connections
+from django.db import transaction
+from django.db.models import F
+
+from .models import BlogPost
+from .trending import record_hourly_views
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCountBuffer:
+    """
+    Отложенная запись счетчика просмотров (write-behind).
+
+    Просмотры копятся в памяти процесса и периодически сбрасываются в БД пачкой
+    UPDATE ... SET views_count = views_count + n, по одному запросу на каждое различное n.
+    Инкремент выполняется на стороне БД, поэтому параллельные процессы не теряют просмотры.
+    Тем же сбросом просмотры прибавляются к почасовым счетчикам PostViewBucket для рейтинга популярных записей.
+    Интервал сброса задается настройкой BLOG_VIEWS_FLUSH_INTERVAL (секунды, 0 - писать сразу).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = Counter()
+        self._pid = None
+        self._flusher = None
+        self._stop = threading.Event()
+
+    @property
+    def interval(self):
+        return getattr(settings, "BLOG_VIEWS_FLUSH_INTERVAL", 10)
+
+    def record(self, post_id, count=1):
+        """Учитывает просмотр записи"""
+        with self._lock:
+            self._reset_after_fork()
+            self._pending[post_id] += count
+        if self.interval <= 0:
+            self.flush()
+        else:
+            self._ensure_flusher()
+
+    async def arecord(self, post_id, count=1):
+        """Вариант record для async-представлений: немедленный сброс (интервал 0) уходит в поток"""
+        with self._lock:
+            self._reset_after_fork()
+            self._pending[post_id] += count
+        if self.interval <= 0:
+            await sync_to_async(self.flush)()
+        else:
+            self._ensure_flusher()
+
+    def pending(self, post_id):
+        """Количество просмотров записи, еще не сохраненных в БД этим процессом"""
+        with self._lock:
+            return self._pending.get(post_id, 0)
+
+    def flush(self):
+        """Сбрасывает накопленные просмотры в БД, возвращает количество записанных просмотров"""
+        with self._lock:
+            batch, self._pending = self._pending, Counter()
+        if not batch:
+            return 0
+
+        # Группируем записи с одинаковым приростом, чтобы обойтись минимумом UPDATE
+        by_increment = defaultdict(list)
+        for post_id, count in batch.items():
+            by_increment[count].append(post_id)
+
+        try:
+            # Счетчик и почасовые просмотры сохраняются вместе, иначе повтор сброса задвоил бы одно из них
+            with transaction.atomic(using=DEFAULT_DB_ALIAS):
+                for count, post_ids in by_increment.items():
+                    # Явный primary: служебная запись счетчика не закрепляет чтение клиента за primary (core.db)
+                    BlogPost.objects.using(DEFAULT_DB_ALIAS).filter(pk__in=post_ids).update(
+                        views_count=F("views_count") + count
+                    )
+                record_hourly_views(batch)
+        except Exception:
+            # Возвращаем несохраненные просмотры в буфер, следующий сброс повторит попытку
+            with self._lock:
+                self._pending.update(batch)
+            logger.exception("Не удалось сохранить счетчики просмотров")
+            return 0
+        return sum(batch.values())
+
+    def stop(self):
+        """Останавливает фоновый поток и сохраняет остаток буфера"""
+        self._stop.set()
+        self.flush()
+
+    def _reset_after_fork(self):
+        # После fork() (например, gunicorn --preload) поток сброса родителя в дочернем процессе не работает
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._pending = Counter()
+            self._flusher = None
+
+    def _ensure_flusher(self):
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+        with self._lock:
+            if self._flusher is None or not self._flusher.is_alive():
+                self._stop.clear()
+                self._flusher = threading.Thread(target=self._run, name="blog-views-flusher", daemon=True)
+                self._flusher.start()
+
+    def _run(self):
+        while not self._stop.wait(max(self.interval, 0.1)):
+            try:
+                self.flush()
+            finally:
+                # Соединения потока не должны висеть открытыми между сбросами
+                connections.close_all()
+
+
+view_counter = ViewCountBuffer()
+atexit.register(view_counter.stop)
@@ -0,0 +1,76 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db import connections
+from django.test import RequestFactory
+from django.test import override_settings
+
+from blog.counters import view_counter
+from blog.models import BlogPost
+from blog.views import BlogPostDetailView
+
+
+class LegacyBlogPostDetailView(BlogPostDetailView):
+    """Прежнее поведение: read-modify-write счетчика на каждый просмотр"""
+
+    def get_object(self, queryset: Any = None) -> BlogPost:
+        obj = super(BlogPostDetailView, self).get_object(queryset)
+        obj.views_count += 1
+        obj.save(update_fields=["views_count"])
+        return obj
+
+
+class Command(BaseCommand):
+    help = "Нагрузочный тест счетчика просмотров: потерянные просмотры и пропускная способность детальной страницы"
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument("slug", type=str, help="Слаг записи блога для теста")
+        parser.add_argument("--hits", type=int, default=2000, help="Всего просмотров на режим")
+        parser.add_argument("--threads", type=int, default=8, help="Параллельных потоков")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        slug = options["slug"]
+        try:
+            original = BlogPost.objects.get(slug=slug).views_count
+        except BlogPost.DoesNotExist:
+            raise CommandError(f"Запись {slug} не найдена")
+
+        modes = (("legacy", LegacyBlogPostDetailView), ("buffered", BlogPostDetailView))
+        try:
+            for mode, view_class in modes:
+                BlogPost.objects.filter(slug=slug).update(views_count=0)
+                # Без кеша страниц: попадание в кеш не выполняет представление и не читает счетчик из БД
+                with override_settings(PAGE_CACHE_TIMEOUT=0):
+                    elapsed = self._run(view_class.as_view(), slug, options["hits"], options["threads"])
+                view_counter.flush()
+                stored = BlogPost.objects.get(slug=slug).views_count
+                lost = options["hits"] - stored
+                self.stdout.write(
+                    f"{mode:>9}: {options['hits'] / elapsed:10.1f} запросов/с, "
+                    f"сохранено {stored} из {options['hits']}, потеряно {lost}"
+                )
+        finally:
+            BlogPost.objects.filter(slug=slug).update(views_count=original)
+
+    @staticmethod
+    def _run(view: Any, slug: str, hits: int, threads: int) -> float:
+        factory = RequestFactory()
+
+        def worker(count: int) -> None:
+            try:
+                for _ in range(count):
+                    response = view(factory.get(f"/blog/post/{slug}/"), slug=slug)
+                    # Ответ из кеша страниц или 304 - уже готовый HttpResponse
+                    if hasattr(response, "render"):
+                        response.render()
+            finally:
+                connections.close_all()
+
+        shares = [hits // threads + (1 if i < hits % threads else 0) for i in range(threads)]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(worker, shares))
+        return time.perf_counter() - started
@@ -0,0 +1,28 @@
+import time
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from blog.services import cache_trending_posts
+from blog.trending import update_trending_scores
+from core.cache import bump_versions
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает рейтинг популярных записей блога по почасовым просмотрам за окно BLOG_TRENDING_WINDOW, "
+        "удаляет устаревшие часы и обновляет кеш виджета и страниц /blog/popular/ (запускать по расписанию, "
+        "например раз в 10 минут)"
+    )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        started = time.perf_counter()
+        updated, deleted = update_trending_scores()
+        cache_trending_posts()
+        bump_versions("blog:trending")
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Обновлен рейтинг записей: {updated}, удалено часовых счетчиков: {deleted} за {elapsed:.2f} с"
+            )
+        )
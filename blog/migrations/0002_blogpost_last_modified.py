@@ -0,0 +1,20 @@
+# Generated by Django 6.0 on 2026-10-18 16:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="blogpost",
+            name="last_modified",
+            field=models.DateTimeField(
+                auto_now=True, help_text="Дата и время последнего изменения записи", verbose_name="Дата изменения"
+            ),
+        ),
+    ]
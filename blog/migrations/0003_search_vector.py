@@ -0,0 +1,44 @@
+# Generated by Django 6.0 on 2026-10-18 16:45
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0002_blogpost_last_modified"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="blogpost",
+            name="search_vector",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.contrib.postgres.search.CombinedSearchVector(
+                    django.contrib.postgres.search.CombinedSearchVector(
+                        django.contrib.postgres.search.CombinedSearchVector(
+                            django.contrib.postgres.search.SearchVector("title", config="russian", weight="A"),
+                            "||",
+                            django.contrib.postgres.search.SearchVector("title", config="english", weight="A"),
+                            django.contrib.postgres.search.SearchConfig("russian"),
+                        ),
+                        "||",
+                        django.contrib.postgres.search.SearchVector("content", config="russian", weight="B"),
+                        django.contrib.postgres.search.SearchConfig("russian"),
+                    ),
+                    "||",
+                    django.contrib.postgres.search.SearchVector("content", config="english", weight="B"),
+                    django.contrib.postgres.search.SearchConfig("russian"),
+                ),
+                output_field=django.contrib.postgres.search.SearchVectorField(),
+                verbose_name="Поисковый вектор",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="blogpost",
+            index=django.contrib.postgres.indexes.GinIndex(fields=["search_vector"], name="blog_post_search_idx"),
+        ),
+    ]
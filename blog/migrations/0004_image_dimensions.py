@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-18 16:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0003_search_vector"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="blogpost",
+            name="preview_height",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name="Высота превью"),
+        ),
+        migrations.AddField(
+            model_name="blogpost",
+            name="preview_width",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name="Ширина превью"),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 17:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0004_image_dimensions"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="blogpost",
+            name="excerpt",
+            field=models.CharField(blank=True, default="", editable=False, max_length=100, verbose_name="Анонс"),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-18 17:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0005_blogpost_excerpt"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="blogpost",
+            index=models.Index(fields=["is_published", "-created_at"], name="blog_post_published_idx"),
+        ),
+    ]
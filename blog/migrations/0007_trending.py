@@ -0,0 +1,54 @@
+# Generated by Django 6.0 on 2026-10-18 17:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0006_blogpost_published_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PostViewBucket",
+            fields=[
+                (
+                    "pk",
+                    models.CompositePrimaryKey(
+                        "post", "hour", blank=True, editable=False, primary_key=True, serialize=False
+                    ),
+                ),
+                (
+                    "post",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="view_buckets",
+                        to="blog.blogpost",
+                        verbose_name="Запись",
+                    ),
+                ),
+                ("hour", models.PositiveIntegerField(verbose_name="Час")),
+                ("views", models.PositiveIntegerField(default=0, verbose_name="Просмотры")),
+            ],
+            options={
+                "verbose_name": "Просмотры записи за час",
+                "verbose_name_plural": "Просмотры записей по часам",
+            },
+        ),
+        migrations.AddField(
+            model_name="blogpost",
+            name="trending_score",
+            field=models.FloatField(default=0, editable=False, verbose_name="Рейтинг популярности"),
+        ),
+        migrations.AddIndex(
+            model_name="blogpost",
+            index=models.Index(fields=["is_published", "-trending_score", "-id"], name="blog_post_trending_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="postviewbucket",
+            index=models.Index(fields=["hour"], name="blog_view_bucket_hour_idx"),
+        ),
+    ]
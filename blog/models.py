@@ -1,8 +1,26 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.db.models.fields import PositiveIntegerField
 from django.utils import timezone
 from django.utils.text import slugify
 
+from core.db import read_database
+from core.text import EXCERPT_LENGTH
+from core.text import make_excerpt
+from core.text import with_excerpt_field
+
+
+class BlogPostQuerySet(models.QuerySet):
+    def published(self):
+        """Опубликованные записи; только для чтения - запрос идет на реплику, если она настроена"""
+        return self.filter(is_published=True).using(read_database())
+
+    def for_listing(self):
+        """Записи для списков: без полного текста и поискового вектора (в карточке нужен только excerpt)"""
+        return self.defer('content', 'search_vector')
+
 
 class BlogPost(models.Model):
     """
@@ -29,6 +47,15 @@ class BlogPost(models.Model):
         help_text='Введите текст статьи'
     )
 
+    # Анонс для карточек списка, пересчитывается при сохранении (для старых записей - backfill_excerpts)
+    excerpt = models.CharField(
+        max_length=EXCERPT_LENGTH,
+        blank=True,
+        default='',
+        editable=False,
+        verbose_name='Анонс'
+    )
+
     # Превью (изображение)
     preview_image = models.ImageField(
         upload_to='blog/previews/',
@@ -38,6 +65,14 @@ class BlogPost(models.Model):
         help_text='Загрузите изображение для превью статьи'
     )
 
+    # Размеры превью заполняются при создании уменьшенных копий (нужны для srcset и width/height без чтения файла)
+    preview_width = models.PositiveIntegerField(
+        blank=True, null=True, editable=False, verbose_name='Ширина превью'
+    )
+    preview_height = models.PositiveIntegerField(
+        blank=True, null=True, editable=False, verbose_name='Высота превью'
+    )
+
     # Дата создания
     created_at = models.DateTimeField(
         default=timezone.now,
@@ -45,6 +80,13 @@ class BlogPost(models.Model):
         help_text='Дата и время создания записи'
     )
 
+    # Дата последнего изменения (валидатор Last-Modified/ETag для условных GET-запросов)
+    last_modified = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения',
+        help_text='Дата и время последнего изменения записи'
+    )
+
     # Признак публикации
     is_published = models.BooleanField(
         default=False,
@@ -59,6 +101,28 @@ class BlogPost(models.Model):
         help_text='Счетчик просмотров статьи'
     )
 
+    # Рейтинг популярности: просмотры за окно BLOG_TRENDING_WINDOW с затуханием по времени (update_trending)
+    trending_score = models.FloatField(
+        default=0,
+        editable=False,
+        verbose_name='Рейтинг популярности'
+    )
+
+    # Поисковый вектор (русская и английская морфология) поддерживается самой БД
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector('title', config='russian', weight='A')
+            + SearchVector('title', config='english', weight='A')
+            + SearchVector('content', config='russian', weight='B')
+            + SearchVector('content', config='english', weight='B')
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+        verbose_name='Поисковый вектор',
+    )
+
+    objects = BlogPostQuerySet.as_manager()
+
     def save(self, *args, **kwargs):
         # 1. Проверяем: если slug не заполнен (пустая строка или None)
         if not self.slug:
@@ -66,6 +130,12 @@ class BlogPost(models.Model):
 
             self.slug = slugify(self.title)
 
+        # Анонс для списка записей
+        if 'content' not in self.get_deferred_fields():
+            self.excerpt = make_excerpt(self.content)
+        if 'update_fields' in kwargs:
+            kwargs['update_fields'] = with_excerpt_field(kwargs['update_fields'], 'content', 'excerpt')
+
         # 3. Вызываем родительский метод save() для сохранения в БД
         super().save(*args, **kwargs)
 
@@ -80,3 +150,43 @@ class BlogPost(models.Model):
         verbose_name = 'Блоговая запись'
         verbose_name_plural = 'Блоговые записи'
         ordering = ['-created_at']  # Сортировка по убыванию даты создания
+        indexes = [
+            GinIndex(fields=['search_vector'], name='blog_post_search_idx'),  # полнотекстовый поиск
+            # фильтр по публикации и дате в админке, списки опубликованных записей по дате
+            models.Index(fields=['is_published', '-created_at'], name='blog_post_published_idx'),
+            # популярные опубликованные записи: первые k строк индекса без сортировки таблицы
+            models.Index(fields=['is_published', '-trending_score', '-id'], name='blog_post_trending_idx'),
+        ]
+
+
+class PostViewBucket(models.Model):
+    """
+    Просмотры записи за один час. Строка на запись и час, в который были просмотры, - таблица растет
+    с числом просматриваемых записей, а не просмотров; строки старше окна рейтинга удаляет update_trending
+    """
+    # Первичный ключ (post, hour) без суррогатного id; он же индекс для выборки по записи
+    pk = models.CompositePrimaryKey('post', 'hour')
+
+    post = models.ForeignKey(
+        BlogPost,
+        on_delete=models.CASCADE,
+        db_index=False,
+        related_name='view_buckets',
+        verbose_name='Запись'
+    )
+
+    # Номер часа от начала эпохи Unix (UTC)
+    hour = models.PositiveIntegerField(verbose_name='Час')
+
+    views = models.PositiveIntegerField(default=0, verbose_name='Просмотры')
+
+    def __str__(self):
+        return f'{self.post_id}@{self.hour}: {self.views}'
+
+    class Meta:
+        verbose_name = 'Просмотры записи за час'
+        verbose_name_plural = 'Просмотры записей по часам'
+        indexes = [
+            # отбор окна и удаление устаревших часов
+            models.Index(fields=['hour'], name='blog_view_bucket_hour_idx'),
+        ]
@@ -0,0 +1,84 @@
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db.models import Count
+from django.db.models import Q
+
+from core.rendering import url_formatter
+
+from .models import BlogPost
+
+BLOG_STATS_CACHE_KEY = "blog:stats"
+BLOG_STATS_TIMEOUT = 60 * 60
+
+TRENDING_CACHE_KEY = "blog:trending"
+# Записей в виджете популярных записей
+TRENDING_WIDGET_SIZE = 5
+
+
+def get_blog_stats() -> dict[str, int]:
+    """
+    Возвращает статистику блога {"total": ..., "published": ...}.
+    Оба счетчика считаются одним агрегирующим запросом и кешируются до изменения записей.
+    """
+    stats = cache.get(BLOG_STATS_CACHE_KEY)
+    if stats is None:
+        stats = BlogPost.objects.aggregate(
+            total=Count("pk"),
+            published=Count("pk", filter=Q(is_published=True)),
+        )
+        cache.set(BLOG_STATS_CACHE_KEY, stats, BLOG_STATS_TIMEOUT)
+    return stats
+
+
+async def aget_blog_stats() -> dict[str, int]:
+    """Асинхронный вариант get_blog_stats для async-представлений"""
+    stats = await cache.aget(BLOG_STATS_CACHE_KEY)
+    if stats is None:
+        stats = await BlogPost.objects.aaggregate(
+            total=Count("pk"),
+            published=Count("pk", filter=Q(is_published=True)),
+        )
+        await cache.aset(BLOG_STATS_CACHE_KEY, stats, BLOG_STATS_TIMEOUT)
+    return stats
+
+
+def invalidate_blog_stats() -> None:
+    """Сбрасывает закешированную статистику блога"""
+    cache.delete(BLOG_STATS_CACHE_KEY)
+
+
+def trending_posts():
+    """Опубликованные записи по убыванию рейтинга; срез [:k] читает первые k строк индекса blog_post_trending_idx"""
+    return BlogPost.objects.published().filter(trending_score__gt=0).order_by("-trending_score", "-id")
+
+
+def cache_trending_posts() -> list[dict[str, str]]:
+    """Кеширует виджет популярных записей: [{"title": ..., "url": ...}] - готовые к выводу строки"""
+    url = url_formatter("blog:post_detail", "slug")
+    posts = [
+        {"title": title, "url": url(slug)}
+        for title, slug in trending_posts().values_list("title", "slug")[:TRENDING_WIDGET_SIZE]
+    ]
+    cache.set(TRENDING_CACHE_KEY, posts, BLOG_STATS_TIMEOUT)
+    return posts
+
+
+def get_trending_posts() -> list[dict[str, str]]:
+    """Виджет популярных записей из кеша; кеш обновляет update_trending после пересчета рейтинга"""
+    posts = cache.get(TRENDING_CACHE_KEY)
+    if posts is None:
+        posts = cache_trending_posts()
+    return posts
+
+
+async def aget_trending_posts() -> list[dict[str, str]]:
+    """Асинхронный вариант get_trending_posts для async-представлений"""
+    posts = await cache.aget(TRENDING_CACHE_KEY)
+    if posts is None:
+        posts = await sync_to_async(cache_trending_posts)()
+    return posts
+
+
+def invalidate_trending_posts() -> None:
+    """Сбрасывает закешированный виджет популярных записей (заголовки и слаги могли измениться)"""
+    cache.delete(TRENDING_CACHE_KEY)
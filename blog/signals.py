@@ -0,0 +1,51 @@
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
+
+from core.cache import bump_versions
+from core.images import delete_derivatives
+from core.images import ensure_derivatives
+from core.images import reset_dimensions
+from core.sitemaps import mark_changed
+
+from .models import BlogPost
+from .services import invalidate_blog_stats
+from .services import invalidate_trending_posts
+
+
+def invalidate_blog_pages(instance, *slugs):
+    """Сбрасывает кеш списка записей, страниц записи по всем ее слагам и фрагментов записи, sitemap и ленты"""
+    names = {"blog:posts", f"blog.blogpost:{instance.pk}"}
+    names.update(f"blog.post:{slug}" for slug in slugs if slug)
+    bump_versions(*names)
+    mark_changed("posts", instance.pk)
+
+
+@receiver(pre_save, sender=BlogPost)
+def blog_post_pre_save(sender, instance, **kwargs):
+    """Запоминает прежний слаг для сброса кеша и сбрасывает размеры замененного превью"""
+    if instance.pk:
+        instance._previous_slug = BlogPost.objects.filter(pk=instance.pk).values_list("slug", flat=True).first()
+    reset_dimensions(instance, "preview_image", "preview_width", "preview_height")
+
+
+@receiver(post_save, sender=BlogPost)
+def blog_post_saved(sender, instance, update_fields=None, **kwargs):
+    """Сбрасывает статистику и кеш страниц при сохранении записи (кроме обновления одного счетчика просмотров)"""
+    if update_fields is not None and set(update_fields) == {"views_count"}:
+        return
+    invalidate_blog_stats()
+    invalidate_trending_posts()
+    invalidate_blog_pages(instance, instance.slug, getattr(instance, "_previous_slug", None))
+    ensure_derivatives(instance, "preview_image", "preview_width", "preview_height")
+
+
+@receiver(post_delete, sender=BlogPost)
+def blog_post_deleted(sender, instance, **kwargs):
+    """Сбрасывает статистику и кеш страниц при удалении записи"""
+    invalidate_blog_stats()
+    invalidate_trending_posts()
+    invalidate_blog_pages(instance, instance.slug)
+    if instance.preview_image and instance.preview_width:
+        delete_derivatives(instance.preview_image.name, instance.preview_width, storage=instance.preview_image.storage)
@@ -1,3 +1,133 @@
+from django.core.cache import cache
 from django.test import TestCase
+from django.test import override_settings
+from django.urls import reverse
 
-# Create your tests here.
+from .counters import view_counter
+from .models import BlogPost
+from .models import PostViewBucket
+from .trending import current_hour
+from .trending import record_hourly_views
+from .trending import update_trending_scores
+
+
+class BlogPostListViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        BlogPost.objects.bulk_create(
+            [
+                BlogPost(title=f"Запись {i}", slug=f"post-{i}", content="Текст", is_published=i % 3 != 0)
+                for i in range(12)
+            ]
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_list_page_query_count(self):
+        """COUNT пагинатора + выборка страницы + один агрегат статистики + виджет популярных, без N+1"""
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse("blog:post_list"))
+        self.assertEqual(response.context["blog_stats"], {"total": 12, "published": 8})
+
+        # Статистика и виджет берутся из кеша
+        with self.assertNumQueries(2):
+            self.client.get(reverse("blog:post_list"), {"page": 2})
+
+    def test_stats_invalidated_on_save_and_delete(self):
+        self.client.get(reverse("blog:post_list"))
+        post = BlogPost.objects.create(title="Новая", slug="new", content="Текст", is_published=True)
+        response = self.client.get(reverse("blog:post_list"))
+        self.assertEqual(response.context["blog_stats"], {"total": 13, "published": 9})
+
+        post.delete()
+        response = self.client.get(reverse("blog:post_list"))
+        self.assertEqual(response.context["blog_stats"], {"total": 12, "published": 8})
+
+
+class BlogPostDetailViewTests(TestCase):
+    def test_views_are_counted_with_database_increment(self):
+        post = BlogPost.objects.create(title="Запись", slug="post", content="Текст", is_published=True)
+        with override_settings(BLOG_VIEWS_FLUSH_INTERVAL=0):
+            for _ in range(3):
+                self.client.get(reverse("blog:post_detail", kwargs={"slug": post.slug}))
+        post.refresh_from_db()
+        self.assertEqual(post.views_count, 3)
+
+    def test_buffered_views_are_flushed_in_batch(self):
+        first = BlogPost.objects.create(title="Первая", slug="first", content="Текст")
+        second = BlogPost.objects.create(title="Вторая", slug="second", content="Текст")
+        view_counter.flush()
+        view_counter._pending.update({first.pk: 2, second.pk: 5})
+
+        # UPDATE на каждый различный прирост и один INSERT почасовых счетчиков в одной транзакции
+        with self.assertNumQueries(5):
+            self.assertEqual(view_counter.flush(), 7)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.views_count, second.views_count), (2, 5))
+
+    @override_settings(BLOG_VIEWS_FLUSH_INTERVAL=0)
+    def test_not_modified_still_counts_view(self):
+        post = BlogPost.objects.create(title="Запись", slug="post", content="Текст", is_published=True)
+        url = reverse("blog:post_detail", kwargs={"slug": post.slug})
+        etag = self.client.get(url)["ETag"]
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        post.refresh_from_db()
+        self.assertEqual(post.views_count, 2)
+
+        # Редактирование записи меняет валидатор
+        post.title = "Новый заголовок"
+        post.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+@override_settings(BLOG_TRENDING_HALF_LIFE=24, BLOG_TRENDING_WINDOW=7 * 24)
+class TrendingTests(TestCase):
+    now = 1_800_000_000
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.fresh = BlogPost.objects.create(title="Свежая", slug="fresh", content="Текст", is_published=True)
+        cls.old = BlogPost.objects.create(title="Вчерашняя", slug="old", content="Текст", is_published=True)
+        cls.stale = BlogPost.objects.create(title="Забытая", slug="stale", content="Текст", is_published=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_hourly_views_rollup_and_decayed_score(self):
+        record_hourly_views({self.fresh.pk: 3}, now=self.now)
+        record_hourly_views({self.fresh.pk: 7, self.old.pk: 10}, now=self.now)
+        record_hourly_views({self.old.pk: 30}, now=self.now - 48 * 3600)
+        record_hourly_views({self.stale.pk: 100}, now=self.now - 8 * 24 * 3600)
+        self.assertEqual(PostViewBucket.objects.get(post=self.fresh, hour=current_hour(self.now)).views, 10)
+
+        self.assertEqual(update_trending_scores(now=self.now), (3, 1))
+
+        scores = dict(BlogPost.objects.values_list("slug", "trending_score"))
+        # При периоде полураспада в сутки 30 просмотров двухдневной давности весят как 7,5 сегодняшних
+        self.assertAlmostEqual(scores["fresh"], 10)
+        self.assertAlmostEqual(scores["old"], 10 + 30 / 4)
+        self.assertEqual(scores["stale"], 0)
+        self.assertFalse(PostViewBucket.objects.filter(post=self.stale).exists())
+
+    def test_popular_page_and_sidebar_widget(self):
+        record_hourly_views({self.fresh.pk: 5, self.old.pk: 9, self.stale.pk: 1})
+        update_trending_scores()
+        self.stale.is_published = False
+        self.stale.save()
+
+        # Выборка первых записей по индексу рейтинга + статистика
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("blog:post_popular"))
+        self.assertEqual([post.slug for post in response.context["posts"]], ["old", "fresh"])
+
+        self.client.get(reverse("blog:post_list"))
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("blog:post_list"), {"page": 1})
+        self.assertEqual(
+            response.context["trending_posts"],
+            [{"title": "Вчерашняя", "url": "/blog/post/old/"}, {"title": "Свежая", "url": "/blog/post/fresh/"}],
+        )
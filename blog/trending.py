@@ -0,0 +1,82 @@
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db import connections
+from django.db import transaction
+from django.db.models import ExpressionWrapper
+from django.db.models import F
+from django.db.models import FloatField
+from django.db.models import OuterRef
+from django.db.models import Subquery
+from django.db.models import Sum
+from django.db.models import Value
+from django.db.models.functions import Cast
+from django.db.models.functions import Power
+
+from .models import BlogPost
+from .models import PostViewBucket
+
+
+def _float(value):
+    """Число как double precision: литерал float PostgreSQL читает как numeric, а POWER от numeric в разы медленнее"""
+    return Cast(Value(float(value)), FloatField())
+
+
+def current_hour(now=None):
+    """Номер часа от начала эпохи Unix - ключ почасового счетчика просмотров"""
+    return int((now if now is not None else time.time()) // 3600)
+
+
+def record_hourly_views(counts, now=None, using=DEFAULT_DB_ALIAS):
+    """
+    Прибавляет просмотры {pk записи: количество} к счетчикам текущего часа одним INSERT ... ON CONFLICT.
+    Просмотры удаленных за время буферизации записей отбрасываются соединением с таблицей записей.
+    """
+    if not counts:
+        return
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    buckets = quote(PostViewBucket._meta.db_table)
+    posts = quote(BlogPost._meta.db_table)
+    post_ids, views = zip(*counts.items())
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {buckets} (post_id, hour, views) "
+            f"SELECT p.id, %s, v.views FROM unnest(%s::bigint[], %s::integer[]) AS v (post_id, views) "
+            f"JOIN {posts} p ON p.id = v.post_id "
+            f"ON CONFLICT (post_id, hour) DO UPDATE SET views = {buckets}.views + EXCLUDED.views",
+            [current_hour(now), list(post_ids), list(views)],
+        )
+
+
+def update_trending_scores(now=None):
+    """
+    Пересчитывает BlogPost.trending_score = сумма просмотров по часам окна с весом 0.5 ** (возраст / период
+    полураспада) и удаляет часы старше окна. Затрагиваются только записи с просмотрами в окне и записи,
+    выпавшие из него, - не вся таблица. Возвращает (обновлено записей, удалено часовых счетчиков).
+    """
+    now = now if now is not None else time.time()
+    oldest = current_hour(now) - settings.BLOG_TRENDING_WINDOW
+    # Возраст считается от начала часа: вес просмотров не превышает 1
+    age = _float(now / 3600) - F("hour")
+    weight = Power(_float(0.5), age / _float(settings.BLOG_TRENDING_HALF_LIFE))
+    score = (
+        PostViewBucket.objects.filter(post=OuterRef("pk"))
+        .order_by()
+        .values("post")
+        .annotate(score=Sum(ExpressionWrapper(F("views") * weight, output_field=FloatField())))
+        .values("score")
+    )
+    active = PostViewBucket.objects.values("post")
+
+    with transaction.atomic(using=DEFAULT_DB_ALIAS):
+        expired = PostViewBucket.objects.filter(hour__lt=oldest)
+        # Записи, у которых в окне не осталось просмотров
+        dropped = BlogPost.objects.filter(pk__in=expired.values("post")).exclude(
+            pk__in=active.filter(hour__gte=oldest)
+        )
+        cleared = dropped.update(trending_score=0)
+        deleted, _ = expired.delete()
+        updated = BlogPost.objects.filter(pk__in=active).update(trending_score=Subquery(score))
+    return updated + cleared, deleted
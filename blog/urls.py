@@ -1,13 +1,21 @@
 from blog.apps import BlogConfig
 from django.urls import path
+from core.views import blog_feed
+from core.views import select_view
 from . import views
 
 
 app_name = BlogConfig.name
 
 urlpatterns = [
-    path('', views.BlogPostListView.as_view(), name='post_list'),
-    path('post/<slug:slug>/', views.BlogPostDetailView.as_view(), name='post_detail'),
+    path('', select_view('blog:post_list', views.BlogPostListView, views.AsyncBlogPostListView), name='post_list'),
+    path(
+        'post/<slug:slug>/',
+        select_view('blog:post_detail', views.BlogPostDetailView, views.AsyncBlogPostDetailView),
+        name='post_detail',
+    ),
+    path('popular/', views.BlogPopularPostListView.as_view(), name='post_popular'),
+    path('feed/<slug:kind>/', blog_feed, name='feed'),
 
     # Create
     path('create/', views.BlogPostCreateView.as_view(), name='post_create'),
@@ -1,10 +1,26 @@
+from django.core.paginator import InvalidPage
+from django.core.paginator import Paginator
+from django.http import Http404
+from django.template.response import TemplateResponse
+from django.views import View
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.urls import reverse_lazy
 from django.contrib.auth.mixins import LoginRequiredMixin
+
+from core.cache import CachedPageMixin
+from core.http import ConditionalGetMixin
+from core.rendering import attach_urls
+
+from .counters import view_counter
 from .models import BlogPost
+from .services import aget_blog_stats
+from .services import aget_trending_posts
+from .services import get_blog_stats
+from .services import get_trending_posts
+from .services import trending_posts
 
 
-class BlogPostListView(ListView):
+class BlogPostListView(CachedPageMixin, ListView):
     """Список всех записей(read)"""
     model = BlogPost
     template_name = 'blog/post_list.html'
@@ -12,26 +28,78 @@ class BlogPostListView(ListView):
     paginate_by = 5  # Пагинация по 5 записей на странице
 
     def get_queryset(self):
-        """Функция принимает список записей и возврашает только опубликованные записи"""
-        return BlogPost.objects.filter(is_published=True)
+        """Функция принимает список записей и возврашает только опубликованные записи (без полного текста)"""
+        return BlogPost.objects.published().for_listing()
+
+    def get_cache_dependencies(self):
+        # blog:trending - виджет популярных записей в боковой панели
+        return ['blog:posts', 'blog:trending']
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['title'] = 'Наш блог'
+        context['blog_stats'] = get_blog_stats()
+        context['trending_posts'] = get_trending_posts()
+        # URL карточек собираются без {% url %} на каждую карточку
+        attach_urls(context['posts'], 'blog:post_detail', 'slug', field='slug')
+        return context
+
+
+class BlogPopularPostListView(CachedPageMixin, ListView):
+    """Популярные записи: по рейтингу trending_score, который пересчитывает update_trending"""
+    template_name = 'blog/post_popular.html'
+    context_object_name = 'posts'
+    # Первые записи индекса по рейтингу, без COUNT и пагинации
+    popular_size = 20
+
+    def get_queryset(self):
+        return trending_posts().for_listing()[:self.popular_size]
+
+    def get_cache_dependencies(self):
+        return ['blog:posts', 'blog:trending']
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['title'] = 'Популярные статьи'
+        context['blog_stats'] = get_blog_stats()
+        attach_urls(context['posts'], 'blog:post_detail', 'slug', field='slug')
         return context
 
 
-class BlogPostDetailView(DetailView):
+class BlogPostDetailView(ConditionalGetMixin, CachedPageMixin, DetailView):
     """Детальный просмотр(read)"""
     model = BlogPost
     template_name = 'blog/post_detail.html'
     context_object_name = 'post'
 
+    def get_cache_dependencies(self):
+        return [f"blog.post:{self.kwargs['slug']}"]
+
+    def get_page_cache_extra(self, response):
+        """Сохраняем pk записи, чтобы учитывать просмотры и при отдаче страницы из кеша"""
+        return self.object.pk
+
+    def page_cache_hit(self, request, extra):
+        view_counter.record(extra)
+
+    def get_validators(self):
+        """Счетчик просмотров в ETag не входит, иначе ответ 304 был бы невозможен"""
+        row = BlogPost.objects.filter(slug=self.kwargs['slug']).values_list('pk', 'last_modified').first()
+        if row is None:
+            return None
+        self._validated_pk = row[0]
+        return row, row[1]
+
+    def not_modified(self, request):
+        """Просмотр засчитывается и при ответе 304"""
+        view_counter.record(self._validated_pk)
+
     def get_object(self, queryset=None):
-        """Функция увеличивает счетчик просмотров"""
+        """Функция учитывает просмотр в буфере счетчика (запись в БД происходит пачками в фоне)"""
         obj = super().get_object(queryset)
-        obj.views_count += 1
-        obj.save(update_fields=['views_count'])
+        view_counter.record(obj.pk)
+        # Показываем просмотры с учетом еще не сброшенных в БД
+        obj.views_count += view_counter.pending(obj.pk)
         return obj
 
     def get_context_data(self, **kwargs):
@@ -40,6 +108,55 @@ class BlogPostDetailView(DetailView):
         return context
 
 
+class AsyncBlogPostListView(View):
+    """Асинхронный вариант BlogPostListView: acount() для пагинатора и async-итерация по странице"""
+    template_name = BlogPostListView.template_name
+    paginate_by = BlogPostListView.paginate_by
+
+    async def get(self, request, *args, **kwargs):
+        queryset = BlogPost.objects.published().for_listing()
+        paginator = Paginator(queryset, self.paginate_by)
+        # Paginator.count - cached_property: подставляем результат acount(), чтобы он не выполнял COUNT синхронно
+        paginator.count = await queryset.acount()
+        page_number = request.GET.get('page') or 1
+        try:
+            page = paginator.page(paginator.num_pages if page_number == 'last' else page_number)
+        except InvalidPage as e:
+            raise Http404(f'Некорректная страница: {e}')
+        page.object_list = [post async for post in page.object_list]
+        attach_urls(page.object_list, 'blog:post_detail', 'slug', field='slug')
+        context = {
+            'paginator': paginator,
+            'page_obj': page,
+            'is_paginated': page.has_other_pages(),
+            'object_list': page.object_list,
+            'posts': page.object_list,
+            'title': 'Наш блог',
+            'blog_stats': await aget_blog_stats(),
+            'trending_posts': await aget_trending_posts(),
+        }
+        return TemplateResponse(request, self.template_name, context)
+
+
+class AsyncBlogPostDetailView(View):
+    """Асинхронный вариант BlogPostDetailView: запись через aget(), просмотр - в буфер счетчика"""
+    template_name = BlogPostDetailView.template_name
+
+    async def get(self, request, *args, **kwargs):
+        try:
+            post = await BlogPost.objects.aget(slug=kwargs['slug'])
+        except BlogPost.DoesNotExist:
+            raise Http404('Запись не найдена')
+        await view_counter.arecord(post.pk)
+        post.views_count += view_counter.pending(post.pk)
+        context = {
+            'object': post,
+            'post': post,
+            'title': post.title,
+        }
+        return TemplateResponse(request, self.template_name, context)
+
+
 class BlogPostCreateView(LoginRequiredMixin, CreateView):
     """Cоздание записи (только для авторизованных, create)"""
     model = BlogPost
@@ -0,0 +1,76 @@
+from dataclasses import dataclass
+from decimal import Decimal
+
+from catalog.models import Product
+
+SESSION_KEY = "cart"
+MAX_QUANTITY = 99
+
+
+@dataclass
+class CartLine:
+    product: Product
+    quantity: int
+
+    @property
+    def total(self):
+        return self.product.price * self.quantity
+
+
+class Cart:
+    """
+    Корзина в сессии: {"pk товара": количество}. В БД корзина не хранится - нагрузка ложится на хранилище
+    сессий (SESSION_ENGINE), а сессия сохраняется только при изменении корзины. Названия и цены не копируются
+    в сессию: при выводе они читаются одним in_bulk, поэтому всегда актуальны.
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self.items = session.get(SESSION_KEY, {})
+
+    def __len__(self):
+        """Количество единиц товара в корзине (без запроса к БД)"""
+        return sum(self.items.values())
+
+    def add(self, product_id, quantity=1):
+        self.set(product_id, self.items.get(str(product_id), 0) + quantity)
+
+    def set(self, product_id, quantity):
+        """Устанавливает количество товара; 0 и меньше - удаляет товар"""
+        key = str(product_id)
+        if quantity <= 0:
+            if key not in self.items:
+                return
+            del self.items[key]
+        else:
+            self.items[key] = min(quantity, MAX_QUANTITY)
+        self._save()
+
+    def remove(self, product_id):
+        self.set(product_id, 0)
+
+    def clear(self):
+        self.items = {}
+        self._save()
+
+    def lines(self):
+        """Строки корзины с товарами одним запросом; удаленные из каталога товары убираются из корзины"""
+        if not self.items:
+            return []
+        products = Product.objects.only("id", "name", "price").order_by().in_bulk([int(pk) for pk in self.items])
+        lines = [
+            CartLine(products[int(pk)], quantity) for pk, quantity in self.items.items() if int(pk) in products
+        ]
+        if len(lines) != len(self.items):
+            self.items = {str(line.product.pk): line.quantity for line in lines}
+            self._save()
+        return lines
+
+    @staticmethod
+    def total(lines):
+        """Сумма в Decimal: цены DecimalField не проходят через float"""
+        return sum((line.total for line in lines), Decimal("0"))
+
+    def _save(self):
+        self.session[SESSION_KEY] = self.items
+        self.session.modified = True
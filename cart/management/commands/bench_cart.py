@@ -0,0 +1,152 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db.backends.signals import connection_created
+from django.test import Client
+from django.test import override_settings
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+
+from catalog.models import Product
+
+# Хранилище сессий -> SESSION_ENGINE дочернего процесса
+ENGINES = {
+    "db": "django.contrib.sessions.backends.db",
+    "cache": "django.contrib.sessions.backends.cache",
+    "cached_db": "django.contrib.sessions.backends.cached_db",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагрузочный тест корзины: --sessions посетителей (по умолчанию 10 000) добавляют два товара и читают "
+        "виджет корзины при хранении сессий в БД, в кеше и в кеше с записью в БД. Запросы/с, p50/p95 "
+        "и запросы к таблице django_session на запрос; каждое хранилище - отдельный процесс"
+    )
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument("--sessions", type=int, default=10_000, help="Посетителей (сессий) на хранилище")
+        parser.add_argument("--concurrency", type=int, default=20, help="Одновременных посетителей")
+        parser.add_argument("--engines", type=str, default="db,cache,cached_db", help="Хранилища через запятую")
+        parser.add_argument("--worker", choices=tuple(ENGINES), default=None, help="Внутренний: одно хранилище")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["sessions"] < 1 or options["concurrency"] < 1:
+            raise CommandError("--sessions и --concurrency должны быть положительными")
+        if options["worker"]:
+            self.stdout.write(json.dumps(self._work(options)))
+            return
+
+        engines = [engine.strip() for engine in options["engines"].split(",") if engine.strip()]
+        unknown = set(engines) - set(ENGINES)
+        if unknown:
+            raise CommandError(f"Неизвестные хранилища: {', '.join(sorted(unknown))}")
+
+        self.stdout.write(
+            f"{'хранилище':<10} {'запросов':>9} {'ошибок':>7} {'запр/с':>8} {'p50 мс':>8} {'p95 мс':>8} "
+            f"{'SQL/запр':>9} {'сессии SQL/запр':>16}"
+        )
+        for engine in engines:
+            result = self._spawn(engine, options)
+            self.stdout.write(
+                f"{engine:<10} {result['requests']:>9} {result['errors']:>7} {result['throughput_rps']:>8.1f} "
+                f"{result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {result['queries_per_request']:>9.2f} "
+                f"{result['session_queries_per_request']:>16.2f}"
+            )
+
+    def _spawn(self, engine: str, options: dict) -> dict:
+        """SessionMiddleware выбирает хранилище при запуске, поэтому каждое хранилище - отдельный процесс"""
+        command = [
+            sys.executable,
+            str(settings.BASE_DIR / "manage.py"),
+            "bench_cart",
+            "--worker",
+            engine,
+            "--sessions",
+            str(options["sessions"]),
+            "--concurrency",
+            str(options["concurrency"]),
+        ]
+        env = {**os.environ, "SESSION_ENGINE": ENGINES[engine]}
+        completed = subprocess.run(command, env=env, capture_output=True, text=True)
+        if completed.returncode != 0:
+            raise CommandError(f"{engine}: {completed.stderr.strip()}")
+        return json.loads(completed.stdout)
+
+    def _work(self, options: dict) -> dict:
+        # Разрешает хост testserver
+        setup_test_environment()
+        pks = list(Product.objects.order_by("?").values_list("pk", flat=True)[:200])
+        if not pks:
+            raise CommandError("Нет товаров, сначала выполните generate_test_data")
+
+        lock = threading.Lock()
+        queries = {"all": 0, "session": 0}
+
+        def count_query(execute: Any, sql: str, params: Any, many: bool, context: Any) -> Any:
+            with lock:
+                queries["all"] += 1
+                queries["session"] += "django_session" in sql
+            return execute(sql, params, many, context)
+
+        def instrument(sender: Any, connection: Any, **kwargs: Any) -> None:
+            if count_query not in connection.execute_wrappers:
+                # В начало списка: RequestInstrumentationMiddleware снимает последнюю обертку в конце запроса
+                connection.execute_wrappers.insert(0, count_query)
+
+        # Соединения потоков создаются во время теста - счетчик подключается к каждому (при CONN_MAX_AGE=0
+        # соединение переоткрывается на каждый запрос, но объект соединения потока тот же)
+        connection_created.connect(instrument)
+        summary_url = reverse("cart:summary")
+        session_keys = []
+
+        def visitor(index: int) -> list[tuple[int, float]]:
+            client = Client()
+            measured = []
+            for method, url in (
+                ("post", reverse("cart:add", kwargs={"pk": pks[index % len(pks)]})),
+                ("post", reverse("cart:add", kwargs={"pk": pks[(index * 7 + 1) % len(pks)]})),
+                ("get", summary_url),
+            ):
+                started = time.perf_counter()
+                response = getattr(client, method)(url, headers={"X-Cart-Fragment": "summary"})
+                measured.append((response.status_code, (time.perf_counter() - started) * 1000))
+            if settings.SESSION_COOKIE_NAME in client.cookies:
+                with lock:
+                    session_keys.append(client.cookies[settings.SESSION_COOKIE_NAME].value)
+            return measured
+
+        # Кеш страниц не участвует: корзина не кешируется
+        with override_settings(PAGE_CACHE_TIMEOUT=0):
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+                measured = [item for items in pool.map(visitor, range(options["sessions"])) for item in items]
+            elapsed = time.perf_counter() - started
+        connection_created.disconnect(instrument)
+
+        # Сессии теста не остаются в таблице
+        for start in range(0, len(session_keys), 1000):
+            Session.objects.filter(session_key__in=session_keys[start : start + 1000]).delete()
+
+        latencies = sorted(latency for _, latency in measured)
+        p95_index = max(0, min(len(latencies) - 1, round(len(latencies) * 0.95) - 1))
+        return {
+            "requests": len(measured),
+            "errors": sum(1 for status, _ in measured if status != 200),
+            "throughput_rps": round(len(measured) / elapsed, 1),
+            "p50_ms": round(statistics.median(latencies), 3),
+            "p95_ms": round(latencies[p95_index], 3),
+            "queries_per_request": round(queries["all"] / len(measured), 2),
+            "session_queries_per_request": round(queries["session"] / len(measured), 2),
+        }
@@ -0,0 +1,83 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from catalog.models import Product
+
+
+class CartTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.cheap = Product.objects.create(name="Кабель", description="", price=Decimal("0.10"))
+        cls.dear = Product.objects.create(name="Телевизор", description="", price=Decimal("1299.90"))
+
+    def setUp(self):
+        cache.clear()
+
+    def add(self, product, quantity=1, fragment="summary"):
+        return self.client.post(
+            reverse("cart:add", kwargs={"pk": product.pk}),
+            {"quantity": quantity},
+            headers={"X-Cart-Fragment": fragment},
+        )
+
+    def test_add_returns_summary_fragment_with_decimal_total(self):
+        self.add(self.cheap, 3)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.add(self.dear)
+        # Проверка товара и цены всей корзины одним in_bulk, без запроса на каждую строку
+        self.assertEqual(sum('"catalog_product"' in query["sql"] for query in queries.captured_queries), 2)
+        self.assertTemplateUsed(response, "cart/includes/cart_summary.html")
+        self.assertNotContains(response, "<html")
+        self.assertEqual(response.context["total"], Decimal("1300.20"))
+        self.assertEqual(response.context["count"], 4)
+
+    def test_deleted_product_dropped_from_cart(self):
+        self.add(self.cheap)
+        self.add(self.dear)
+        self.dear.delete()
+        response = self.client.get(reverse("cart:detail"))
+        self.assertEqual([line.product.pk for line in response.context["lines"]], [self.cheap.pk])
+        self.assertEqual(self.client.session["cart"], {str(self.cheap.pk): 1})
+
+    def test_remove_without_javascript_redirects_to_cart(self):
+        self.add(self.cheap)
+        response = self.client.post(reverse("cart:remove", kwargs={"pk": self.cheap.pk}))
+        self.assertRedirects(response, reverse("cart:detail"))
+        self.assertEqual(self.client.session["cart"], {})
+
+    def test_product_page_stays_cacheable(self):
+        """Кнопка корзины не добавляет в кешируемую страницу товара ни токен CSRF, ни содержимое корзины"""
+        self.add(self.cheap)
+        response = self.client.get(reverse("catalog:product_detail", kwargs={"pk": self.dear.pk}))
+        self.assertContains(response, reverse("cart:add", kwargs={"pk": self.dear.pk}))
+        self.assertNotContains(response, "csrfmiddlewaretoken")
+        self.assertNotIn("csrftoken", response.cookies)
+
+    def test_add_with_enforced_csrf_checks(self):
+        client = Client(enforce_csrf_checks=True)
+        url = reverse("cart:add", kwargs={"pk": self.cheap.pk})
+        self.assertEqual(client.post(url).status_code, 403)
+
+        # Без JavaScript: страница подтверждения выдает токен для обычной отправки формы
+        response = client.get(url)
+        self.assertContains(response, "csrfmiddlewaretoken")
+        token = response.context["csrf_token"]
+        self.assertRedirects(client.post(url, {"csrfmiddlewaretoken": token}), reverse("cart:detail"))
+
+        # С JavaScript: токен из cookie, которую выдает виджет корзины
+        client = Client(enforce_csrf_checks=True)
+        client.get(reverse("cart:summary"))
+        response = client.post(
+            url, headers={"X-CSRFToken": client.cookies["csrftoken"].value, "X-Cart-Fragment": "summary"}
+        )
+        self.assertEqual(response.context["count"], 1)
+
+    def test_malformed_quantity_is_bad_request(self):
+        response = self.client.post(reverse("cart:add", kwargs={"pk": self.cheap.pk}), {"quantity": "два"})
+        self.assertEqual(response.status_code, 400)
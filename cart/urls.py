@@ -0,0 +1,14 @@
+from django.urls import path
+
+from . import views
+from .apps import CartConfig
+
+app_name = CartConfig.name
+
+urlpatterns = [
+    path("", views.cart_detail, name="detail"),
+    path("summary/", views.cart_summary, name="summary"),
+    path("add/<int:pk>/", views.cart_add, name="add"),
+    path("update/<int:pk>/", views.cart_update, name="update"),
+    path("remove/<int:pk>/", views.cart_remove, name="remove"),
+]
@@ -0,0 +1,88 @@
+from django.core.exceptions import BadRequest
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from django.shortcuts import redirect
+from django.shortcuts import render
+from django.views.decorators.cache import never_cache
+from django.views.decorators.csrf import ensure_csrf_cookie
+from django.views.decorators.http import require_http_methods
+from django.views.decorators.http import require_POST
+
+from catalog.models import Product
+
+from .cart import Cart
+
+# Фрагменты, которые возвращают изменения корзины по заголовку X-Cart-Fragment (запросы из static/js/cart.js)
+FRAGMENTS = {
+    "summary": "cart/includes/cart_summary.html",
+    "items": "cart/includes/cart_items.html",
+}
+
+
+def render_cart(request, template_name, cart=None):
+    cart = cart or Cart(request.session)
+    lines = cart.lines()
+    context = {"lines": lines, "total": cart.total(lines), "count": sum(line.quantity for line in lines)}
+    return render(request, template_name, context)
+
+
+def cart_response(request, cart):
+    """Ответ на изменение корзины: только изменившийся фрагмент для AJAX, иначе - переход на страницу корзины"""
+    template_name = FRAGMENTS.get(request.headers.get("X-Cart-Fragment"))
+    if template_name is None:
+        return redirect("cart:detail")
+    return render_cart(request, template_name, cart)
+
+
+def parse_quantity(request, default):
+    try:
+        return int(request.POST.get("quantity", default))
+    except ValueError:
+        raise BadRequest("Некорректное количество")
+
+
+@never_cache
+def cart_detail(request):
+    return render_cart(request, "cart/cart_detail.html")
+
+
+@never_cache
+@ensure_csrf_cookie
+def cart_summary(request):
+    """
+    Виджет корзины в шапке. Страницы каталога кешируются целиком для всех анонимных посетителей,
+    поэтому виджет подгружается отдельным запросом, который заодно выдает cookie CSRF для AJAX-запросов
+    """
+    return render_cart(request, FRAGMENTS["summary"])
+
+
+@never_cache
+@ensure_csrf_cookie
+@require_http_methods(["GET", "POST"])
+def cart_add(request, pk):
+    """
+    POST добавляет товар в корзину. Форма кешируемой страницы товара не содержит токен CSRF и без JavaScript
+    отправляется сюда GET-запросом: в ответ - страница подтверждения с токеном
+    """
+    if request.method == "GET":
+        product = get_object_or_404(Product.objects.only("id", "name", "price"), pk=pk)
+        return render(request, "cart/cart_add.html", {"product": product})
+    if not Product.objects.filter(pk=pk).exists():
+        raise Http404("Товар не найден")
+    cart = Cart(request.session)
+    cart.add(pk, max(1, parse_quantity(request, 1)))
+    return cart_response(request, cart)
+
+
+@require_POST
+def cart_update(request, pk):
+    cart = Cart(request.session)
+    cart.set(pk, parse_quantity(request, 0))
+    return cart_response(request, cart)
+
+
+@require_POST
+def cart_remove(request, pk):
+    cart = Cart(request.session)
+    cart.remove(pk)
+    return cart_response(request, cart)
@@ -1,5 +1,14 @@
 from django.contrib import admin
+from django.http import StreamingHttpResponse
 
+from core.admin import LargeTableAdminMixin
+from core.cache import bump_versions_on_commit
+from core.search import FullTextAdminSearchMixin
+from core.sitemaps import mark_changed
+
+from .export import FORMATS
+from .export import chunked
+from .export import export_rows
 from .models import Category
 from .models import Product
 
@@ -7,26 +16,33 @@ from .models import Product
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
     # Отображение полей в списке
-    list_display = ("id", "name")
+    list_display = ("id", "name", "product_count")
 
     # Поиск по названию категории
     search_fields = ("name", "description")
 
     # Поля для отображения при редактировании
-    fields = ("name", "description")
+    fields = ("name", "description", "product_count")
 
-    readonly_fields = ("id",)
+    readonly_fields = ("id", "product_count")
 
 
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
+class ProductAdmin(LargeTableAdminMixin, FullTextAdminSearchMixin, admin.ModelAdmin):
     # Отображение полей в списке
     list_display = ("id", "name", "price", "category", "created_at", "updated_at")
 
+    # Категории списка - в том же запросе, без описания и поискового вектора
+    list_select_related = ("category",)
+    list_only = ("id", "name", "price", "category", "category__name", "created_at", "updated_at")
+
+    # Категория выбирается поиском (CategoryAdmin.search_fields), а не списком всех категорий
+    autocomplete_fields = ("category",)
+
     # Фильтрация по категории
     list_filter = ("category",)
 
-    # Поиск по полям name и description
+    # Поиск по полям name и description (через полнотекстовый индекс search_vector)
     search_fields = ("name", "description")
 
     # Поля для отображения при редактировании
@@ -55,5 +71,31 @@ class ProductAdmin(admin.ModelAdmin):
     # Количество элементов на странице
     list_per_page = 20
 
-    # Добавляем возможность быстрого редактирования
+    # Добавляем возможность быстрого редактирования (сохраняется одним bulk_update, см. LargeTableAdminMixin)
     list_editable = ("price",)
+
+    def list_edits_saved(self, request, objects):
+        """То же, что сигнал product_changed; цена не влияет на счетчики категорий и изображения"""
+        bump_versions_on_commit("catalog:products", *(f"catalog.product:{product.pk}" for product in objects))
+        for product in objects:
+            mark_changed("products", product.pk)
+
+    # Выгрузка выбранных товаров (или всех по фильтру при "выбрать все") потоком, без загрузки в память
+    actions = ("export_csv", "export_jsonl")
+
+    @admin.action(description="Выгрузить в CSV")
+    def export_csv(self, request, queryset):
+        return self._export(queryset, "csv", "text/csv")
+
+    @admin.action(description="Выгрузить в JSON Lines")
+    def export_jsonl(self, request, queryset):
+        return self._export(queryset, "jsonl", "application/x-ndjson")
+
+    @staticmethod
+    def _export(queryset, file_format, content_type):
+        lines = FORMATS[file_format](export_rows(queryset))
+        response = StreamingHttpResponse(
+            (chunk.encode() for chunk in chunked(lines)), content_type=f"{content_type}; charset=utf-8"
+        )
+        response["Content-Disposition"] = f'attachment; filename="products.{file_format}"'
+        return response
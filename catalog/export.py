@@ -0,0 +1,49 @@
+import csv
+from itertools import islice
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+# Колонки выгрузки; name, description, price, category и image читает import_products
+COLUMNS = ("id", "name", "description", "price", "category", "image", "created_at", "updated_at")
+_FIELDS = ("pk", "name", "description", "price", "category__name", "image", "created_at", "updated_at")
+CHUNK_SIZE = 2_000
+# Строк выгрузки в одном фрагменте записи в файл или ответа StreamingHttpResponse
+LINES_PER_WRITE = 500
+
+
+def export_rows(queryset, chunk_size=CHUNK_SIZE):
+    """
+    Кортежи COLUMNS по товарам queryset в порядке pk. В PostgreSQL iterator() читает через серверный курсор
+    по chunk_size строк, поэтому память не зависит от размера каталога; категория - из JOIN в том же запросе.
+    """
+    return queryset.order_by("pk").values_list(*_FIELDS).iterator(chunk_size=chunk_size)
+
+
+class _Echo:
+    """Файлоподобный объект для csv.writer: writerow() возвращает строку вместо записи"""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(COLUMNS)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def jsonl_lines(rows):
+    """Строки JSON Lines; цена - строкой с точной записью из БД, даты - ISO 8601"""
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(dict(zip(COLUMNS, row))) + "\n"
+
+
+FORMATS = {"csv": csv_lines, "jsonl": jsonl_lines}
+
+
+def chunked(lines, size=LINES_PER_WRITE):
+    """Склеивает строки выгрузки во фрагменты по size строк"""
+    while chunk := "".join(islice(lines, size)):
+        yield chunk
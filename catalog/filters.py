@@ -0,0 +1,165 @@
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date
+from datetime import datetime
+from datetime import time
+from decimal import Decimal
+from decimal import InvalidOperation
+from typing import Any
+
+from django.db.models import Case
+from django.db.models import Count
+from django.db.models import IntegerField
+from django.db.models import Q
+from django.db.models import QuerySet
+from django.db.models import Value
+from django.db.models import When
+from django.utils import timezone
+
+# Варианты сортировки витрины -> ключ keyset-пагинации (последнее поле - pk)
+SORT_ORDERINGS = {
+    "new": ("-created_at", "name", "pk"),
+    "price": ("price", "pk"),
+    "-price": ("-price", "pk"),
+    "name": ("name", "pk"),
+}
+SORT_LABELS = {"new": "Сначала новые", "price": "Сначала дешевые", "-price": "Сначала дорогие", "name": "По названию"}
+
+# Нижние границы корзин гистограммы цен (руб.); последняя корзина не ограничена сверху
+PRICE_BUCKETS = (0, 1_000, 5_000, 20_000, 100_000, 250_000)
+# Шаг цены (Product.price хранит копейки): верхняя граница ссылки корзины - последняя цена перед следующей корзиной
+PRICE_STEP = Decimal("0.01")
+
+
+class InvalidFilter(ValueError):
+    """Некорректное значение параметра фильтра"""
+
+
+@dataclass
+class ProductFilters:
+    """Фильтры и сортировка списка товаров из параметров запроса (?category=&price_min=&price_max=&since=&sort=)"""
+
+    category: int | None = None
+    price_min: Decimal | None = None
+    price_max: Decimal | None = None
+    since: date | None = None
+    sort: str = "new"
+
+    @classmethod
+    def from_query(cls, params: Any) -> "ProductFilters":
+        """Разбирает QueryDict, выбрасывает InvalidFilter при некорректных значениях"""
+        category = params.get("category") or None
+        if category is not None and not category.isdigit():
+            raise InvalidFilter("Некорректная категория")
+        since = params.get("since") or None
+        if since is not None:
+            try:
+                since = date.fromisoformat(since)
+            except ValueError:
+                raise InvalidFilter("Дата должна быть в формате ГГГГ-ММ-ДД")
+        sort = params.get("sort") or "new"
+        if sort not in SORT_ORDERINGS:
+            raise InvalidFilter("Неизвестная сортировка")
+        return cls(
+            category=int(category) if category is not None else None,
+            price_min=cls._price(params.get("price_min")),
+            price_max=cls._price(params.get("price_max")),
+            since=since,
+            sort=sort,
+        )
+
+    @staticmethod
+    def _price(value: str | None) -> Decimal | None:
+        if not value:
+            return None
+        try:
+            price = Decimal(value)
+        except InvalidOperation:
+            raise InvalidFilter("Некорректная цена")
+        if not price.is_finite() or price < 0:
+            raise InvalidFilter("Некорректная цена")
+        return price
+
+    def cache_key(self) -> str:
+        """Ключ фасетов: сортировка на них не влияет"""
+        return f"{self.category}:{self.price_min}:{self.price_max}:{self.since}"
+
+    @property
+    def ordering(self) -> tuple[str, ...]:
+        return SORT_ORDERINGS[self.sort]
+
+    def category_q(self) -> Q:
+        return Q(category_id=self.category) if self.category is not None else Q()
+
+    def price_q(self) -> Q:
+        q = Q()
+        if self.price_min is not None:
+            q &= Q(price__gte=self.price_min)
+        if self.price_max is not None:
+            q &= Q(price__lte=self.price_max)
+        return q
+
+    def since_q(self) -> Q:
+        if self.since is None:
+            return Q()
+        return Q(created_at__gte=timezone.make_aware(datetime.combine(self.since, time.min)))
+
+    def apply(self, queryset: QuerySet) -> QuerySet:
+        """Все фильтры сразу - для списка товаров"""
+        return queryset.filter(self.since_q() & self.category_q() & self.price_q())
+
+    def facet_queryset(self, queryset: QuerySet) -> QuerySet:
+        """
+        Один агрегирующий запрос для всех фасетов: GROUP BY категория и корзина цены,
+        попадание в диапазон цен считается отдельным COUNT(*) FILTER в тех же группах.
+        Ячеек не больше (категории x корзины), поэтому сборка фасетов в Python ничего не стоит.
+        COUNT(*) вместо COUNT(id) нужен для index-only scan по индексу (category, price) INCLUDE created_at.
+        """
+        bucket = Case(
+            *(When(price__lt=bound, then=Value(index)) for index, bound in enumerate(PRICE_BUCKETS[1:])),
+            default=Value(len(PRICE_BUCKETS) - 1),
+            output_field=IntegerField(),
+        )
+        counts = {"count": Count("*")}
+        price_q = self.price_q()
+        if price_q:
+            counts["in_price"] = Count("price", filter=price_q)
+        return queryset.filter(self.since_q()).order_by().values("category_id", bucket=bucket).annotate(**counts)
+
+    def build_facets(self, rows: list[dict], categories: list[dict]) -> dict:
+        """
+        Фасеты из строк facet_queryset(). Как принято в фасетной навигации, счетчики каждого фасета учитывают
+        все фильтры, кроме своего: категории - с фильтром цены, гистограмма цен - с фильтром категории.
+        """
+        by_category, by_bucket, total = Counter(), Counter(), 0
+        for row in rows:
+            in_category = self.category is None or row["category_id"] == self.category
+            in_price = row.get("in_price", row["count"])
+            by_category[row["category_id"]] += in_price
+            if in_category:
+                total += in_price
+                by_bucket[row["bucket"]] += row["count"]
+
+        # Корзина считается как price < следующей границы, а фильтр price_max - как price <= max
+        bounds = [*(bound - PRICE_STEP for bound in PRICE_BUCKETS[1:]), None]
+        return {
+            "total": total,
+            "categories": [
+                {
+                    "id": category["id"],
+                    "name": category["name"],
+                    "count": by_category[category["id"]],
+                    "selected": category["id"] == self.category,
+                }
+                for category in categories
+                if by_category[category["id"]] or category["id"] == self.category
+            ],
+            "price": [
+                {"min": low, "max": high, "count": by_bucket[index]}
+                for index, (low, high) in enumerate(zip(PRICE_BUCKETS, bounds))
+            ],
+        }
+
+    def facets(self, queryset: QuerySet, categories: list[dict]) -> dict:
+        """Фасеты без кеша (см. catalog.services.get_product_facets)"""
+        return self.build_facets(list(self.facet_queryset(queryset)), categories)
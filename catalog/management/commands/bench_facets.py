@@ -0,0 +1,89 @@
+import statistics
+import time
+from datetime import timedelta
+from decimal import Decimal
+from typing import Any
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from catalog.filters import ProductFilters
+from catalog.models import Product
+from catalog.services import get_category_menu
+from catalog.services import get_product_facets
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет расчет фасетов витрины (счетчики категорий и гистограмма цен) для типичных фильтров "
+        "без кеша (бюджет проверяется по p95) и из кеша; рассчитан на прогон после "
+        "generate_test_data --products 1000000"
+    )
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument("--budget-ms", type=float, default=1000, help="Допустимое p95 на один расчет фасетов, мс")
+        parser.add_argument("--repeat", type=int, default=20, help="Повторов каждого сценария")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["repeat"] < 1:
+            raise CommandError("--repeat должен быть положительным")
+        total = Product.objects.count()
+        if not total:
+            raise CommandError("Нет товаров, сначала выполните generate_test_data")
+        categories = get_category_menu()
+
+        self.stdout.write(f"Товаров: {total}, бюджет p95: {options['budget_ms']:.0f} мс\n")
+        self.stdout.write(f"{'сценарий':<28} {'запросов':>9} {'p50, мс':>10} {'p95, мс':>10} {'из кеша, мс':>12}")
+        over_budget = []
+        for name, filters in self._scenarios().items():
+            queries, p50, p95 = self._measure(filters, categories, options["repeat"])
+            get_product_facets(filters)
+            started = time.perf_counter()
+            get_product_facets(filters)
+            cached_ms = (time.perf_counter() - started) * 1000
+            mark = "" if p95 <= options["budget_ms"] else "  <- превышен бюджет"
+            self.stdout.write(f"{name:<28} {queries:>9} {p50:>10.1f} {p95:>10.1f} {cached_ms:>12.2f}{mark}")
+            if mark:
+                over_budget.append(name)
+
+        if over_budget:
+            raise CommandError(f"Бюджет превышен: {', '.join(over_budget)}")
+        self.stdout.write(self.style.SUCCESS("Все сценарии укладываются в бюджет"))
+
+    @staticmethod
+    def _scenarios() -> dict[str, ProductFilters]:
+        largest = (
+            Product.objects.exclude(category=None)
+            .order_by()
+            .values_list("category_id")
+            .annotate(total=Count("pk"))
+            .order_by("-total")
+            .values_list("category_id", flat=True)
+            .first()
+        )
+        since = (timezone.now() - timedelta(days=30)).date()
+        return {
+            "без фильтров": ProductFilters(),
+            "крупнейшая категория": ProductFilters(category=largest),
+            "цена 1000-20000": ProductFilters(price_min=Decimal(1000), price_max=Decimal(20000)),
+            "новинки за 30 дней": ProductFilters(since=since),
+            "категория + цена": ProductFilters(category=largest, price_min=Decimal(1000), price_max=Decimal(20000)),
+        }
+
+    @staticmethod
+    def _measure(filters: ProductFilters, categories: list[dict], repeat: int) -> tuple[int, float, float]:
+        """Количество SQL-запросов на расчет и перцентили времени"""
+        with CaptureQueriesContext(connection) as captured:
+            filters.facets(Product.objects.all(), categories)
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            filters.facets(Product.objects.all(), categories)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        p95 = timings[max(0, min(len(timings) - 1, round(len(timings) * 0.95) - 1))]
+        return len(captured), statistics.median(timings), p95
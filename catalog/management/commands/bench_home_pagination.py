@@ -0,0 +1,65 @@
+import statistics
+import time
+from typing import Any
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.core.paginator import Paginator
+
+from catalog.models import Product
+from catalog.pagination import KeysetPaginator
+
+
+class Command(BaseCommand):
+    help = "Сравнивает задержку курсорной и offset-пагинации главной страницы от первой до глубоких страниц"
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument("--per-page", type=int, default=12, help="Товаров на странице")
+        parser.add_argument(
+            "--pages", type=str, default="1,10,100,1000", help="Номера страниц для замера через запятую"
+        )
+        parser.add_argument("--category", type=int, default=None, help="Фильтр по id категории")
+        parser.add_argument("--repeat", type=int, default=5, help="Повторов замера каждой страницы")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        try:
+            pages = sorted({int(p) for p in options["pages"].split(",") if p.strip()})
+        except ValueError:
+            raise CommandError("--pages должен быть списком чисел через запятую")
+        if not pages or pages[0] < 1:
+            raise CommandError("Номера страниц начинаются с 1")
+
+        queryset = Product.objects.all()
+        if options["category"] is not None:
+            queryset = queryset.filter(category_id=options["category"])
+
+        per_page = options["per_page"]
+        repeat = options["repeat"]
+        keyset = KeysetPaginator(queryset, per_page)
+        offset = Paginator(queryset.order_by(*KeysetPaginator.ordering), per_page)
+
+        self.stdout.write(f"{'страница':>10} {'keyset, мс':>12} {'offset, мс':>12}")
+
+        # Проходим по курсорам до нужных страниц, запоминая токен каждой замеряемой страницы
+        cursor = None
+        for number in range(1, pages[-1] + 1):
+            if number in pages:
+                keyset_ms = self._measure(lambda: keyset.get_page(cursor), repeat)
+                offset_ms = self._measure(lambda: list(offset.page(number).object_list), repeat)
+                self.stdout.write(f"{number:>10} {keyset_ms:>12.3f} {offset_ms:>12.3f}")
+            page = keyset.get_page(cursor)
+            if not page.has_next():
+                if number < pages[-1]:
+                    self.stdout.write(self.style.WARNING(f"Данные закончились на странице {number}"))
+                break
+            cursor = page.next_cursor
+
+    @staticmethod
+    def _measure(fetch: Any, repeat: int) -> float:
+        """Медиана времени выполнения fetch() в миллисекундах"""
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fetch()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
@@ -63,6 +63,9 @@ class Command(BaseCommand):
                     price=1000.00,
                 )
 
+        # loaddata сохраняет товары в обход save(), поэтому анонсы карточек заполняются отдельно
+        call_command("backfill_excerpts", only=["products"])
+
         # Выводим итоги
         total_categories = Category.objects.count()
         total_products = Product.objects.count()
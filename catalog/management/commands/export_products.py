@@ -0,0 +1,135 @@
+import gzip
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import as_completed
+from pathlib import Path
+from typing import Any
+
+import django
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db import connections
+
+from catalog.export import FORMATS
+from catalog.export import chunked
+from catalog.export import export_rows
+from catalog.models import Category
+from catalog.models import Product
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss в Linux - килобайты
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def write_export(queryset: Any, path: Path | None, file_format: str, compress: bool, chunk_size: int) -> int:
+    """Пишет выгрузку queryset в path (None - stdout), возвращает число строк"""
+    count = 0
+
+    def counted(rows: Any) -> Any:
+        nonlocal count
+        for row in rows:
+            count += 1
+            yield row
+
+    lines = FORMATS[file_format](counted(export_rows(queryset, chunk_size)))
+    if path is None:
+        output = gzip.open(sys.stdout.buffer, "wt", encoding="utf-8") if compress else sys.stdout
+    elif compress:
+        output = gzip.open(path, "wt", encoding="utf-8", newline="", compresslevel=6)
+    else:
+        output = path.open("w", encoding="utf-8", newline="")
+    try:
+        for chunk in chunked(lines):
+            output.write(chunk)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return count
+
+
+def export_category(
+    category_id: int | None, path: str, file_format: str, compress: bool, chunk_size: int
+) -> tuple[int | None, int, float, float]:
+    """Выполняется в дочернем процессе: выгрузка одной категории (None - товары без категории) в свой файл"""
+    started = time.perf_counter()
+    count = write_export(
+        Product.objects.filter(category_id=category_id), Path(path), file_format, compress, chunk_size
+    )
+    connections.close_all()
+    return category_id, count, time.perf_counter() - started, peak_rss_mb()
+
+
+class Command(BaseCommand):
+    help = (
+        "Потоковая выгрузка товаров с названием категории в CSV или JSON Lines (при необходимости gzip) "
+        "через серверный курсор: память не зависит от размера каталога. С --workers > 1 каждая категория "
+        "выгружается отдельным процессом в свой файл каталога path. Формат совместим с import_products"
+    )
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument("path", type=str, help="Файл выгрузки (- для stdout) или каталог при --workers > 1")
+        parser.add_argument("--format", choices=tuple(FORMATS), default=None, help="Формат (по расширению файла)")
+        parser.add_argument("--gzip", action="store_true", help="Сжимать gzip (включается расширением .gz)")
+        parser.add_argument("--chunk-size", type=int, default=2_000, help="Строк на одну выборку курсора")
+        parser.add_argument("--workers", type=int, default=1, help="Процессов; больше 1 - файл на категорию")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["chunk_size"] < 1 or options["workers"] < 1:
+            raise CommandError("--chunk-size и --workers должны быть положительными")
+        path = None if options["path"] == "-" else Path(options["path"])
+        suffixes = path.suffixes if path else []
+        compress = options["gzip"] or suffixes[-1:] == [".gz"]
+        file_format = options["format"] or ("jsonl" if ".jsonl" in suffixes or ".ndjson" in suffixes else "csv")
+        # Отчет при выгрузке в stdout уходит в stderr
+        report = self.stderr if path is None else self.stdout
+
+        started = time.perf_counter()
+        if options["workers"] == 1:
+            total = write_export(Product.objects.all(), path, file_format, compress, options["chunk_size"])
+            peak = peak_rss_mb()
+        else:
+            if path is None:
+                raise CommandError("При --workers > 1 path - каталог для файлов категорий")
+            total, peak = self._export_parallel(path, file_format, compress, options, report)
+
+        elapsed = time.perf_counter() - started
+        report.write("=" * 50)
+        report.write(
+            self.style.SUCCESS(
+                f"ИТОГО: {total} товаров за {elapsed:.1f} с ({total / elapsed if elapsed else 0:.0f} строк/с), "
+                f"пиковый RSS процесса {peak:.1f} МБ"
+            )
+        )
+
+    def _export_parallel(
+        self, directory: Path, file_format: str, compress: bool, options: dict, report: Any
+    ) -> tuple[int, float]:
+        directory.mkdir(parents=True, exist_ok=True)
+        suffix = f".{file_format}" + (".gz" if compress else "")
+        categories = [*Category.objects.order_by("pk").values_list("pk", flat=True), None]
+        # Дочерние процессы не должны наследовать открытые соединения с БД
+        connections.close_all()
+
+        total = 0
+        peak = peak_rss_mb()
+        with ProcessPoolExecutor(max_workers=options["workers"], initializer=django.setup) as pool:
+            futures = [
+                pool.submit(
+                    export_category,
+                    category_id,
+                    str(directory / f"products-{category_id or 'none'}{suffix}"),
+                    file_format,
+                    compress,
+                    options["chunk_size"],
+                )
+                for category_id in categories
+            ]
+            for future in as_completed(futures):
+                category_id, count, seconds, rss = future.result()
+                total += count
+                peak = max(peak, rss)
+                report.write(f"Категория {category_id or 'без категории'}: {count} товаров за {seconds:.1f} с")
+        return total, peak
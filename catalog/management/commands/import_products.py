@@ -0,0 +1,186 @@
+import csv
+import gzip
+import json
+import time
+from collections import Counter
+from collections import defaultdict
+from collections.abc import Iterator
+from decimal import Decimal
+from decimal import InvalidOperation
+from itertools import islice
+from pathlib import Path
+from typing import Any
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from catalog.models import Category
+from catalog.models import Product
+from catalog.services import recount_product_counts
+from core.cache import bump_versions
+from core.sitemaps import mark_changed
+from core.text import make_excerpt
+
+# Поля товара, которые обновляются при повторном импорте. Ключ - name: название в каталоге не уникально,
+# поэтому строка, название которой есть у нескольких товаров, не обновляет ни один из них
+UPDATE_FIELDS = ("description", "summary", "price", "category", "updated_at")
+# Изображение обновляется, только если в строке выгрузки есть колонка image и файл сменился;
+# размеры прежнего изображения сбрасываются (их заново заполняет generate_image_derivatives)
+IMAGE_FIELDS = ("image", "image_width", "image_height")
+
+
+class Command(BaseCommand):
+    help = (
+        "Потоковый импорт товаров из JSON Lines или CSV пачками bulk_create/bulk_update "
+        "с обновлением существующих товаров по названию (товары с неуникальным названием не обновляются)"
+    )
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument("path", type=str, help="Файл выгрузки поставщика (.jsonl/.ndjson/.csv, можно .gz)")
+        parser.add_argument("--format", choices=("jsonl", "csv"), default=None, help="Формат файла (по расширению)")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Строк в одной пачке и транзакции")
+        parser.add_argument(
+            "--no-create-categories", action="store_true", help="Не создавать отсутствующие категории"
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        path = Path(options["path"])
+        if not path.exists():
+            raise CommandError(f"Файл {path} не найден")
+        suffixes = [suffix.lower() for suffix in path.suffixes]
+        compressed = suffixes[-1:] == [".gz"]
+        if compressed:
+            suffixes.pop()
+        file_format = options["format"] or ("csv" if suffixes[-1:] == [".csv"] else "jsonl")
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size должен быть положительным")
+
+        # Категорий на порядки меньше, чем товаров, поэтому держим их целиком в памяти
+        self.categories = {name: pk for pk, name in Category.objects.values_list("pk", "name")}
+        self.create_categories = not options["no_create_categories"]
+
+        stats = Counter()
+        started = time.perf_counter()
+        opener = gzip.open if compressed else open
+        # utf-8-sig: выгрузки из Excel начинаются с BOM, иначе он попадает в имя первой колонки CSV
+        with opener(path, "rt", encoding="utf-8-sig", newline="") as feed:
+            rows = self._read_csv(feed) if file_format == "csv" else self._read_jsonl(feed)
+            while batch := list(islice(rows, batch_size)):
+                stats.update(self._import_batch(batch))
+                processed = stats.total()
+                rate = processed / (time.perf_counter() - started)
+                self.stdout.write(f"Обработано {processed} строк ({rate:.0f} строк/с)")
+
+        # bulk_create/bulk_update не вызывают сигналы: счетчики товаров категорий пересчитываются разом
+        recount_product_counts()
+        bump_versions("catalog:products", "catalog:categories")
+        mark_changed("products")
+
+        elapsed = time.perf_counter() - started
+        total = stats.total()
+        self.stdout.write("\n" + "=" * 50)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"ИТОГО: создано {stats['created']}, обновлено {stats['updated']}, "
+                f"пропущено некорректных {stats['invalid']}, повторов названия в пачке {stats['duplicate']}, "
+                f"неоднозначных названий {stats['ambiguous']} "
+                f"за {elapsed:.1f} с ({total / elapsed if elapsed else 0:.0f} строк/с)"
+            )
+        )
+
+    @staticmethod
+    def _read_jsonl(feed: Any) -> Iterator[dict]:
+        for line_number, line in enumerate(feed, start=1):
+            if line.strip():
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError:
+                    row = None
+                # Корректный JSON, но не объект (число, список) - такая же некорректная строка
+                yield row if isinstance(row, dict) else {"_error": f"строка {line_number}: некорректный JSON"}
+
+    @staticmethod
+    def _read_csv(feed: Any) -> Iterator[dict]:
+        yield from csv.DictReader(feed)
+
+    def _category_id(self, name: str | None) -> int | None:
+        if not name:
+            return None
+        if name not in self.categories and self.create_categories:
+            self.categories[name] = Category.objects.create(name=name).pk
+        return self.categories.get(name)
+
+    def _parse(self, row: dict) -> Product | None:
+        """Строка выгрузки -> несохраненный Product или None, если строка некорректна"""
+        if "_error" in row:
+            self.stderr.write(row["_error"])
+            return None
+        name = (row.get("name") or "").strip()
+        try:
+            price = Decimal(str(row.get("price", "")).strip())
+        except InvalidOperation:
+            price = None
+        if not name or price is None or not price.is_finite():
+            self.stderr.write(f"Пропущена строка без названия или цены: {name or row}")
+            return None
+        description = row.get("description") or ""
+        product = Product(
+            name=name,
+            description=description,
+            # bulk_create/bulk_update не вызывают save(), анонс для карточек заполняется здесь
+            summary=make_excerpt(description),
+            price=price,
+            category_id=self._category_id((row.get("category") or "").strip()),
+            image=row.get("image") or "",
+        )
+        # Выгрузка без колонки image не трогает изображения существующих товаров
+        product._has_image = "image" in row
+        return product
+
+    def _import_batch(self, rows: list[dict]) -> Counter:
+        stats = Counter()
+        products = {}
+        for row in rows:
+            product = self._parse(row)
+            if product is None:
+                stats["invalid"] += 1
+                continue
+            if product.name in products:
+                # Повтор названия внутри пачки - побеждает последняя строка
+                stats["duplicate"] += 1
+            products[product.name] = product
+
+        with transaction.atomic():
+            existing = defaultdict(list)
+            for pk, name, image in Product.objects.filter(name__in=products).values_list("pk", "name", "image"):
+                existing[name].append((pk, image))
+
+            now = timezone.now()
+            to_create, to_update, image_changed = [], [], []
+            for name, product in products.items():
+                matches = existing.get(name, [])
+                if len(matches) > 1:
+                    self.stderr.write(f"Пропущен товар «{name}»: такое название у {len(matches)} товаров каталога")
+                    stats["ambiguous"] += 1
+                elif matches:
+                    product.pk, image = matches[0]
+                    product.updated_at = now
+                    to_update.append(product)
+                    if product._has_image and product.image.name != image:
+                        image_changed.append(product)
+                else:
+                    to_create.append(product)
+
+            Product.objects.bulk_create(to_create)
+            Product.objects.bulk_update(to_update, UPDATE_FIELDS)
+            # image_width/image_height несохраненного Product - None: размеры прежнего файла сбрасываются
+            Product.objects.bulk_update(image_changed, IMAGE_FIELDS)
+
+        if to_update:
+            bump_versions(*(f"catalog.product:{product.pk}" for product in to_update))
+        stats["created"] += len(to_create)
+        stats["updated"] += len(to_update)
+        return stats
@@ -0,0 +1,19 @@
+import time
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from catalog.services import recount_product_counts
+
+
+class Command(BaseCommand):
+    help = (
+        "Сверяет Category.product_count с фактическим количеством товаров и исправляет расхождения "
+        "одним UPDATE (после bulk-операций и QuerySet.update, которые не вызывают сигналы)"
+    )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        started = time.perf_counter()
+        fixed = recount_product_counts()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Исправлено категорий: {fixed} за {elapsed:.2f} с"))
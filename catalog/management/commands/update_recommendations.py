@@ -0,0 +1,33 @@
+import resource
+import time
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from catalog import recommendations
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает списки похожих товаров (TF-IDF названия и описания + категория): по умолчанию только "
+        "для новых и измененных товаров и списков, которые они затрагивают; --full - для всего каталога. "
+        "С numpy и scipy расчет векторизован, без них выполняется на Python"
+    )
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument("--full", action="store_true", help="Пересчитать списки всех товаров")
+        parser.add_argument("--python", action="store_true", help="Расчет на Python даже при наличии numpy")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        use_numpy = not options["python"] and recommendations.np is not None
+        started = time.perf_counter()
+        products, written = recommendations.update_recommendations(full=options["full"], use_numpy=use_numpy)
+        elapsed = time.perf_counter() - started
+        # ru_maxrss в Linux - килобайты
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Товаров: {products}, записано списков: {written} за {elapsed:.2f} с "
+                f"({'numpy' if use_numpy else 'Python'}), пиковый RSS процесса {peak:.1f} МБ"
+            )
+        )
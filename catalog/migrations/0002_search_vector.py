@@ -0,0 +1,47 @@
+# Generated by Django 6.0 on 2026-10-18 16:45
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("catalog", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="search_vector",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.contrib.postgres.search.CombinedSearchVector(
+                    django.contrib.postgres.search.CombinedSearchVector(
+                        django.contrib.postgres.search.CombinedSearchVector(
+                            django.contrib.postgres.search.SearchVector("name", config="russian", weight="A"),
+                            "||",
+                            django.contrib.postgres.search.SearchVector("name", config="english", weight="A"),
+                            django.contrib.postgres.search.SearchConfig("russian"),
+                        ),
+                        "||",
+                        django.contrib.postgres.search.SearchVector("description", config="russian", weight="B"),
+                        django.contrib.postgres.search.SearchConfig("russian"),
+                    ),
+                    "||",
+                    django.contrib.postgres.search.SearchVector("description", config="english", weight="B"),
+                    django.contrib.postgres.search.SearchConfig("russian"),
+                ),
+                output_field=django.contrib.postgres.search.SearchVectorField(),
+                verbose_name="Поисковый вектор",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="catalog_product_search_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-18 16:49
+
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("catalog", "0002_search_vector"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="image_height",
+            field=models.PositiveIntegerField(
+                blank=True, editable=False, null=True, verbose_name="Высота изображения"
+            ),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="image_width",
+            field=models.PositiveIntegerField(
+                blank=True, editable=False, null=True, verbose_name="Ширина изображения"
+            ),
+        ),
+    ]
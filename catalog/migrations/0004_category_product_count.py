@@ -0,0 +1,29 @@
+# Generated by Django 6.0 on 2026-10-18 16:55
+
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("catalog", "0003_image_dimensions"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="category",
+            name="product_count",
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name="Количество товаров"),
+        ),
+        # Начальное заполнение счетчиков для уже существующих товаров
+        migrations.RunSQL(
+            sql="""
+                UPDATE catalog_category
+                SET product_count = (
+                    SELECT COUNT(*) FROM catalog_product WHERE catalog_product.category_id = catalog_category.id
+                )
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-18 17:10
+
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("catalog", "0004_category_product_count"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(fields=["price"], name="catalog_pro_price_2d2a4c_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(fields=["-created_at", "name", "id"], name="catalog_product_newest_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["category", "price"], include=("created_at",), name="catalog_product_cat_price_idx"
+            ),
+        ),
+    ]
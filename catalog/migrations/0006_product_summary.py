@@ -0,0 +1,21 @@
+# Generated by Django 6.0 on 2026-10-18 17:27
+
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("catalog", "0005_product_price_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="summary",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=100, verbose_name="Краткое описание"
+            ),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 6.0 on 2026-10-18 17:57
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("catalog", "0006_product_summary"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductRecommendation",
+            fields=[
+                (
+                    "product",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="recommendation",
+                        serialize=False,
+                        to="catalog.product",
+                        verbose_name="Товар",
+                    ),
+                ),
+                (
+                    "neighbor_ids",
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.BigIntegerField(), default=list, size=None, verbose_name="Похожие товары"
+                    ),
+                ),
+                (
+                    "scores",
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.PositiveSmallIntegerField(), default=list, size=None, verbose_name="Сходство"
+                    ),
+                ),
+                ("computed_at", models.DateTimeField(null=True, verbose_name="Рассчитано")),
+            ],
+            options={
+                "verbose_name": "Похожие товары",
+                "verbose_name_plural": "Похожие товары",
+                "indexes": [
+                    django.contrib.postgres.indexes.GinIndex(fields=["neighbor_ids"], name="catalog_rec_neighbors_idx")
+                ],
+            },
+        ),
+    ]
@@ -1,4 +1,13 @@
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db import transaction
+
+from core.text import EXCERPT_LENGTH
+from core.text import make_excerpt
+from core.text import with_excerpt_field
 
 
 class Category(models.Model):
@@ -11,6 +20,8 @@ class Category(models.Model):
     description = models.TextField(
         blank=True, null=True, verbose_name="Описание", help_text="Введите описание категории"
     )
+    # денормализованное количество товаров, поддерживается сигналами товара (catalog/signals.py)
+    product_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Количество товаров")
 
     class Meta:
         verbose_name = "Категория"
@@ -20,6 +31,22 @@ class Category(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # product_count меняется только инкрементами на стороне БД, сохранение категории его не перезаписывает
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != "product_count"
+            ]
+        super().save(*args, **kwargs)
+
+
+class ProductQuerySet(models.QuerySet):
+    def for_listing(self):
+        """Товары для списков: без полного описания и поискового вектора (в карточке нужен только summary)"""
+        return self.defer("description", "search_vector")
+
 
 class Product(models.Model):
     """
@@ -28,6 +55,10 @@ class Product(models.Model):
 
     name = models.CharField(max_length=150, verbose_name="Наименование", help_text="Введите название товара")
     description = models.TextField(verbose_name="Описание", help_text="Введите описание товара")
+    # анонс описания для карточек витрины, пересчитывается при сохранении (для старых строк - backfill_excerpts)
+    summary = models.CharField(
+        max_length=EXCERPT_LENGTH, blank=True, default="", editable=False, verbose_name="Краткое описание"
+    )
     # фото продукта необязательно
     image = models.ImageField(
         upload_to="products/",
@@ -36,6 +67,13 @@ class Product(models.Model):
         verbose_name="Изображение",
         help_text="Загрузите изображение товара",
     )
+    # размеры изображения заполняются при создании уменьшенных копий, нужны для srcset и width/height без чтения файла
+    image_width = models.PositiveIntegerField(
+        blank=True, null=True, editable=False, verbose_name="Ширина изображения"
+    )
+    image_height = models.PositiveIntegerField(
+        blank=True, null=True, editable=False, verbose_name="Высота изображения"
+    )
     category = models.ForeignKey(
         Category,
         on_delete=models.SET_NULL,
@@ -50,6 +88,20 @@ class Product(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата последнего изменения")
+    # поисковый вектор (русская и английская морфология) поддерживается самой БД
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector("name", config="russian", weight="A")
+            + SearchVector("name", config="english", weight="A")
+            + SearchVector("description", config="russian", weight="B")
+            + SearchVector("description", config="english", weight="B")
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+        verbose_name="Поисковый вектор",
+    )
+
+    objects = ProductQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Товар"
@@ -60,7 +112,51 @@ class Product(models.Model):
             models.Index(
                 fields=["category", "created_at"]
             ),  # составная ндексация для пагинации, фильтрации и отображения новинок
+            models.Index(fields=["price"]),  # сортировка и фильтр по цене на витрине
+            # сортировка витрины по дате без фильтра категории (ключ keyset-пагинации по умолчанию)
+            models.Index(fields=["-created_at", "name", "id"], name="catalog_product_newest_idx"),
+            # цена внутри категории и фасеты: created_at в индексе позволяет считать фасеты index-only scan
+            models.Index(fields=["category", "price"], include=["created_at"], name="catalog_product_cat_price_idx"),
+            GinIndex(fields=["search_vector"], name="catalog_product_search_idx"),  # полнотекстовый поиск
         ]
 
     def __str__(self):
         return f"{self.name} - {self.price} руб."
+
+    def save(self, *args, **kwargs):
+        # Отложенное (defer) описание не загружается ради анонса: оно не меняется при таком сохранении
+        if "description" not in self.get_deferred_fields():
+            self.summary = make_excerpt(self.description)
+        if "update_fields" in kwargs:
+            kwargs["update_fields"] = with_excerpt_field(kwargs["update_fields"], "description", "summary")
+        # Счетчик товаров категории обновляется сигналами в той же транзакции, что и сам товар
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
+
+
+class ProductRecommendation(models.Model):
+    """
+    Похожие товары, рассчитанные командой update_recommendations (catalog/recommendations.py).
+    Одна строка на товар с массивами соседей по убыванию сходства вместо строки на каждую пару
+    """
+
+    product = models.OneToOneField(
+        Product, on_delete=models.CASCADE, primary_key=True, related_name="recommendation", verbose_name="Товар"
+    )
+    # bigint: массив не зависит от разрядности первичного ключа товара
+    neighbor_ids = ArrayField(models.BigIntegerField(), default=list, verbose_name="Похожие товары")
+    # сходство соседей, умноженное на SCORE_SCALE, в том же порядке (2 байта на соседа)
+    scores = ArrayField(models.PositiveSmallIntegerField(), default=list, verbose_name="Сходство")
+    # время расчета: товар, измененный позже, и строка без времени (удален один из соседей) пересчитываются
+    computed_at = models.DateTimeField(null=True, verbose_name="Рассчитано")
+
+    class Meta:
+        verbose_name = "Похожие товары"
+        verbose_name_plural = "Похожие товары"
+        indexes = [
+            # списки, в которые входит измененный или удаленный товар
+            GinIndex(fields=["neighbor_ids"], name="catalog_rec_neighbors_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}: {self.neighbor_ids}"
@@ -0,0 +1,164 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from dataclasses import field
+from datetime import datetime
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+from typing import Any
+
+from django.core.exceptions import ValidationError
+from django.db.models import Model
+from django.db.models import Q
+from django.db.models import QuerySet
+
+# Направления курсора: "n" - следующая страница, "p" - предыдущая
+NEXT = "n"
+PREVIOUS = "p"
+
+
+class InvalidCursor(ValueError):
+    """Токен курсора поврежден или подделан"""
+
+
+@dataclass
+class KeysetPage:
+    """Страница keyset-пагинации с токенами соседних страниц"""
+
+    object_list: list = field(default_factory=list)
+    next_cursor: str | None = None
+    previous_cursor: str | None = None
+
+    def __iter__(self) -> Any:
+        return iter(self.object_list)
+
+    def __len__(self) -> int:
+        return len(self.object_list)
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    def has_other_pages(self) -> bool:
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Курсорная пагинация по ключу сортировки ordering, последним полем которого должен быть pk.
+    По умолчанию - порядок Product.Meta.ordering (-created_at, name) с pk для однозначности.
+
+    Каждая страница - это запрос "WHERE ключ после курсора ORDER BY ... LIMIT N + 1",
+    который обслуживается индексом по первому полю ключа, поэтому глубокие страницы
+    стоят столько же, сколько первая. COUNT(*) не выполняется.
+    """
+
+    ordering = ("-created_at", "name", "pk")
+
+    def __init__(self, object_list: QuerySet, per_page: int, ordering: tuple[str, ...] | None = None, **kwargs: Any):
+        # kwargs (orphans, allow_empty_first_page) принимаются для совместимости с ListView.get_paginator
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        if ordering is not None:
+            self.ordering = tuple(ordering)
+        self.reverse_ordering = tuple(name[1:] if name.startswith("-") else f"-{name}" for name in self.ordering)
+        # (поле, по убыванию)
+        self._keys = [(name.lstrip("-"), name.startswith("-")) for name in self.ordering]
+
+    def encode_cursor(self, obj: Model, direction: str) -> str:
+        """Упаковывает значения ключа сортировки объекта в непрозрачный токен"""
+        payload = [direction]
+        for name, _ in self._keys:
+            value = getattr(obj, name)
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            elif isinstance(value, Decimal):
+                value = str(value)
+            payload.append(value)
+        raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def decode_cursor(self, token: str) -> tuple[str, list]:
+        """Распаковывает токен курсора в (направление, значения ключа), выбрасывает InvalidCursor при ошибке"""
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+            direction, *raw_values = json.loads(raw)
+        except (binascii.Error, UnicodeDecodeError, ValueError, TypeError) as e:
+            raise InvalidCursor(token) from e
+        if direction not in (NEXT, PREVIOUS) or len(raw_values) != len(self._keys):
+            raise InvalidCursor(token)
+
+        opts = self.object_list.model._meta
+        values = []
+        for (name, _), raw_value in zip(self._keys, raw_values):
+            model_field = opts.pk if name == "pk" else opts.get_field(name)
+            # Значения ключа не бывают NULL; to_python проверяет тип так же, как при валидации формы
+            if raw_value is None or isinstance(raw_value, (list, dict, bool)):
+                raise InvalidCursor(token)
+            try:
+                value = model_field.to_python(raw_value)
+            except ValidationError as e:
+                raise InvalidCursor(token) from e
+            if value is None:
+                raise InvalidCursor(token)
+            values.append(value)
+        return direction, values
+
+    def _seek(self, values: list, forward: bool) -> Q:
+        """Строки, идущие после (forward) или перед ключом в прямом порядке"""
+        clauses = []
+        for index, (name, descending) in enumerate(self._keys):
+            lookup = "lt" if descending == forward else "gt"
+            equal = {previous: value for (previous, _), value in zip(self._keys[:index], values)}
+            clauses.append(Q(**equal, **{f"{name}__{lookup}": values[index]}))
+        # Диапазон по первому полю ключа позволяет БД использовать индекс и для OR-условия
+        first, descending = self._keys[0]
+        bound = Q(**{f"{first}__{'lte' if descending == forward else 'gte'}": values[0]})
+        return bound & reduce(or_, clauses)
+
+    def get_page(self, cursor: str | None = None) -> KeysetPage:
+        """Возвращает страницу по токену курсора (None - первая страница)"""
+        queryset, direction = self._page_queryset(cursor)
+        return self._make_page(list(queryset), direction)
+
+    async def aget_page(self, cursor: str | None = None) -> KeysetPage:
+        """Асинхронный вариант get_page: строки читаются async-итерацией без потока на запрос"""
+        queryset, direction = self._page_queryset(cursor)
+        return self._make_page([obj async for obj in queryset], direction)
+
+    def _page_queryset(self, cursor: str | None) -> tuple[QuerySet, str | None]:
+        """Запрос страницы с LIMIT N + 1 и направление курсора (None - первая страница)"""
+        if not cursor:
+            return self.object_list.order_by(*self.ordering)[: self.per_page + 1], None
+
+        direction, values = self.decode_cursor(cursor)
+        if direction == NEXT:
+            queryset = self.object_list.filter(self._seek(values, forward=True)).order_by(*self.ordering)
+        else:
+            queryset = self.object_list.filter(self._seek(values, forward=False)).order_by(*self.reverse_ordering)
+        return queryset[: self.per_page + 1], direction
+
+    def _make_page(self, rows: list, direction: str | None) -> KeysetPage:
+        if direction != PREVIOUS:
+            return self._forward_page(rows, has_previous=direction == NEXT)
+
+        has_previous = len(rows) > self.per_page
+        rows = rows[: self.per_page][::-1]
+        return KeysetPage(
+            object_list=rows,
+            next_cursor=self.encode_cursor(rows[-1], NEXT) if rows else None,
+            previous_cursor=self.encode_cursor(rows[0], PREVIOUS) if rows and has_previous else None,
+        )
+
+    def _forward_page(self, rows: list, has_previous: bool) -> KeysetPage:
+        has_next = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        return KeysetPage(
+            object_list=rows,
+            next_cursor=self.encode_cursor(rows[-1], NEXT) if rows and has_next else None,
+            previous_cursor=self.encode_cursor(rows[0], PREVIOUS) if rows and has_previous else None,
+        )
@@ -0,0 +1,303 @@
+import heapq
+import math
+import re
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from collections import defaultdict
+from dataclasses import dataclass
+from itertools import islice
+from operator import itemgetter
+
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import F
+from django.db.models import Q
+from django.utils import timezone
+
+from core.cache import bump_versions
+
+from .models import Product
+from .models import ProductRecommendation
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # numpy и scipy - необязательные зависимости (pip install numpy scipy), без них - расчет на Python
+    np = None
+    sparse = None
+
+# Соседей в списке товара
+TOP_K = 8
+# Сходство хранится целым числом: score * SCORE_SCALE
+SCORE_SCALE = 10_000
+# Доля совпадения категории в сходстве, остальное - косинус TF-IDF названия и описания
+CATEGORY_WEIGHT = 0.3
+# Слово в названии весит как NAME_WEIGHT слов описания
+NAME_WEIGHT = 3
+# Самые весомые слова товара, остальные отбрасываются - размер матрицы не зависит от длины описаний
+MAX_TERMS = 32
+# Слова, которые встречаются у большей доли товаров, не отличают товары друг от друга
+MAX_DF = 0.5
+# Память (байт) на блок строк матрицы сходства: память расчета не растет квадратично с размером каталога
+BLOCK_BYTES = 64 * 1024 * 1024
+# Сколько ближайших товаров измененного товара проверяется на попадание в их списки
+REVERSE_CANDIDATES = 4 * TOP_K
+# Строк за одно чтение из БД и одну запись списков
+CHUNK_SIZE = 2_000
+
+_WORD_RE = re.compile(r"\w\w+")
+
+
+def term_counts(name, description):
+    counts = Counter(_WORD_RE.findall(description.lower()))
+    for word in _WORD_RE.findall(name.lower()):
+        counts[word] += NAME_WEIGHT
+    return counts
+
+
+@dataclass
+class ProductVectors:
+    """
+    Векторы TF-IDF товаров в формате CSR (indptr/indices/data) в порядке pk. Совпадение категории
+    добавляется при расчете сходства: вектор текста нормирован к sqrt(1 - CATEGORY_WEIGHT)
+    """
+
+    ids: array
+    categories: array
+    indptr: array
+    indices: array
+    data: array
+
+    def __len__(self):
+        return len(self.ids)
+
+    def position(self, pk):
+        """Номер строки товара или None"""
+        i = bisect_left(self.ids, pk)
+        return i if i < len(self.ids) and self.ids[i] == pk else None
+
+    def row(self, i):
+        start, end = self.indptr[i], self.indptr[i + 1]
+        return zip(self.indices[start:end], self.data[start:end])
+
+
+def build_vectors():
+    """
+    Два потоковых прохода по товарам: частоты слов по товарам, затем векторы. Тексты в памяти не
+    накапливаются - хранятся только словарь и не больше MAX_TERMS весов на товар
+    """
+    rows = (
+        Product.objects.using(DEFAULT_DB_ALIAS).order_by("pk").values_list("pk", "category_id", "name", "description")
+    )
+
+    document_frequency = Counter()
+    total = 0
+    for _, _, name, description in rows.iterator(chunk_size=CHUNK_SIZE):
+        document_frequency.update(term_counts(name, description).keys())
+        total += 1
+    # Слово из одного товара ни с кем его не связывает
+    max_df = max(2, int(total * MAX_DF))
+    vocabulary = {}
+    idf = []
+    for word, df in document_frequency.items():
+        if 2 <= df <= max_df:
+            vocabulary[word] = len(idf)
+            idf.append(math.log(total / df))
+    del document_frequency
+
+    vectors = ProductVectors(array("q"), array("i"), array("q", [0]), array("i"), array("f"))
+    text_norm = math.sqrt(1 - CATEGORY_WEIGHT)
+    for pk, category_id, name, description in rows.iterator(chunk_size=CHUNK_SIZE):
+        weights = [
+            (vocabulary[word], (1 + math.log(count)) * idf[vocabulary[word]])
+            for word, count in term_counts(name, description).items()
+            if word in vocabulary
+        ]
+        weights = sorted(heapq.nlargest(MAX_TERMS, weights, key=itemgetter(1)))
+        norm = math.sqrt(sum(weight * weight for _, weight in weights)) or 1
+        vectors.ids.append(pk)
+        vectors.categories.append(category_id if category_id is not None else -1)
+        vectors.indices.extend(index for index, _ in weights)
+        vectors.data.extend(weight * text_norm / norm for _, weight in weights)
+        vectors.indptr.append(len(vectors.indices))
+    return vectors
+
+
+class SimilarityIndex:
+    """
+    Ближайшие товары по сходству (1 - CATEGORY_WEIGHT) * косинус текста + CATEGORY_WEIGHT * [та же категория].
+    С numpy/scipy сходство блока строк - одно умножение разреженных матриц, блок ограничен BLOCK_BYTES;
+    без них - подсчет по инвертированному индексу на Python (для небольших каталогов)
+    """
+
+    def __init__(self, vectors, use_numpy=True):
+        self.vectors = vectors
+        self.use_numpy = use_numpy and np is not None
+        if self.use_numpy:
+            self._prepare_matrix()
+        else:
+            self._prepare_postings()
+
+    def top(self, rows, k):
+        """(строка, [(строка соседа, сходство), ...]) для строк rows: до k соседей со сходством > 0"""
+        if self.use_numpy:
+            return self._top_numpy(rows, k)
+        return self._top_python(rows, k)
+
+    def _prepare_matrix(self):
+        vectors = self.vectors
+        n = len(vectors)
+        text = sparse.csr_matrix(
+            (
+                np.frombuffer(vectors.data, dtype=np.float32),
+                np.frombuffer(vectors.indices, dtype=np.int32),
+                np.frombuffer(vectors.indptr, dtype=np.int64),
+            ),
+            shape=(n, max(vectors.indices, default=-1) + 1),
+        )
+        # Категория - еще один столбец вектора: произведение строк одной категории дает CATEGORY_WEIGHT
+        categories = np.frombuffer(vectors.categories, dtype=np.int32)
+        _, codes = np.unique(categories, return_inverse=True)
+        has_category = categories >= 0
+        category = sparse.csr_matrix(
+            (
+                np.full(has_category.sum(), math.sqrt(CATEGORY_WEIGHT), dtype=np.float32),
+                (np.flatnonzero(has_category), codes[has_category]),
+            ),
+            shape=(n, codes.max(initial=0) + 1),
+        )
+        self.matrix = sparse.hstack([text, category], format="csr", dtype=np.float32)
+        self.transposed = self.matrix.T.tocsr()
+        # На ячейку блока: результат умножения, его плотная копия (float32) и индексы argpartition (int64)
+        self.block_rows = max(1, BLOCK_BYTES // (20 * max(n, 1)))
+
+    def _top_numpy(self, rows, k):
+        n = len(self.vectors)
+        k = min(k, n - 1)
+        if k <= 0:
+            return
+        rows = np.asarray(rows, dtype=np.int64)
+        for start in range(0, len(rows), self.block_rows):
+            block = rows[start : start + self.block_rows]
+            # Сходство со знаком минус: argpartition и argsort выбирают наименьшие значения
+            scores = (self.matrix[block] @ self.transposed).toarray()
+            np.negative(scores, out=scores)
+            scores[np.arange(len(block)), block] = 0
+            top = np.argpartition(scores, k - 1, axis=1)[:, :k]
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            order = np.argsort(top_scores, axis=1)
+            top = np.take_along_axis(top, order, axis=1)
+            top_scores = np.take_along_axis(top_scores, order, axis=1)
+            for row, columns, values in zip(block.tolist(), top.tolist(), top_scores.tolist()):
+                yield row, [(column, -score) for column, score in zip(columns, values) if score < 0]
+
+    def _prepare_postings(self):
+        self.postings = defaultdict(list)
+        self.members = defaultdict(list)
+        for i in range(len(self.vectors)):
+            for index, weight in self.vectors.row(i):
+                self.postings[index].append((i, weight))
+            if self.vectors.categories[i] >= 0:
+                self.members[self.vectors.categories[i]].append(i)
+
+    def _top_python(self, rows, k):
+        for row in rows:
+            scores = defaultdict(float)
+            for index, weight in self.vectors.row(row):
+                for other, other_weight in self.postings[index]:
+                    scores[other] += weight * other_weight
+            for other in self.members.get(self.vectors.categories[row], ()):
+                scores[other] += CATEGORY_WEIGHT
+            scores.pop(row, None)
+            yield row, heapq.nlargest(
+                k, ((other, score) for other, score in scores.items() if score > 0), key=itemgetter(1)
+            )
+
+
+def _encode(vectors, neighbors):
+    """Соседи [(строка, сходство)] -> (neighbor_ids, scores) для ProductRecommendation"""
+    ids = [vectors.ids[row] for row, _ in neighbors]
+    scores = [min(SCORE_SCALE, round(score * SCORE_SCALE)) for _, score in neighbors]
+    return ids, scores
+
+
+def _save(rows, computed_at, full):
+    """Записывает списки {pk товара: (neighbor_ids, scores)} пачками INSERT ... ON CONFLICT"""
+    rows = iter(rows.items())
+    while batch := list(islice(rows, CHUNK_SIZE)):
+        ProductRecommendation.objects.bulk_create(
+            [
+                ProductRecommendation(product_id=pk, neighbor_ids=ids, scores=scores, computed_at=computed_at)
+                for pk, (ids, scores) in batch
+            ],
+            update_conflicts=True,
+            unique_fields=["product"],
+            update_fields=["neighbor_ids", "scores", "computed_at"],
+        )
+        if not full:
+            # Страницы товаров с новым списком; после полного пересчета сбрасывается общая версия
+            bump_versions(*(f"catalog.product:{pk}" for pk, _ in batch))
+
+
+def update_recommendations(full=False, use_numpy=True):
+    """
+    Пересчитывает списки похожих товаров. Полный пересчет - для всех товаров. Инкрементальный - для новых,
+    измененных после расчета и потерявших соседа товаров; измененный товар затем проверяется на попадание
+    в списки REVERSE_CANDIDATES своих ближайших товаров (сходство симметрично), а списки, в которых он уже был,
+    пересчитываются целиком. Возвращает (товаров, записано списков).
+    """
+    computed_at = timezone.now()
+    vectors = build_vectors()
+    if not len(vectors):
+        return 0, 0
+    index = SimilarityIndex(vectors, use_numpy=use_numpy)
+
+    if full:
+        written = {}
+        for row, neighbors in index.top(range(len(vectors)), TOP_K):
+            written[vectors.ids[row]] = _encode(vectors, neighbors)
+            if len(written) >= CHUNK_SIZE:
+                _save(written, computed_at, full)
+                written.clear()
+        _save(written, computed_at, full)
+        bump_versions("catalog:recommendations")
+        return len(vectors), len(vectors)
+
+    changed = set(
+        Product.objects.filter(
+            Q(recommendation__isnull=True) | Q(updated_at__gt=F("recommendation__computed_at"))
+        ).values_list("pk", flat=True)
+    )
+    stale = set(ProductRecommendation.objects.filter(computed_at__isnull=True).values_list("product_id", flat=True))
+    # Списки, в которых измененный товар уже был: его сходство могло упасть, и место займет другой товар
+    changed_ids = sorted(changed)
+    for start in range(0, len(changed_ids), CHUNK_SIZE):
+        chunk = changed_ids[start : start + CHUNK_SIZE]
+        stale.update(
+            ProductRecommendation.objects.filter(neighbor_ids__overlap=chunk).values_list("product_id", flat=True)
+        )
+    recompute = [row for row in map(vectors.position, sorted(changed | stale)) if row is not None]
+
+    written = {}
+    candidates = defaultdict(list)
+    for row, neighbors in index.top(recompute, max(TOP_K, REVERSE_CANDIDATES)):
+        pk = vectors.ids[row]
+        written[pk] = _encode(vectors, neighbors[:TOP_K])
+        if pk in changed:
+            for other, score in neighbors:
+                candidates[vectors.ids[other]].append((pk, score))
+
+    # Измененный товар вытесняет из списка соседа последний товар, если похож сильнее
+    for pk in written:
+        candidates.pop(pk, None)
+    current = ProductRecommendation.objects.filter(pk__in=list(candidates)).values_list("pk", "neighbor_ids", "scores")
+    for pk, neighbor_ids, scores in current.iterator(chunk_size=CHUNK_SIZE):
+        merged = dict(zip(neighbor_ids, scores))
+        for other, score in candidates[pk]:
+            merged[other] = min(SCORE_SCALE, round(score * SCORE_SCALE))
+        top = heapq.nlargest(TOP_K, merged.items(), key=itemgetter(1))
+        if [other for other, _ in top] != neighbor_ids:
+            written[pk] = ([other for other, _ in top], [score for _, score in top])
+
+    _save(written, computed_at, full)
+    return len(vectors), len(written)
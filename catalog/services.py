@@ -0,0 +1,153 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db import models
+from django.db import transaction
+from django.db.models import Case
+from django.db.models import Count
+from django.db.models import F
+from django.db.models import Func
+from django.db.models import IntegerField
+from django.db.models import OuterRef
+from django.db.models import Subquery
+from django.db.models import Value
+from django.db.models import When
+from django.db.models.functions import Coalesce
+from django.db.models.functions import Greatest
+
+from core.cache import aget_versions
+from core.cache import get_versions
+
+from .filters import ProductFilters
+from .models import Category
+from .models import Product
+from .models import ProductRecommendation
+
+CATEGORY_MENU_CACHE_KEY = "catalog:category_menu"
+
+
+def _primary(queryset: models.QuerySet) -> models.QuerySet:
+    # Данные для кеша читаются с primary: сразу после сброса версии реплика может еще отставать,
+    # и прежние данные попали бы в кеш под новой версией (меню - без срока, фасеты - на FRAGMENT_CACHE_TIMEOUT)
+    return queryset.using(DEFAULT_DB_ALIAS)
+
+
+def adjust_product_counts(deltas: dict[int | None, int]) -> None:
+    """
+    Изменяет Category.product_count на заданные приращения {id категории: приращение} одним UPDATE.
+    Инкремент выполняется на стороне БД, поэтому параллельные сохранения не теряют изменения.
+    """
+    deltas = {pk: delta for pk, delta in deltas.items() if pk is not None and delta}
+    if not deltas:
+        return
+    increment = Case(
+        *(When(pk=pk, then=Value(delta)) for pk, delta in deltas.items()),
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+    # Greatest не дает счетчику уйти в минус при расхождении; такие расхождения исправляет recount_product_counts
+    Category.objects.filter(pk__in=deltas).update(product_count=Greatest(F("product_count") + increment, Value(0)))
+    invalidate_category_menu()
+
+
+def recount_product_counts() -> int:
+    """Пересчитывает product_count всех категорий с расхождением, возвращает количество исправленных"""
+    actual = Coalesce(
+        Subquery(
+            Product.objects.filter(category=OuterRef("pk"))
+            .order_by()
+            .values("category")
+            .annotate(total=Count("pk"))
+            .values("total")
+        ),
+        Value(0),
+    )
+    fixed = Category.objects.exclude(product_count=actual).update(product_count=actual)
+    if fixed:
+        invalidate_category_menu()
+    return fixed
+
+
+def get_category_menu() -> list[dict]:
+    """
+    Категории для главного меню [{"id": ..., "name": ..., "product_count": ...}].
+    Строится одним запросом без COUNT по товарам и кешируется до изменения категорий или их счетчиков.
+    """
+    menu = cache.get(CATEGORY_MENU_CACHE_KEY)
+    if menu is None:
+        menu = list(_primary(Category.objects.values("id", "name", "product_count")))
+        cache.set(CATEGORY_MENU_CACHE_KEY, menu, None)
+    return menu
+
+
+async def aget_category_menu() -> list[dict]:
+    """Асинхронный вариант get_category_menu для async-представлений"""
+    menu = await cache.aget(CATEGORY_MENU_CACHE_KEY)
+    if menu is None:
+        menu = [category async for category in _primary(Category.objects.values("id", "name", "product_count"))]
+        await cache.aset(CATEGORY_MENU_CACHE_KEY, menu, None)
+    return menu
+
+
+def invalidate_category_menu() -> None:
+    """
+    Сбрасывает закешированное меню категорий после коммита текущей транзакции: меню кешируется без срока,
+    и заполненное параллельным запросом до коммита осталось бы устаревшим
+    """
+    transaction.on_commit(lambda: cache.delete(CATEGORY_MENU_CACHE_KEY))
+
+
+def _neighbors(product_id: int) -> models.QuerySet:
+    """Похожие товары без порядка: id IN (unnest(neighbor_ids)) по первичному ключу"""
+    neighbor_ids = ProductRecommendation.objects.filter(product_id=product_id).values("neighbor_ids")
+    return Product.objects.filter(
+        pk__in=neighbor_ids.annotate(neighbor=Func(F("neighbor_ids"), function="unnest")).values("neighbor")
+    )
+
+
+def related_products(product_id: int) -> models.QuerySet:
+    """
+    Похожие товары из списка ProductRecommendation в порядке убывания сходства одним запросом:
+    id IN (unnest(neighbor_ids)) по первичному ключу, порядок - array_position в том же массиве
+    """
+    neighbor_ids = ProductRecommendation.objects.filter(product_id=product_id).values("neighbor_ids")
+    return (
+        _neighbors(product_id)
+        .annotate(rank=Func(Subquery(neighbor_ids), F("pk"), function="array_position", output_field=IntegerField()))
+        .order_by("rank")
+        .only("id", "name", "price")
+    )
+
+
+def related_products_updated_at(product_id: int) -> Subquery:
+    """Подзапрос: время последнего изменения похожих товаров (их названия и цены выводятся на странице товара)"""
+    # MAX без GROUP BY: Func не считается агрегатом, подзапрос возвращает одну строку
+    return Subquery(
+        _neighbors(product_id).order_by().annotate(latest=Func(F("updated_at"), function="MAX")).values("latest")
+    )
+
+
+def get_product_facets(filters: ProductFilters) -> dict:
+    """
+    Фасеты витрины для фильтров: один агрегирующий запрос, результат кешируется до изменения товаров
+    или категорий (версия catalog:products), поэтому полный проход по индексу выполняется редко.
+    """
+    (version,) = get_versions(["catalog:products"])
+    key = f"catalog:facets:{version}:{filters.cache_key()}"
+    facets = cache.get(key)
+    if facets is None:
+        facets = filters.facets(_primary(Product.objects.all()), get_category_menu())
+        cache.set(key, facets, settings.FRAGMENT_CACHE_TIMEOUT)
+    return facets
+
+
+async def aget_product_facets(filters: ProductFilters) -> dict:
+    """Асинхронный вариант get_product_facets: тот же ключ кеша, агрегирующий запрос через async-итерацию"""
+    (version,) = await aget_versions(["catalog:products"])
+    key = f"catalog:facets:{version}:{filters.cache_key()}"
+    facets = await cache.aget(key)
+    if facets is None:
+        rows = [row async for row in filters.facet_queryset(_primary(Product.objects.all()))]
+        facets = filters.build_facets(rows, await aget_category_menu())
+        await cache.aset(key, facets, settings.FRAGMENT_CACHE_TIMEOUT)
+    return facets
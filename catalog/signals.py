@@ -0,0 +1,85 @@
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
+
+from core.cache import bump_versions_on_commit
+from core.images import delete_derivatives
+from core.images import ensure_derivatives
+from core.images import reset_dimensions
+from core.sitemaps import mark_changed
+
+from .models import Category
+from .models import Product
+from .models import ProductRecommendation
+from .services import adjust_product_counts
+from .services import invalidate_category_menu
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def product_changed(sender, instance, **kwargs):
+    """Сбрасывает кеш страницы товара и списков товаров, отмечает устаревшим файл sitemap с товаром"""
+    bump_versions_on_commit(f"catalog.product:{instance.pk}", "catalog:products")
+    mark_changed("products", instance.pk)
+
+
+@receiver(post_delete, sender=Product)
+def product_recommendations_deleted(sender, instance, **kwargs):
+    """Списки похожих товаров с удаленным товаром пересчитываются при следующем update_recommendations"""
+    ProductRecommendation.objects.filter(neighbor_ids__contains=[instance.pk]).update(computed_at=None)
+
+
+@receiver(pre_save, sender=Product)
+def product_image_changing(sender, instance, **kwargs):
+    reset_dimensions(instance, "image", "image_width", "image_height")
+
+
+@receiver(pre_save, sender=Product)
+def product_category_changing(sender, instance, raw=False, **kwargs):
+    """Запоминает категорию, сохраненную в БД, чтобы перенести товар между счетчиками"""
+    if not raw and not instance._state.adding:
+        instance._previous_category_id = (
+            Product.objects.filter(pk=instance.pk).values_list("category_id", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Product)
+def product_count_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        adjust_product_counts({instance.category_id: 1})
+        return
+    previous = getattr(instance, "_previous_category_id", None)
+    if previous != instance.category_id:
+        adjust_product_counts({previous: -1, instance.category_id: 1})
+
+
+@receiver(post_delete, sender=Product)
+def product_count_deleted(sender, instance, **kwargs):
+    """
+    Выполняется внутри транзакции удаления. При удалении категории товары не удаляются (SET_NULL),
+    а UPDATE category_id = NULL сигналов не вызывает - счетчик уходит вместе со строкой категории.
+    """
+    adjust_product_counts({instance.category_id: -1})
+
+
+@receiver(post_save, sender=Product)
+def product_image_saved(sender, instance, **kwargs):
+    """Создает уменьшенные AVIF/WebP-копии загруженного изображения"""
+    ensure_derivatives(instance, "image", "image_width", "image_height")
+
+
+@receiver(post_delete, sender=Product)
+def product_image_deleted(sender, instance, **kwargs):
+    if instance.image and instance.image_width:
+        delete_derivatives(instance.image.name, instance.image_width, storage=instance.image.storage)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, instance, **kwargs):
+    """Категория выводится в списках, на страницах товаров и в меню"""
+    bump_versions_on_commit("catalog:categories", "catalog:products")
+    invalidate_category_menu()
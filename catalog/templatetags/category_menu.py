@@ -0,0 +1,17 @@
+from django import template
+
+from catalog.services import get_category_menu
+
+register = template.Library()
+
+
+@register.inclusion_tag("catalog/includes/category_menu.html")
+def category_menu():
+    """
+    Меню категорий с количеством товаров:
+
+        {% load category_menu %}{% category_menu %}
+
+    Данные берутся из кеша (catalog.services.get_category_menu), COUNT по товарам не выполняется.
+    """
+    return {"categories": get_category_menu()}
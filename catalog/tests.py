@@ -1,3 +1,422 @@
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import AsyncRequestFactory
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.cache import cache_stats
+
+from . import recommendations
+from .filters import ProductFilters
+from .models import Category
+from .models import Product
+from .models import ProductRecommendation
+from .pagination import KeysetPaginator
+from .recommendations import update_recommendations
+from .services import get_category_menu
+from .services import get_product_facets
+from .services import recount_product_counts
+from .services import related_products
+from .views import AsyncHomeView
+from .views import AsyncProductDetailView
+
+
+class PageCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name="Телевизоры")
+        cls.product = Product.objects.create(name="QLED", description="Описание", price=100, category=cls.category)
+
+    def setUp(self):
+        cache.clear()
+        cache_stats.reset()
+
+    def test_home_page_served_from_cache(self):
+        self.assertEqual(self.client.get(reverse("catalog:home"))["X-Page-Cache"], "miss")
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("catalog:home"))
+        self.assertEqual(response["X-Page-Cache"], "hit")
+        self.assertContains(response, "QLED")
+        self.assertEqual(cache_stats.snapshot()[("page", "hit")], 1)
+
+    def test_product_save_invalidates_pages(self):
+        detail_url = reverse("catalog:product_detail", kwargs={"pk": self.product.pk})
+        self.client.get(reverse("catalog:home"))
+        self.client.get(detail_url)
+
+        self.product.name = "OLED"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.save()
+
+        self.assertContains(self.client.get(reverse("catalog:home")), "OLED")
+        self.assertContains(self.client.get(detail_url), "OLED")
+
+    def test_category_save_invalidates_product_page(self):
+        detail_url = reverse("catalog:product_detail", kwargs={"pk": self.product.pk})
+        self.client.get(detail_url)
+
+        self.category.name = "Телевизоры 4K"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.save()
+
+        self.assertContains(self.client.get(detail_url), "Телевизоры 4K")
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.product = Product.objects.create(name="QLED", description="Описание", price=100)
+        cls.url = reverse("catalog:product_detail", kwargs={"pk": cls.product.pk})
+
+    def test_not_modified_without_rendering(self):
+        response = self.client.get(self.url)
+        self.assertIn("ETag", response)
+        self.assertIn("Last-Modified", response)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_edit_changes_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.product.price = 200
+        self.product.save()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class ImportProductsTests(TestCase):
+    def test_reimport_keeps_images_and_skips_ambiguous_names(self):
+        kept = Product.objects.create(name="Кабель", description="", price=5, image="products/cable.jpg")
+        Product.objects.bulk_create([Product(name="Монитор", description="", price=1) for _ in range(2)])
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "products.csv"
+            path.write_text("name,price\nКабель,7\nМонитор,9\nМонитор,10\n", encoding="utf-8")
+            stdout = StringIO()
+            call_command("import_products", str(path), stdout=stdout, stderr=StringIO())
+        kept.refresh_from_db()
+        self.assertEqual((kept.price, kept.image.name), (7, "products/cable.jpg"))
+        self.assertEqual(list(Product.objects.filter(name="Монитор").values_list("price", flat=True)), [1, 1])
+        self.assertIn("повторов названия в пачке 1, неоднозначных названий 1", stdout.getvalue())
+
+    def test_bom_and_non_object_rows(self):
+        with tempfile.TemporaryDirectory() as directory:
+            csv_path = Path(directory) / "products.csv"
+            csv_path.write_text("name,price\nКабель,7\n", encoding="utf-8-sig")
+            call_command("import_products", str(csv_path), stdout=StringIO(), stderr=StringIO())
+            jsonl_path = Path(directory) / "products.jsonl"
+            jsonl_path.write_text('123\n[1, 2]\n{"name": "Монитор", "price": 9}\n', encoding="utf-8")
+            stdout = StringIO()
+            call_command("import_products", str(jsonl_path), stdout=stdout, stderr=StringIO())
+        self.assertEqual(dict(Product.objects.values_list("name", "price")), {"Кабель": 7, "Монитор": 9})
+        self.assertIn("пропущено некорректных 2", stdout.getvalue())
+
+
+class CategoryProductCountTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.phones = Category.objects.create(name="Телефоны")
+        self.tablets = Category.objects.create(name="Планшеты")
+
+    def counts(self):
+        return dict(Category.objects.values_list("name", "product_count"))
+
+    def test_counter_follows_create_move_and_delete(self):
+        product = Product.objects.create(name="A", description="", price=1, category=self.phones)
+        Product.objects.create(name="B", description="", price=1, category=self.phones)
+        self.assertEqual(self.counts(), {"Телефоны": 2, "Планшеты": 0})
+
+        product.category = self.tablets
+        product.save()
+        self.assertEqual(self.counts(), {"Телефоны": 1, "Планшеты": 1})
+
+        product.delete()
+        self.assertEqual(self.counts(), {"Телефоны": 1, "Планшеты": 0})
+
+        # Сохранение устаревшего экземпляра категории не затирает счетчик
+        self.phones.name = "Смартфоны"
+        self.phones.save()
+        self.assertEqual(self.counts(), {"Смартфоны": 1, "Планшеты": 0})
+
+    def test_category_delete_sets_null_and_recount_fixes_drift(self):
+        product = Product.objects.create(name="A", description="", price=1, category=self.phones)
+        self.phones.delete()
+        product.refresh_from_db()
+        self.assertIsNone(product.category_id)
+
+        product.category = self.tablets
+        product.save()
+        Product.objects.bulk_create([Product(name="B", description="", price=1, category=self.tablets)])
+        self.assertEqual(self.counts(), {"Планшеты": 1})
+        self.assertEqual(recount_product_counts(), 1)
+        self.assertEqual(self.counts(), {"Планшеты": 2})
+
+    def test_menu_cached_until_counts_change(self):
+        get_category_menu()
+        with self.assertNumQueries(0):
+            self.assertEqual(len(get_category_menu()), 2)
+        with self.captureOnCommitCallbacks() as callbacks:
+            Product.objects.create(name="A", description="", price=1, category=self.phones)
+            # До коммита меню не сбрасывается: иначе его заполнил бы параллельный запрос с прежними счетчиками
+            with self.assertNumQueries(0):
+                get_category_menu()
+        for callback in callbacks:
+            callback()
+        menu = {item["name"]: item["product_count"] for item in get_category_menu()}
+        self.assertEqual(menu["Телефоны"], 1)
+
+
+class FacetedBrowseTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.phones = Category.objects.create(name="Телефоны")
+        cls.tablets = Category.objects.create(name="Планшеты")
+        for name, price, category in [
+            ("A", 500, cls.phones),
+            ("B", 3000, cls.phones),
+            ("C", 4000, cls.tablets),
+            ("D", 300000, cls.tablets),
+        ]:
+            Product.objects.create(name=name, description="", price=price, category=category)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_facets_exclude_own_filter_in_one_query(self):
+        filters = ProductFilters(category=self.phones.pk, price_min=Decimal(1000), price_max=Decimal(5000))
+        categories = get_category_menu()
+        with self.assertNumQueries(1):
+            facets = filters.facets(Product.objects.all(), categories)
+        # категории - с фильтром цены, гистограмма - с фильтром категории
+        self.assertEqual({c["name"]: c["count"] for c in facets["categories"]}, {"Телефоны": 1, "Планшеты": 1})
+        self.assertEqual([bucket["count"] for bucket in facets["price"]], [1, 1, 0, 0, 0, 0])
+        self.assertEqual(facets["total"], 1)
+
+    def test_bucket_links_match_bucket_counts(self):
+        Product.objects.create(name="E", description="", price=1000, category=self.phones)
+        facets = ProductFilters().facets(Product.objects.all(), get_category_menu())
+        for bucket in facets["price"]:
+            filters = ProductFilters(price_min=bucket["min"], price_max=bucket["max"])
+            self.assertEqual(filters.apply(Product.objects.all()).count(), bucket["count"], bucket)
+
+    def test_json_endpoint_sorts_and_pages_by_price(self):
+        url = reverse("catalog:product_browse")
+        first = self.client.get(url, {"sort": "-price"}).json()
+        self.assertEqual(first["results"][0]["name"], "D")
+        self.assertEqual(first["facets"]["total"], 4)
+
+        page = self.client.get(url, {"sort": "price", "price_max": "5000"}).json()
+        self.assertEqual([product["name"] for product in page["results"]], ["A", "B", "C"])
+        self.assertEqual(self.client.get(url, {"sort": "color"}).status_code, 400)
+
+    def test_cursor_follows_price_ordering(self):
+        queryset = Product.objects.all()
+        paginator = KeysetPaginator(queryset, 2, ordering=ProductFilters(sort="price").ordering)
+        first = paginator.get_page()
+        second = paginator.get_page(first.next_cursor)
+        self.assertEqual([p.name for p in first], ["A", "B"])
+        self.assertEqual([p.name for p in second], ["C", "D"])
+        self.assertEqual([p.name for p in paginator.get_page(second.previous_cursor)], ["A", "B"])
+
+
+class AsyncViewsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Телевизоры")
+        Product.objects.bulk_create(
+            Product(name=f"Товар {i:02d}", description="Описание", price=100, category=category) for i in range(15)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    async def get(self, view, url, **kwargs):
+        request = AsyncRequestFactory().get(url)
+        request.user = AnonymousUser()
+        response = await view.as_view()(request, **kwargs)
+        # Как и ASGIHandler, рендерим шаблон в потоке
+        return await sync_to_async(response.render)()
+
+    async def test_home_paginates_with_cursor(self):
+        first = await self.get(AsyncHomeView, "/")
+        self.assertEqual(len(first.context_data["products"]), 12)
+        cursor = first.context_data["page_obj"].next_cursor
+        second = await self.get(AsyncHomeView, f"/?cursor={cursor}")
+        self.assertEqual(len(second.context_data["products"]), 3)
+        self.assertFalse(second.context_data["page_obj"].has_next())
+
+    async def test_home_facets_match_sync_view(self):
+        response = await self.get(AsyncHomeView, "/?price_min=50")
+        # Сравнение с синхронным путем без общего кеша фасетов
+        await cache.aclear()
+        expected = await sync_to_async(get_product_facets)(ProductFilters.from_query({"price_min": "50"}))
+        self.assertEqual(response.context_data["facets"], expected)
+        self.assertEqual(response.context_data["facets"]["total"], 15)
+
+    async def test_home_cards_link_to_product_detail(self):
+        response = await self.get(AsyncHomeView, "/")
+        product = response.context_data["products"][0]
+        # URL собираются во view без {% url %} на каждую карточку
+        self.assertContains(response, f'href="{reverse("catalog:product_detail", kwargs={"pk": product.pk})}"')
+
+    async def test_product_detail_renders_category(self):
+        product = await Product.objects.afirst()
+        response = await self.get(AsyncProductDetailView, "/", pk=product.pk)
+        self.assertContains(response, "Телевизоры")
+
+
+class ProductSummaryTests(TestCase):
+    def test_summary_follows_description(self):
+        product = Product.objects.create(name="QLED", description="Яркие цвета " * 20, price=100)
+        self.assertEqual(len(product.summary), 100)
+        self.assertTrue(product.summary.endswith("…"))
+
+        product.description = "Коротко"
+        product.save(update_fields=["description"])
+        product.refresh_from_db()
+        self.assertEqual(product.summary, "Коротко")
+
+    def test_listing_does_not_load_description(self):
+        Product.objects.create(name="QLED", description="Яркие цвета", price=100)
+        product = Product.objects.for_listing().get()
+        self.assertIn("description", product.get_deferred_fields())
+        with self.assertNumQueries(0):
+            self.assertEqual(product.summary, "Яркие цвета")
+
+
+class ProductAdminTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = [Product.objects.create(name=f"Товар {i}", description="", price=10) for i in range(3)]
+
+    def setUp(self):
+        admin = get_user_model().objects.create_superuser(username="admin", password="password")
+        self.client.force_login(admin)
+
+    def test_list_editable_prices_saved_in_one_update(self):
+        data = {"form-TOTAL_FORMS": 3, "form-INITIAL_FORMS": 3, "_save": "Сохранить"}
+        for i, product in enumerate(self.products):
+            data.update({f"form-{i}-id": product.pk, f"form-{i}-price": 10 if i == 0 else 20 + i})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse("admin:catalog_product_changelist"), data)
+        self.assertEqual(response.status_code, 302)
+        updates = [query for query in queries if query["sql"].startswith('UPDATE "catalog_product"')]
+        self.assertEqual(len(updates), 1)
+        prices = dict(Product.objects.values_list("pk", "price"))
+        self.assertEqual([prices[product.pk] for product in self.products], [10, 21, 22])
+        self.assertGreater(Product.objects.get(pk=self.products[1].pk).updated_at, self.products[1].updated_at)
+
+    def test_export_action_streams_csv(self):
+        data = {"action": "export_csv", "select_across": 1, "index": 0, "_selected_action": self.products[0].pk}
+        response = self.client.post(reverse("admin:catalog_product_changelist"), data)
+        self.assertTrue(response.streaming)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], "id,name,description,price,category,image,created_at,updated_at")
+        self.assertEqual(len(lines), 1 + len(self.products))
+
+
+class ExportProductsTests(TestCase):
+    def test_export_can_be_imported_back(self):
+        category = Category.objects.create(name="Мониторы")
+        Product.objects.create(
+            name='Монитор, 27"', description="IPS\nматовый", price=Decimal("0.10"), category=category
+        )
+        Product.objects.create(name="Кабель", description="", price=5)
+        expected = sorted(Product.objects.values_list("name", "description", "price", "category__name"))
+
+        for name in ("products.csv.gz", "products.jsonl"):
+            with tempfile.TemporaryDirectory() as directory:
+                path = str(Path(directory) / name)
+                call_command("export_products", path, stdout=StringIO())
+                Product.objects.all().delete()
+                call_command("import_products", path, stdout=StringIO())
+            imported = sorted(Product.objects.values_list("name", "description", "price", "category__name"))
+            self.assertEqual(imported, expected)
+
+
+class RecommendationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        monitors = Category.objects.create(name="Мониторы")
+        cables = Category.objects.create(name="Кабели")
+        cls.products = {
+            name: Product.objects.create(name=name, description=description, price=100, category=category)
+            for name, description, category in [
+                ("Монитор IPS 27", "матрица IPS, частота 144 Гц", monitors),
+                ("Монитор IPS 24", "матрица IPS, частота 75 Гц", monitors),
+                ("Монитор VA 32", "изогнутый экран", monitors),
+                ("Кабель HDMI", "кабель для монитора, 144 Гц", cables),
+                ("Кабель USB", "кабель для зарядки", cables),
+                ("Подставка", "изогнутый кронштейн", None),
+            ]
+        }
+
+    def neighbors(self, name):
+        names = {product.pk: product_name for product_name, product in self.products.items()}
+        return [names[pk] for pk in ProductRecommendation.objects.get(pk=self.products[name].pk).neighbor_ids]
+
+    def test_full_rebuild_with_numpy_and_python(self):
+        backends = (False, True) if recommendations.np is not None else (False,)
+        results = []
+        for use_numpy in backends:
+            with self.subTest(use_numpy=use_numpy):
+                self.assertEqual(update_recommendations(full=True, use_numpy=use_numpy), (6, 6))
+                results.append(
+                    list(ProductRecommendation.objects.order_by("pk").values_list("neighbor_ids", "scores"))
+                )
+                self.assertEqual(
+                    self.neighbors("Монитор IPS 27")[:3], ["Монитор IPS 24", "Монитор VA 32", "Кабель HDMI"]
+                )
+                # Без общей категории связывает только текст
+                self.assertEqual(self.neighbors("Подставка"), ["Монитор VA 32"])
+        self.assertEqual(results[0], results[-1])
+
+    def test_detail_page_reads_neighbors_with_one_query(self):
+        update_recommendations(full=True, use_numpy=False)
+        product = self.products["Монитор IPS 27"]
+        with self.assertNumQueries(1):
+            related = list(related_products(product.pk))
+        self.assertEqual([item.name for item in related], self.neighbors("Монитор IPS 27"))
+
+        response = self.client.get(reverse("catalog:product_detail", kwargs={"pk": product.pk}))
+        self.assertContains(response, reverse("catalog:product_detail", kwargs={"pk": related[0].pk}))
+
+    @override_settings(PAGE_CACHE_TIMEOUT=60)
+    def test_neighbor_change_invalidates_detail_page(self):
+        cache.clear()
+        update_recommendations(full=True, use_numpy=False)
+        url = reverse("catalog:product_detail", kwargs={"pk": self.products["Монитор IPS 27"].pk})
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url)["X-Page-Cache"], "hit")
+
+        neighbor = self.products[self.neighbors("Монитор IPS 27")[0]]
+        neighbor.name = "Монитор IPS 24 (уцененный)"
+        with self.captureOnCommitCallbacks(execute=True):
+            neighbor.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Монитор IPS 24 (уцененный)")
+
+    def test_incremental_update_handles_changed_and_deleted_products(self):
+        update_recommendations(full=True, use_numpy=False)
+        self.assertEqual(update_recommendations(use_numpy=False), (6, 0))
+
+        self.products.pop("Монитор IPS 24").delete()
+        stand = self.products["Подставка"]
+        stand.description = "кронштейн для монитора IPS"
+        stand.save()
+        update_recommendations(use_numpy=False)
 
-# Create your tests here.
+        self.assertFalse(ProductRecommendation.objects.filter(computed_at__isnull=True).exists())
+        self.assertEqual(self.neighbors("Подставка")[0], "Монитор IPS 27")
+        self.assertNotIn("Монитор IPS 24", self.neighbors("Монитор IPS 27"))
@@ -1,11 +1,17 @@
 from catalog.apps import CatalogConfig
 from django.urls import path
-from .views import HomeView, ContactsView, ProductDetailView
+from core.views import select_view
+from .views import HomeView, AsyncHomeView, ContactsView, ProductDetailView, AsyncProductDetailView, product_browse
 
 app_name = CatalogConfig.name
 
 urlpatterns = [
-    path('', HomeView.as_view(), name='home'),
+    path('', select_view('catalog:home', HomeView, AsyncHomeView), name='home'),
+    path('browse/', product_browse, name='product_browse'),
     path('contacts/', ContactsView.as_view(), name='contacts'),
-    path('product/<int:pk>/', ProductDetailView.as_view(), name='product_detail'),
+    path(
+        'product/<int:pk>/',
+        select_view('catalog:product_detail', ProductDetailView, AsyncProductDetailView),
+        name='product_detail',
+    ),
 ]
@@ -1,21 +1,141 @@
+from django.http import Http404
+from django.http import JsonResponse
+from django.template.response import TemplateResponse
+from django.urls import reverse
+from django.views import View
 from django.views.generic import ListView, DetailView, TemplateView
 from django.shortcuts import get_object_or_404
+
+from core.cache import CachedPageMixin
+from core.http import ConditionalGetMixin
+from core.rendering import attach_urls
+
+from .filters import SORT_LABELS
+from .filters import InvalidFilter
+from .filters import ProductFilters
 from .models import Product
+from .pagination import InvalidCursor, KeysetPaginator
+from .services import aget_product_facets
+from .services import get_product_facets
+from .services import related_products
+from .services import related_products_updated_at
+
 
+def get_filters(request):
+    """Фильтры и сортировка витрины из ?category=&price_min=&price_max=&since=&sort= (некорректные - 404)"""
+    try:
+        return ProductFilters.from_query(request.GET)
+    except InvalidFilter as e:
+        raise Http404(str(e))
 
-class HomeView(ListView):
-    """CBV для главной страницы (список продуктов)"""
+
+class HomeView(CachedPageMixin, ListView):
+    """CBV для главной страницы (список продуктов с курсорной пагинацией)"""
     model = Product
     template_name = "home.html"
     context_object_name = "products"
+    paginate_by = 12
+    paginator_class = KeysetPaginator
+
+    def get_queryset(self):
+        self.filters = get_filters(self.request)
+        # Полное описание и поисковый вектор в карточках не нужны
+        return self.filters.apply(Product.objects.for_listing())
+
+    def get_paginator(self, queryset, per_page, **kwargs):
+        return self.paginator_class(queryset, per_page, ordering=self.filters.ordering)
+
+    def paginate_queryset(self, queryset, page_size):
+        """Вместо номера страницы принимает непрозрачный токен ?cursor="""
+        paginator = self.get_paginator(queryset, page_size)
+        try:
+            page = paginator.get_page(self.request.GET.get("cursor"))
+        except InvalidCursor:
+            raise Http404("Некорректный курсор страницы")
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    def get_cache_dependencies(self):
+        return ["catalog:products"]
 
     def get_context_data(self, **kwargs):
         """Добавляем заголовок в контекст"""
         context = super().get_context_data(**kwargs)
         context['title'] = "Skystore - Главная"
+        context['filters'] = self.filters
+        context['facets'] = get_product_facets(self.filters)
+        context['sort_labels'] = SORT_LABELS
+        # URL карточек собираются без {% url %} на каждую карточку
+        attach_urls(context['products'], "catalog:product_detail", "pk")
         return context
 
 
+class AsyncHomeView(View):
+    """
+    Асинхронный вариант HomeView для ASGI: запросы к БД выполняются через async ORM.
+    Кеш страниц и условные GET не поддерживаются - они рассчитаны на синхронный путь.
+    """
+    template_name = HomeView.template_name
+    paginate_by = HomeView.paginate_by
+
+    async def get(self, request, *args, **kwargs):
+        filters = get_filters(request)
+        queryset = filters.apply(Product.objects.for_listing())
+        paginator = KeysetPaginator(queryset, self.paginate_by, ordering=filters.ordering)
+        try:
+            page = await paginator.aget_page(request.GET.get("cursor"))
+        except InvalidCursor:
+            raise Http404("Некорректный курсор страницы")
+        attach_urls(page.object_list, "catalog:product_detail", "pk")
+        context = {
+            "paginator": paginator,
+            "page_obj": page,
+            "is_paginated": page.has_other_pages(),
+            "object_list": page.object_list,
+            "products": page.object_list,
+            "title": "Skystore - Главная",
+            "filters": filters,
+            "facets": await aget_product_facets(filters),
+            "sort_labels": SORT_LABELS,
+        }
+        return TemplateResponse(request, self.template_name, context)
+
+
+def product_browse(request):
+    """
+    JSON-вариант витрины: те же фильтры, сортировка и курсор, что у главной страницы, плюс фасеты.
+    Некорректные параметры - ответ 400 с описанием ошибки.
+    """
+    try:
+        filters = ProductFilters.from_query(request.GET)
+        queryset = filters.apply(Product.objects.only("id", "name", "price", "category_id", "created_at"))
+        paginator = KeysetPaginator(queryset, HomeView.paginate_by, ordering=filters.ordering)
+        page = paginator.get_page(request.GET.get("cursor"))
+    except InvalidFilter as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    except InvalidCursor:
+        return JsonResponse({"error": "Некорректный курсор страницы"}, status=400)
+
+    return JsonResponse(
+        {
+            "results": [
+                {
+                    "id": product.pk,
+                    "name": product.name,
+                    "price": str(product.price),
+                    "category_id": product.category_id,
+                    "created_at": product.created_at,
+                    "url": reverse("catalog:product_detail", kwargs={"pk": product.pk}),
+                }
+                for product in page
+            ],
+            "next_cursor": page.next_cursor,
+            "previous_cursor": page.previous_cursor,
+            "facets": get_product_facets(filters),
+        },
+        json_dumps_params={"ensure_ascii": False},
+    )
+
+
 class ContactsView(TemplateView):
     """CBV для страницы контактов"""
     template_name = "contacts.html"
@@ -26,14 +146,67 @@ class ContactsView(TemplateView):
         return context
 
 
-class ProductDetailView(DetailView):
+class ProductDetailView(ConditionalGetMixin, CachedPageMixin, DetailView):
     """CBV для отображения детальной информации о товаре"""
     model = Product
     template_name = "catalog/product_detail.html"
     context_object_name = "product"
 
+    def get_cache_dependencies(self):
+        # catalog:recommendations сбрасывается полным пересчетом похожих товаров, версии соседей - их изменением
+        # и удалением; список соседей прочитан в get_validators (ConditionalGetMixin выполняется раньше)
+        neighbors = [f"catalog.product:{pk}" for pk in getattr(self, "neighbor_ids", None) or ()]
+        return [f"catalog.product:{self.kwargs['pk']}", "catalog:categories", "catalog:recommendations", *neighbors]
+
+    def get_validators(self):
+        """
+        Версия товара, название категории, время расчета похожих товаров и последнего изменения соседей
+        (названия и цены соседей выводятся на странице) одним запросом
+        """
+        pk = self.kwargs["pk"]
+        row = (
+            Product.objects.filter(pk=pk)
+            .annotate(neighbors_updated_at=related_products_updated_at(pk))
+            .values_list(
+                "pk",
+                "updated_at",
+                "category__name",
+                "recommendation__computed_at",
+                "recommendation__neighbor_ids",
+                "neighbors_updated_at",
+            )
+            .first()
+        )
+        if row is None:
+            return None
+        _, updated_at, _, computed_at, self.neighbor_ids, neighbors_updated_at = row
+        return row, max(filter(None, (updated_at, computed_at, neighbors_updated_at)))
+
     def get_context_data(self, **kwargs):
         """Добавляем заголовок в контекст"""
         context = super().get_context_data(**kwargs)
         context['title'] = f"{self.object.name} - Детальная информация"
+        context["related_products"] = attach_urls(
+            list(related_products(self.object.pk)), "catalog:product_detail", "pk"
+        )
         return context
+
+
+class AsyncProductDetailView(View):
+    """Асинхронный вариант ProductDetailView: товар с категорией одним запросом через aget()"""
+    template_name = ProductDetailView.template_name
+
+    async def get(self, request, *args, **kwargs):
+        try:
+            product = await Product.objects.select_related("category").aget(pk=kwargs["pk"])
+        except Product.DoesNotExist:
+            raise Http404("Товар не найден")
+        context = {
+            "object": product,
+            "product": product,
+            "title": f"{product.name} - Детальная информация",
+            "related_products": attach_urls(
+                [related async for related in related_products(product.pk)], "catalog:product_detail", "pk"
+            ),
+        }
+        return TemplateResponse(request, self.template_name, context)
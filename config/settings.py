@@ -22,12 +22,18 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
+    "core",
     "catalog",
-    "blog"
+    "blog",
+    "cart",
 ]
 
 MIDDLEWARE = [
+    "core.middleware.RequestInstrumentationMiddleware",
+    "core.middleware.ReplicaStickinessMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "core.middleware.StaticFilesMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -38,19 +44,30 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = "config.urls"
 
+# Загрузчики шаблонов. Вне DEBUG (или при TEMPLATE_CACHE=True) они обернуты кеширующим загрузчиком:
+# шаблон компилируется один раз на процесс, а config.wsgi/config.asgi компилируют шаблоны проекта при старте
+# (core.rendering.warm_templates). В DEBUG шаблоны перечитываются на каждый рендеринг
+TEMPLATE_LOADERS = [
+    "django.template.loaders.filesystem.Loader",
+    "django.template.loaders.app_directories.Loader",
+]
+TEMPLATE_CACHE = os.getenv("TEMPLATE_CACHE", str(not DEBUG)) == "True"
+
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
         "DIRS": [
             BASE_DIR / "catalog" / "templates",
         ],
-        "APP_DIRS": True,
         "OPTIONS": {
             "context_processors": [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
             ],
+            "loaders": (
+                [("django.template.loaders.cached.Loader", TEMPLATE_LOADERS)] if TEMPLATE_CACHE else TEMPLATE_LOADERS
+            ),
         },
     },
 ]
@@ -68,6 +85,95 @@ DATABASES = {
     }
 }
 
+# Управление соединениями с БД.
+# CONN_MAX_AGE - сколько секунд переиспользовать соединение между запросами (0 - новое на каждый запрос).
+# Под ASGI постоянные соединения не переиспользуются, а копятся до max_connections сервера, поэтому
+# с ASYNC_VIEWS по умолчанию 0 - там нужен пул. DB_POOL=True включает пул psycopg 3
+# (pip install "psycopg[binary,pool]"), с пулом CONN_MAX_AGE не задается.
+# CONN_HEALTH_CHECKS проверяет переиспользуемое соединение перед первым запросом к нему
+DB_POOL = os.getenv("DB_POOL") == "True"
+if DB_POOL:
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": int(os.getenv("DB_POOL_MIN_SIZE", 2)),
+            "max_size": int(os.getenv("DB_POOL_MAX_SIZE", 10)),
+            "timeout": float(os.getenv("DB_POOL_TIMEOUT", 10)),
+        }
+    }
+else:
+    DATABASES["default"]["CONN_MAX_AGE"] = int(os.getenv("CONN_MAX_AGE", 0 if os.getenv("ASYNC_VIEWS") else 60))
+DATABASES["default"]["CONN_HEALTH_CHECKS"] = os.getenv("CONN_HEALTH_CHECKS", "True") == "True"
+
+# Реплика для чтения каталога и опубликованных записей блога; незаданные параметры берутся у primary.
+# Для локальной проверки достаточно REPLICA_NAME с именем той же БД: два алиаса на одну базу.
+# В тестах реплика - зеркало default (TEST.MIRROR), отдельная тестовая БД не создается
+DATABASES["replica"] = {
+    **DATABASES["default"],
+    **{
+        key: os.getenv(f"REPLICA_{key}")
+        for key in ("NAME", "USER", "PASSWORD", "HOST", "PORT")
+        if os.getenv(f"REPLICA_{key}")
+    },
+    "TEST": {"MIRROR": "default"},
+}
+
+DATABASE_ROUTERS = ["core.db.ReplicaRouter"]
+
+# Раннер тестов закрывает пулы зеркал (реплики) перед удалением тестовой БД
+TEST_RUNNER = "core.runner.PoolClosingTestRunner"
+
+# Алиасы реплик, между которыми распределяется чтение; пусто - все запросы идут в default
+REPLICA_DATABASES = ["replica"] if os.getenv("REPLICA_NAME") or os.getenv("REPLICA_HOST") else []
+
+# Модели (app_label.model), которые читаются с реплик
+REPLICA_READ_MODELS = ["catalog.product", "catalog.category"]
+
+# После записи клиент читает из primary столько секунд (запас на отставание реплики)
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", 5))
+REPLICA_STICKY_COOKIE = "primary_pin"
+
+# Кеш: по умолчанию в памяти процесса, backend подменяется через переменные окружения (например, Redis/Memcached)
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", "skystore"),
+    },
+    # Отдельный кеш для сессий, чтобы страницы и фрагменты не вытесняли сессии (корзины) посетителей
+    "sessions": {
+        "BACKEND": os.getenv(
+            "SESSION_CACHE_BACKEND", os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache")
+        ),
+        "LOCATION": os.getenv("SESSION_CACHE_LOCATION", "skystore-sessions"),
+    },
+}
+
+# Хранилище сессий (в сессии живет корзина). db - строка django_session на посетителя и UPDATE на каждое
+# изменение корзины; django.contrib.sessions.backends.cache - только кеш "sessions" (нужен общий для всех
+# процессов backend: Redis/Memcached, при вытеснении корзина теряется); ...backends.cached_db - чтение из кеша,
+# запись в кеш и БД
+SESSION_ENGINE = os.getenv("SESSION_ENGINE", "django.contrib.sessions.backends.db")
+SESSION_CACHE_ALIAS = "sessions"
+
+# Время жизни (секунды) закешированных страниц для анонимных пользователей, 0 - отключить
+PAGE_CACHE_TIMEOUT = int(os.getenv("PAGE_CACHE_TIMEOUT", 60))
+
+# Время жизни (секунды) закешированных карточек товаров и записей
+FRAGMENT_CACHE_TIMEOUT = int(os.getenv("FRAGMENT_CACHE_TIMEOUT", 60 * 60))
+
+# Адреса, с которых разрешено забирать метрики кеша
+METRICS_ALLOWED_IPS = os.getenv("METRICS_ALLOWED_IPS", "127.0.0.1").split(",")
+
+# Маршруты (namespace:name), которые обслуживаются асинхронными вариантами представлений; "*" - все.
+# Имеет смысл при запуске под ASGI-сервером (config.asgi), под WSGI async-представления работают через поток
+ASYNC_VIEWS = [name.strip() for name in os.getenv("ASYNC_VIEWS", "").split(",") if name.strip()]
+
+# Инструментирование запросов (Server-Timing, лог медленных запросов), False - middleware отключается полностью
+INSTRUMENTATION_ENABLED = os.getenv("INSTRUMENTATION_ENABLED", "True") == "True"
+
+# Пороги (миллисекунды) для записи в лог медленного запроса целиком и отдельного SQL
+INSTRUMENTATION_SLOW_REQUEST_MS = float(os.getenv("INSTRUMENTATION_SLOW_REQUEST_MS", 500))
+INSTRUMENTATION_SLOW_QUERY_MS = float(os.getenv("INSTRUMENTATION_SLOW_QUERY_MS", 100))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -93,6 +199,33 @@ USE_TZ = True
 
 STATIC_URL = "static/"
 STATICFILES_DIRS = [BASE_DIR / "static"]
+# Сюда collectstatic собирает файлы с хешем содержимого в имени, манифест staticfiles.json и копии .gz/.br
+STATIC_ROOT = os.getenv("STATIC_ROOT") or BASE_DIR / "staticfiles"
+
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "core.staticfiles.CompressedManifestStaticFilesStorage"},
+}
+
+# Раздача STATIC_ROOT самим приложением (core.middleware.StaticFilesMiddleware) - для развертывания без nginx.
+# Файлы с хешем в имени кешируются браузером навсегда (immutable), остальные - на STATIC_MAX_AGE секунд
+STATIC_SERVE = os.getenv("STATIC_SERVE") == "True"
+STATIC_MAX_AGE = int(os.getenv("STATIC_MAX_AGE", 60))
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
+
+# Адрес сайта для абсолютных ссылок в sitemap и RSS/Atom
+SITE_URL = os.getenv("SITE_URL", "http://127.0.0.1:8000")
+# Пререндеренные sitemap и ленты (core.sitemaps); файл перестраивается после изменения его объектов
+# или через SITEMAP_MAX_AGE секунд, если отметка об изменении потерялась вместе с кешем
+SITEMAP_ROOT = os.getenv("SITEMAP_ROOT") or BASE_DIR / "sitemaps"
+SITEMAP_MAX_AGE = int(os.getenv("SITEMAP_MAX_AGE", 24 * 60 * 60))
+
+# Интервал (секунды) пакетной записи счетчика просмотров блога в БД, 0 - записывать при каждом просмотре
+BLOG_VIEWS_FLUSH_INTERVAL = int(os.getenv("BLOG_VIEWS_FLUSH_INTERVAL", 10))
+
+# Рейтинг популярных записей (update_trending): период полураспада веса просмотра и окно почасовых
+# счетчиков просмотров (часы); просмотры старше окна удаляются и в рейтинге не участвуют
+BLOG_TRENDING_HALF_LIFE = float(os.getenv("BLOG_TRENDING_HALF_LIFE", 24))
+BLOG_TRENDING_WINDOW = int(os.getenv("BLOG_TRENDING_WINDOW", 7 * 24))
@@ -4,8 +4,24 @@ from django.contrib import admin
 from django.urls import include
 from django.urls import path
 
+from core.views import SearchView
+from core.views import api_list
+from core.views import cache_metrics
+from core.views import db_metrics
+from core.views import search_suggest
+from core.views import sitemap_index
+from core.views import sitemap_section
+
 urlpatterns = [path("admin/", admin.site.urls), path("", include("catalog.urls", namespace="catalog")),
                path("blog/", include("blog.urls", namespace="blog")),
+               path("cart/", include("cart.urls", namespace="cart")),
+               path("search/", SearchView.as_view(), name="search"),
+               path("search/suggest/", search_suggest, name="search_suggest"),
+               path("metrics/cache/", cache_metrics, name="cache_metrics"),
+               path("metrics/db/", db_metrics, name="db_metrics"),
+               path("api/<slug:resource>/", api_list, name="api_list"),
+               path("sitemap.xml", sitemap_index, name="sitemap"),
+               path("sitemap-<slug:section>-<int:page>.xml", sitemap_section, name="sitemap_section"),
                ]
 
 if settings.DEBUG:
@@ -11,6 +11,11 @@ import os
 
 from django.core.wsgi import get_wsgi_application
 
+from core.rendering import warm_templates
+
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
 application = get_wsgi_application()
+
+# Компиляция шаблонов до первого запроса (только с кеширующим загрузчиком)
+warm_templates()
@@ -0,0 +1,116 @@
+import json
+
+from django.contrib.admin.models import CHANGE
+from django.contrib.admin.models import LogEntry
+from django.contrib.admin.views.main import ChangeList
+from django.contrib.contenttypes.models import ContentType
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db import router
+from django.db import transaction
+from django.utils.functional import cached_property
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Пагинатор списков админки: для таблицы без фильтров берет оценку числа строк из pg_class.reltuples
+    (обновляется VACUUM/ANALYZE) вместо COUNT(*), если она больше estimate_threshold.
+    Отфильтрованные списки и небольшие таблицы считаются точно.
+    """
+
+    estimate_threshold = 10_000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        query = getattr(queryset, "query", None)
+        if query is None or query.where or query.distinct or query.is_sliced:
+            return super().count
+        with connections[queryset.db].cursor() as cursor:
+            cursor.execute("SELECT reltuples FROM pg_class WHERE oid = %s::regclass", [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+        # -1 - таблица еще ни разу не анализировалась
+        estimate = int(row[0]) if row else -1
+        if estimate < self.estimate_threshold:
+            return super().count
+        return estimate
+
+
+class ListOnlyChangeList(ChangeList):
+    def get_queryset(self, request, *args, **kwargs):
+        queryset = super().get_queryset(request, *args, **kwargs)
+        if self.model_admin.list_only:
+            queryset = queryset.only(*self.model_admin.list_only)
+        return queryset
+
+
+class LargeTableAdminMixin:
+    """
+    Список больших таблиц в админке:
+    - list_only - поля, загружаемые для списка (.only()), остальные колонки не читаются;
+    - оценка числа строк вместо COUNT(*) и без второго COUNT(*) по всей таблице при фильтрах;
+    - изменения list_editable сохраняются одним bulk_update и одной вставкой в журнал вместо save() на строку.
+      save() и сигналы для строк не вызываются: сброс кешей и прочие последствия изменения выполняет
+      list_edits_saved(), поэтому в list_editable допустимы только поля, для которых этого достаточно.
+    """
+
+    list_only = None
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return ListOnlyChangeList
+
+    def changelist_view(self, request, extra_context=None):
+        if request.method != "POST" or not self.list_editable or "_save" not in request.POST:
+            return super().changelist_view(request, extra_context)
+        request._list_edits = []
+        request._list_edit_log = []
+        with transaction.atomic(using=router.db_for_write(self.model)):
+            response = super().changelist_view(request, extra_context)
+            self._bulk_save_list_edits(request)
+        return response
+
+    def save_model(self, request, obj, form, change):
+        if getattr(request, "_list_edits", None) is None:
+            return super().save_model(request, obj, form, change)
+        request._list_edits.append((obj, form.changed_data))
+
+    def log_change(self, request, obj, message):
+        if getattr(request, "_list_edit_log", None) is None:
+            return super().log_change(request, obj, message)
+        request._list_edit_log.append((obj, message))
+
+    def list_edits_saved(self, request, objects):
+        """Вызывается после bulk_update изменений из списка (внутри той же транзакции)"""
+
+    def _bulk_save_list_edits(self, request):
+        edits, log = request._list_edits, request._list_edit_log
+        request._list_edits = request._list_edit_log = None
+        if not edits:
+            return
+        self._bulk_log_changes(request, log)
+        fields = {name for _, changed in edits for name in changed}
+        objects = [obj for obj, _ in edits]
+        # auto_now (updated_at) проставляется в save(), которого здесь нет
+        for field in self.model._meta.concrete_fields:
+            if getattr(field, "auto_now", False):
+                fields.add(field.name)
+                for obj in objects:
+                    field.pre_save(obj, add=False)
+        self.model._default_manager.bulk_update(objects, sorted(fields))
+        self.list_edits_saved(request, objects)
+
+    def _bulk_log_changes(self, request, entries):
+        content_type = ContentType.objects.get_for_model(self.model, for_concrete_model=False)
+        LogEntry.objects.bulk_create(
+            LogEntry(
+                user_id=request.user.pk,
+                content_type_id=content_type.pk,
+                object_id=str(obj.pk),
+                object_repr=str(obj)[:200],
+                action_flag=CHANGE,
+                change_message=json.dumps(message) if isinstance(message, list) else message,
+            )
+            for obj, message in entries
+        )
@@ -0,0 +1,194 @@
+from dataclasses import dataclass
+from json.encoder import encode_basestring
+from typing import Callable
+
+from blog.models import BlogPost
+from catalog.models import Category
+from catalog.models import Product
+
+from .rendering import url_formatter
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1_000
+# Строк в одном фрагменте потокового ответа
+STREAM_CHUNK_ROWS = 200
+
+
+class InvalidRequest(ValueError):
+    """Некорректные параметры запроса API (ответ 400 с текстом ошибки)"""
+
+
+def encode_str(value):
+    return "null" if value is None else encode_basestring(value)
+
+
+def encode_int(value):
+    return "null" if value is None else str(int(value))
+
+
+def encode_decimal(value):
+    """Decimal - числом JSON с точной записью из БД ("1299.00"), без преобразования во float"""
+    return "null" if value is None else format(value, "f")
+
+
+def encode_datetime(value):
+    return "null" if value is None else f'"{value.isoformat()}"'
+
+
+def encode_file(value):
+    return encode_str(value.url) if value else "null"
+
+
+@dataclass(frozen=True)
+class ApiField:
+    """
+    Поле ответа: колонки для .only(), связи для select_related и фабрика функции объект -> фрагмент JSON
+    (вызывается на каждый ответ, поэтому может зависеть от настроек URL)
+    """
+
+    columns: tuple
+    encoder: Callable
+    related: tuple = ()
+
+
+def attr(name, encode):
+    return ApiField((name,), lambda: lambda obj: encode(getattr(obj, name)))
+
+
+def detail_url(viewname, kwarg, field_name):
+    def encoder():
+        url = url_formatter(viewname, kwarg)
+        return lambda obj: encode_str(url(getattr(obj, field_name)))
+
+    return ApiField((field_name,), encoder)
+
+
+def encode_category(obj):
+    category = obj.category
+    if category is None:
+        return "null"
+    return f'{{"id":{category.pk},"name":{encode_str(category.name)}}}'
+
+
+@dataclass(frozen=True)
+class Resource:
+    """Ресурс API: выборка, доступные поля (?fields=) и поля по умолчанию; порядок и курсор - по pk"""
+
+    queryset: Callable
+    fields: dict
+    default_fields: tuple
+    ordering: tuple = ("pk",)
+    # Поля, загружаемые всегда: ключ курсора и ?ids=
+    required_columns: tuple = ("pk",)
+
+    def parse_fields(self, value):
+        names = [name.strip() for name in (value or "").split(",") if name.strip()] or list(self.default_fields)
+        unknown = [name for name in names if name not in self.fields]
+        if unknown:
+            raise InvalidRequest(f"Неизвестные поля: {', '.join(unknown)}. Доступны: {', '.join(self.fields)}")
+        return list(dict.fromkeys(names))
+
+    def select(self, names):
+        """Выборка только нужных колонок: ?fields= отображается в .only() и select_related()"""
+        columns = dict.fromkeys(self.required_columns)
+        related = {}
+        for name in names:
+            columns.update(dict.fromkeys(self.fields[name].columns))
+            related.update(dict.fromkeys(self.fields[name].related))
+        queryset = self.queryset().only(*columns)
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset
+
+    def row_encoder(self, names):
+        """Функция объект -> JSON-объект строки; ключи закодированы заранее, одна склейка строк на строку"""
+        parts = [(f"{encode_basestring(name)}:", self.fields[name].encoder()) for name in names]
+
+        def encode(obj):
+            return "{" + ",".join([prefix + encode_value(obj) for prefix, encode_value in parts]) + "}"
+
+        return encode
+
+
+RESOURCES = {
+    "products": Resource(
+        queryset=Product.objects.all,
+        fields={
+            "id": attr("pk", encode_int),
+            "name": attr("name", encode_str),
+            "summary": attr("summary", encode_str),
+            "description": attr("description", encode_str),
+            "price": attr("price", encode_decimal),
+            "category": ApiField(("category", "category__name"), lambda: encode_category, related=("category",)),
+            "image": attr("image", encode_file),
+            "created_at": attr("created_at", encode_datetime),
+            "updated_at": attr("updated_at", encode_datetime),
+            "url": detail_url("catalog:product_detail", "pk", "pk"),
+        },
+        default_fields=("id", "name", "summary", "price", "category", "image", "updated_at", "url"),
+    ),
+    "categories": Resource(
+        queryset=Category.objects.all,
+        fields={
+            "id": attr("pk", encode_int),
+            "name": attr("name", encode_str),
+            "description": attr("description", encode_str),
+            "product_count": attr("product_count", encode_int),
+        },
+        default_fields=("id", "name", "description", "product_count"),
+    ),
+    "posts": Resource(
+        queryset=BlogPost.objects.published,
+        fields={
+            "id": attr("pk", encode_int),
+            "title": attr("title", encode_str),
+            "slug": attr("slug", encode_str),
+            "excerpt": attr("excerpt", encode_str),
+            "content": attr("content", encode_str),
+            "preview_image": attr("preview_image", encode_file),
+            "views_count": attr("views_count", encode_int),
+            "created_at": attr("created_at", encode_datetime),
+            "last_modified": attr("last_modified", encode_datetime),
+            "url": detail_url("blog:post_detail", "slug", "slug"),
+        },
+        default_fields=("id", "title", "slug", "excerpt", "preview_image", "created_at", "last_modified", "url"),
+    ),
+}
+
+
+def parse_ids(value):
+    try:
+        ids = [int(part) for part in value.split(",") if part.strip()]
+    except ValueError:
+        raise InvalidRequest("ids - целые числа через запятую")
+    if not ids or len(ids) > MAX_LIMIT:
+        raise InvalidRequest(f"ids - от 1 до {MAX_LIMIT} значений")
+    return ids
+
+
+def parse_limit(value):
+    if not value:
+        return DEFAULT_LIMIT
+    try:
+        limit = int(value)
+    except ValueError:
+        raise InvalidRequest("limit - целое число")
+    if not 1 <= limit <= MAX_LIMIT:
+        raise InvalidRequest(f"limit - от 1 до {MAX_LIMIT}")
+    return limit
+
+
+def stream_json(objects, encode, tail=""):
+    """Фрагменты ответа {"results":[...]<tail>} по STREAM_CHUNK_ROWS строк"""
+    yield '{"results":['
+    chunk = []
+    first = True
+    for obj in objects:
+        chunk.append(encode(obj))
+        if len(chunk) == STREAM_CHUNK_ROWS:
+            yield ("" if first else ",") + ",".join(chunk)
+            first = False
+            chunk = []
+    if chunk:
+        yield ("" if first else ",") + ",".join(chunk)
+    yield "]" + tail + "}"
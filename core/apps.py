@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    """Общая инфраструктура проекта (кеширование, метрики)"""
+
+    name = "core"
@@ -0,0 +1,161 @@
+import hashlib
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+
+
+class CacheStats:
+    """Счетчики попаданий/промахов кеша в памяти процесса (отдаются через /metrics/cache/)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = Counter()
+
+    def hit(self, kind):
+        with self._lock:
+            self._counts[(kind, "hit")] += 1
+
+    def miss(self, kind):
+        with self._lock:
+            self._counts[(kind, "miss")] += 1
+
+    def snapshot(self):
+        """Копия счетчиков {(вид, результат): количество}"""
+        with self._lock:
+            return dict(self._counts)
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+
+cache_stats = CacheStats()
+
+
+def _version_key(name):
+    return f"version:{name}"
+
+
+def get_versions(names):
+    """
+    Возвращает текущие версии зависимостей одним обращением к кешу.
+    Отсутствующая (вытесненная) версия заменяется новой уникальной, поэтому старые записи не оживают.
+    """
+    keys = [_version_key(name) for name in names]
+    found = cache.get_many(keys)
+    versions = []
+    for key in keys:
+        if key not in found:
+            cache.add(key, time.time_ns(), timeout=None)
+            found[key] = cache.get(key)
+        versions.append(found[key])
+    return versions
+
+
+async def aget_versions(names):
+    """Асинхронный вариант get_versions для async-представлений"""
+    keys = [_version_key(name) for name in names]
+    found = await cache.aget_many(keys)
+    versions = []
+    for key in keys:
+        if key not in found:
+            await cache.aadd(key, time.time_ns(), timeout=None)
+            found[key] = await cache.aget(key)
+        versions.append(found[key])
+    return versions
+
+
+def bump_versions(*names):
+    """Инвалидирует все записи кеша, зависящие от перечисленных версий"""
+    cache.set_many({_version_key(name): time.time_ns() for name in names}, timeout=None)
+
+
+def bump_versions_on_commit(*names):
+    """
+    bump_versions после коммита текущей транзакции (вне транзакции - сразу). Сброс до коммита позволил бы
+    параллельному запросу закешировать прежние данные уже под новой версией
+    """
+    transaction.on_commit(lambda: bump_versions(*names))
+
+
+def object_stamp(obj):
+    """Метка версии объекта для фрагментного кеша: время изменения, если оно есть у модели"""
+    updated_at = getattr(obj, "updated_at", None) or getattr(obj, "last_modified", None)
+    if updated_at is not None:
+        return int(updated_at.timestamp() * 1_000_000)
+    return get_versions([f"{obj._meta.label_lower}:{obj.pk}"])[0]
+
+
+def page_cache_key(request, versions):
+    raw = "|".join([request.get_full_path(), *map(str, versions)])
+    return "page:" + hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+
+
+class CachedPageMixin:
+    """
+    Кеширование целых страниц для анонимных GET-запросов.
+
+    Ключ страницы строится из полного пути и версий зависимостей из get_cache_dependencies(),
+    которые сбрасываются сигналами post_save/post_delete моделей.
+    """
+
+    page_cache_timeout = None
+
+    def get_cache_dependencies(self):
+        """Имена версий, от которых зависит страница"""
+        return []
+
+    def get_page_cache_extra(self, response):
+        """Дополнительные данные, сохраняемые вместе со страницей (доступны в page_cache_hit)"""
+        return None
+
+    def page_cache_hit(self, request, extra):
+        """Вызывается, когда страница отдана из кеша без выполнения view"""
+
+    def _page_cache_timeout(self):
+        if self.page_cache_timeout is not None:
+            return self.page_cache_timeout
+        return getattr(settings, "PAGE_CACHE_TIMEOUT", 0)
+
+    def _page_cacheable(self, request):
+        if request.method not in ("GET", "HEAD") or self._page_cache_timeout() <= 0:
+            return False
+        user = getattr(request, "user", None)
+        return user is None or not user.is_authenticated
+
+    def dispatch(self, request, *args, **kwargs):
+        if not self._page_cacheable(request):
+            return super().dispatch(request, *args, **kwargs)
+
+        key = page_cache_key(request, get_versions(self.get_cache_dependencies()))
+        entry = cache.get(key)
+        if entry is not None:
+            cache_stats.hit("page")
+            self.page_cache_hit(request, entry["extra"])
+            response = HttpResponse(entry["content"], content_type=entry["content_type"])
+            response["X-Page-Cache"] = "hit"
+            return response
+
+        cache_stats.miss("page")
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == 200 and not response.streaming:
+            extra = self.get_page_cache_extra(response)
+            timeout = self._page_cache_timeout()
+
+            def store(rendered):
+                if not rendered.cookies:
+                    entry = {"content": rendered.content, "content_type": rendered["Content-Type"], "extra": extra}
+                    cache.set(key, entry, timeout)
+
+            # TemplateResponse рендерится после выхода из view, сохраняем страницу уже отрендеренной
+            if hasattr(response, "add_post_render_callback"):
+                response.add_post_render_callback(store)
+            else:
+                store(response)
+        response["X-Page-Cache"] = "miss"
+        return response
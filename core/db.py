@@ -0,0 +1,120 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db import connections
+
+
+class RoutingState:
+    """Состояние маршрутизации одного запроса (или команды): была ли запись и закреплено ли чтение за primary"""
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+_state = ContextVar("db_routing_state", default=None)
+
+
+def _current_state():
+    state = _state.get()
+    if state is None:
+        # Вне запроса (команды, фоновые потоки) состояние живет до конца контекста
+        state = RoutingState()
+        _state.set(state)
+    return state
+
+
+@contextmanager
+def routing_scope(pinned=False):
+    """Отдельное состояние маршрутизации на время запроса; pinned - чтение сразу с primary"""
+    state = RoutingState(pinned=pinned)
+    token = _state.set(state)
+    try:
+        yield state
+    finally:
+        _state.reset(token)
+
+
+def read_database():
+    """
+    Алиас БД для чтения: случайная реплика из REPLICA_DATABASES или primary, если реплик нет,
+    чтение закреплено за primary после записи или идет транзакция на primary.
+    """
+    replicas = settings.REPLICA_DATABASES
+    if not replicas:
+        return DEFAULT_DB_ALIAS
+    state = _state.get()
+    if state is not None and (state.pinned or state.wrote):
+        return DEFAULT_DB_ALIAS
+    if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return DEFAULT_DB_ALIAS
+    return random.choice(replicas)
+
+
+def pool_stats():
+    """
+    Состояние пулов соединений текущего процесса {алиас: {...}} для используемых алиасов с OPTIONS["pool"]:
+    in_use - выданы запросам, idle - свободны в пуле, waiting - ждут свободного соединения,
+    created - открыто соединений с запуска пула, errors - отказы (таймаут ожидания).
+    Без пула (DB_POOL не задан) словарь пуст.
+    """
+    stats = {}
+    for alias in [DEFAULT_DB_ALIAS, *settings.REPLICA_DATABASES]:
+        connection = connections[alias]
+        if not connection.settings_dict.get("OPTIONS", {}).get("pool"):
+            continue
+        # Пул создается при первом обращении: min_size соединений открывается сразу
+        raw = connection.pool.get_stats()
+        stats[alias] = {
+            "size": raw.get("pool_size", 0),
+            "max_size": raw.get("pool_max", 0),
+            "in_use": raw.get("pool_size", 0) - raw.get("pool_available", 0),
+            "idle": raw.get("pool_available", 0),
+            "waiting": raw.get("requests_waiting", 0),
+            "created": raw.get("connections_num", 0),
+            "errors": raw.get("requests_errors", 0),
+        }
+    return stats
+
+
+def server_connections(using=DEFAULT_DB_ALIAS):
+    """Соединения сервера PostgreSQL с текущей БД по состояниям (active, idle, ...) из pg_stat_activity"""
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT coalesce(state, 'unknown'), count(*) FROM pg_stat_activity "
+            "WHERE datname = current_database() GROUP BY 1"
+        )
+        return dict(cursor.fetchall())
+
+
+class ReplicaRouter:
+    """
+    Чтение моделей из REPLICA_READ_MODELS - с реплик, все записи - в primary (default).
+
+    После записи чтение закрепляется за primary до конца запроса, а core.middleware.ReplicaStickinessMiddleware
+    продлевает закрепление на REPLICA_STICKY_SECONDS для следующих запросов того же клиента (read-your-writes).
+    Опубликованные записи блога читаются с реплики явно через BlogPost.objects.published().
+    """
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        if model._meta.label_lower in settings.REPLICA_READ_MODELS:
+            return read_database()
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        _current_state().wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # primary и реплики содержат одни и те же данные
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Реплики получают схему через репликацию
+        return db not in settings.REPLICA_DATABASES
@@ -0,0 +1,53 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.utils.http import quote_etag
+
+
+class ConditionalGetMixin:
+    """
+    Условные GET-запросы для детальных страниц: ETag и Last-Modified вычисляются
+    из одного узкого values()-запроса, и при совпадении If-None-Match/If-Modified-Since
+    ответ 304 отдается без загрузки объекта и рендеринга шаблона.
+    """
+
+    def get_validators(self):
+        """
+        Возвращает (части ETag, дата изменения) текущей версии объекта или None, если объекта нет.
+        По умолчанию валидаторов нет - запрос обрабатывается без условного GET
+        """
+        return None
+
+    def not_modified(self, request):
+        """Вызывается перед ответом 304"""
+
+    def _etag(self, request, parts):
+        # Страница отличается для авторизованных пользователей (кнопки управления), учитываем это в ETag
+        user = getattr(request, "user", None)
+        authenticated = user is not None and user.is_authenticated
+        raw = "|".join(map(str, [*parts, authenticated]))
+        return quote_etag(hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest())
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return super().dispatch(request, *args, **kwargs)
+
+        validators = self.get_validators()
+        if validators is None:
+            return super().dispatch(request, *args, **kwargs)
+
+        parts, last_modified = validators
+        etag = self._etag(request, parts)
+        last_modified = int(last_modified.timestamp())
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            if response.status_code == 304:
+                self.not_modified(request)
+            return response
+
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == 200:
+            response["ETag"] = etag
+            response["Last-Modified"] = http_date(last_modified)
+        return response
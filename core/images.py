@@ -0,0 +1,112 @@
+import logging
+import posixpath
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image
+from PIL import ImageOps
+from PIL import features
+
+logger = logging.getLogger(__name__)
+
+# Ширины производных изображений для srcset (пиксели)
+DERIVATIVE_WIDTHS = (320, 640, 1024)
+
+# Форматы производных в порядке предпочтения для <picture>; AVIF - только если Pillow собран с его поддержкой
+DERIVATIVE_FORMATS = tuple(fmt for fmt in ("avif", "webp") if features.check(fmt))
+
+SAVE_OPTIONS = {
+    "avif": {"quality": 60},
+    "webp": {"quality": 80, "method": 4},
+}
+
+
+def derivative_widths(width):
+    """Ширины производных для исходной ширины: без увеличения, исходник меньше максимума входит как есть"""
+    widths = [w for w in DERIVATIVE_WIDTHS if w < width]
+    if width <= DERIVATIVE_WIDTHS[-1]:
+        widths.append(width)
+    return widths
+
+
+def derivative_name(name, width, fmt):
+    """
+    products/photo.jpg -> products/derivatives/photo.jpg-640w.webp. Имя исходника берется целиком,
+    с расширением: у photo.jpg и photo.png из одной папки разные копии
+    """
+    directory, filename = posixpath.split(name)
+    return posixpath.join(directory, "derivatives", f"{filename}-{width}w.{fmt}")
+
+
+def derivative_names(name, width):
+    return [derivative_name(name, w, fmt) for w in derivative_widths(width) for fmt in DERIVATIVE_FORMATS]
+
+
+def generate_derivatives(name, storage=None, overwrite=False):
+    """
+    Создает уменьшенные копии изображения во всех форматах DERIVATIVE_FORMATS.
+    Не обращается к БД, поэтому может выполняться в отдельном процессе.
+    Возвращает (ширина, высота) исходного файла - те же значения, что Django пишет в width_field/height_field.
+    """
+    storage = storage or default_storage
+    with storage.open(name, "rb") as source:
+        original = Image.open(source)
+        stored_size = original.size
+        image = ImageOps.exif_transpose(original)
+        image.load()
+    width, height = image.size
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info or image.mode in ("LA", "PA") else "RGB")
+
+    # Набор ширин определяется размером файла, чтобы совпадать с тем, что шаблон вычисляет по width_field
+    for target_width in derivative_widths(stored_size[0]):
+        target_height = max(1, round(height * target_width / width))
+        resized = image if target_width == width else image.resize((target_width, target_height), Image.LANCZOS)
+        for fmt in DERIVATIVE_FORMATS:
+            target = derivative_name(name, target_width, fmt)
+            if not overwrite and storage.exists(target):
+                continue
+            buffer = BytesIO()
+            resized.save(buffer, format=fmt.upper(), **SAVE_OPTIONS[fmt])
+            if storage.exists(target):
+                storage.delete(target)
+            storage.save(target, ContentFile(buffer.getvalue()))
+    return stored_size
+
+
+def delete_derivatives(name, width, storage=None):
+    storage = storage or default_storage
+    for target in derivative_names(name, width):
+        if storage.exists(target):
+            storage.delete(target)
+
+
+def reset_dimensions(instance, image_field, width_field, height_field):
+    """
+    Сбрасывает сохраненные размеры, если изображение заменено или удалено (вызывается из pre_save).
+    Новый, еще не записанный в хранилище файл имеет _committed = False.
+    """
+    field_file = getattr(instance, image_field)
+    if not field_file or not field_file._committed:
+        setattr(instance, width_field, None)
+        setattr(instance, height_field, None)
+
+
+def ensure_derivatives(instance, image_field, width_field, height_field):
+    """
+    Создает производные для нового изображения и сохраняет его размеры (вызывается из post_save).
+    Для изображений, у которых размеры уже известны, ничего не делает.
+    """
+    field_file = getattr(instance, image_field)
+    if not field_file or getattr(instance, width_field):
+        return
+    try:
+        width, height = generate_derivatives(field_file.name, storage=field_file.storage)
+    except (OSError, ValueError):
+        logger.exception("Не удалось создать уменьшенные копии %s", field_file.name)
+        return
+    # update() вместо save(), чтобы не вызывать сигналы повторно
+    type(instance)._default_manager.filter(pk=instance.pk).update(**{width_field: width, height_field: height})
+    setattr(instance, width_field, width)
+    setattr(instance, height_field, height)
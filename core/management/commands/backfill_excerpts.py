@@ -0,0 +1,75 @@
+import time
+from typing import Any
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db import transaction
+
+from blog.models import BlogPost
+from catalog.models import Product
+from core.cache import bump_versions
+from core.sitemaps import mark_changed
+from core.text import make_excerpt
+
+# Модель, исходный текст, поле анонса, версия кеша страниц со списком
+TARGETS = {
+    "products": (Product, "description", "summary", "catalog:products"),
+    "posts": (BlogPost, "content", "excerpt", "blog:posts"),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполняет анонсы карточек (Product.summary, BlogPost.excerpt) для строк, сохраненных в обход save(): "
+        "после миграции, loaddata, queryset.update(). Обновляются только расхождения, пачками по pk"
+    )
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument("--batch-size", type=int, default=2_000, help="Строк в пачке")
+        parser.add_argument(
+            "--only", choices=tuple(TARGETS), action="append", default=None, help="Только products или posts"
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size должен быть положительным")
+        changed_versions = []
+        for name in options["only"] or TARGETS:
+            model, source, target, version = TARGETS[name]
+            started = time.perf_counter()
+            scanned, updated = self._backfill(model, source, target, options["batch_size"])
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"✅ {model._meta.verbose_name_plural}: обновлено {updated} из {scanned} ({elapsed:.1f} с)"
+                )
+            )
+            if updated:
+                changed_versions.append(version)
+                if name == "posts":
+                    # анонс - описание записи в RSS/Atom
+                    mark_changed("posts")
+        if changed_versions:
+            bump_versions(*changed_versions)
+
+    @staticmethod
+    def _backfill(model: Any, source: str, target: str, batch_size: int) -> tuple[int, int]:
+        """Keyset-проход по pk: в памяти только одна пачка, bulk_update - только для изменившихся анонсов"""
+        scanned = updated = 0
+        last_pk = 0
+        while True:
+            batch = list(model.objects.filter(pk__gt=last_pk).order_by("pk").only("pk", source, target)[:batch_size])
+            if not batch:
+                return scanned, updated
+            last_pk = batch[-1].pk
+            scanned += len(batch)
+            stale = []
+            for obj in batch:
+                excerpt = make_excerpt(getattr(obj, source))
+                if getattr(obj, target) != excerpt:
+                    setattr(obj, target, excerpt)
+                    stale.append(obj)
+            if stale:
+                with transaction.atomic():
+                    model.objects.bulk_update(stale, [target])
+                updated += len(stale)
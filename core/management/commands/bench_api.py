@@ -0,0 +1,75 @@
+import json
+import statistics
+import time
+from typing import Any
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.urls import reverse
+
+from catalog.models import Product
+from core.api import RESOURCES
+from core.api import stream_json
+
+
+class Command(BaseCommand):
+    help = (
+        "Пропускная способность JSON API товаров, строк/с: загрузка полных строк и только полей ?fields= (.only), "
+        "сериализация словарей через DjangoJSONEncoder (как JsonResponse) и потоковым кодировщиком core.api"
+    )
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument("--rows", type=int, default=1_000, help="Строк в выборке (лимит страницы API - 1000)")
+        parser.add_argument("--fields", type=str, default="", help="Поля через запятую (по умолчанию - как в API)")
+        parser.add_argument("--repeat", type=int, default=10, help="Повторов замера")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["rows"] < 1 or options["repeat"] < 1:
+            raise CommandError("--rows и --repeat должны быть положительными")
+        spec = RESOURCES["products"]
+        names = spec.parse_fields(options["fields"])
+        full = Product.objects.select_related("category").order_by("pk")[: options["rows"]]
+        sparse = spec.select(names).order_by("pk")[: options["rows"]]
+        objects = list(sparse)
+        if not objects:
+            raise CommandError("Нет товаров, сначала выполните generate_test_data")
+
+        encode = spec.row_encoder(names)
+
+        def build_dicts() -> str:
+            # Словарь на строку и json.dumps, Decimal - строкой, URL - reverse() (как в product_browse)
+            rows = [{name: self._value(obj, name) for name in names} for obj in objects]
+            return json.dumps({"results": rows}, cls=DjangoJSONEncoder, ensure_ascii=False)
+
+        def stream() -> str:
+            return "".join(stream_json(objects, encode))
+
+        scenarios = {
+            "загрузка: полные строки": lambda: list(full.all()),
+            "загрузка: .only(fields)": lambda: list(sparse.all()),
+            "JSON: dict + DjangoJSONEncoder": build_dicts,
+            "JSON: core.api": stream,
+        }
+        self.stdout.write(f"Товаров: {len(objects)}, поля: {', '.join(names)}")
+        self.stdout.write(f"{'этап':<34} {'мс':>8} {'строк/с':>12}")
+        for label, scenario in scenarios.items():
+            timings = []
+            for _ in range(options["repeat"]):
+                started = time.perf_counter()
+                scenario()
+                timings.append(time.perf_counter() - started)
+            median = statistics.median(timings)
+            self.stdout.write(f"{label:<34} {median * 1000:>8.2f} {len(objects) / median:>12,.0f}")
+
+    @staticmethod
+    def _value(obj: Product, name: str) -> Any:
+        if name == "id":
+            return obj.pk
+        if name == "category":
+            return {"id": obj.category.pk, "name": obj.category.name} if obj.category else None
+        if name == "image":
+            return obj.image.url if obj.image else None
+        if name == "url":
+            return reverse("catalog:product_detail", kwargs={"pk": obj.pk})
+        return getattr(obj, name)
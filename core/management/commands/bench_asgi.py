@@ -0,0 +1,251 @@
+import asyncio
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from itertools import cycle
+from itertools import islice
+from typing import Any
+
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.core.wsgi import get_wsgi_application
+from django.test import override_settings
+from django.test.utils import setup_test_environment
+
+from core.management.commands.run_benchmarks import Command as RunBenchmarks
+
+# Режим -> значение ASYNC_VIEWS для дочернего процесса
+MODES = {"wsgi": "", "asgi": "*"}
+
+
+def wsgi_get(application: Any, url: str) -> int:
+    """GET через WSGI-приложение так, как его вызывает сервер; возвращает код ответа"""
+    path, _, query = url.partition("?")
+    environ = {
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": path,
+        "QUERY_STRING": query,
+        "SCRIPT_NAME": "",
+        "SERVER_NAME": "testserver",
+        "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "HTTP_HOST": "testserver",
+        "REMOTE_ADDR": "127.0.0.1",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": "http",
+        "wsgi.input": BytesIO(),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    status = []
+    response = application(environ, lambda line, headers, exc_info=None: status.append(line))
+    try:
+        for _ in response:
+            pass
+    finally:
+        response.close()
+    return int(status[0].split()[0])
+
+
+async def asgi_get(application: Any, url: str) -> int:
+    """GET через ASGI-приложение так, как его вызывает сервер; возвращает код ответа"""
+    path, _, query = url.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"testserver")],
+        "client": ("127.0.0.1", 0),
+        "server": ("testserver", 80),
+    }
+    body_sent = False
+    finished = asyncio.Event()
+    status = 0
+
+    async def receive() -> dict:
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # Клиент "не отключается", пока ответ не отдан целиком
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await application(scope, receive, send)
+    finished.set()
+    return status
+
+
+class ThreadSampler(threading.Thread):
+    """Фоновый замер максимального количества потоков процесса"""
+
+    def __init__(self) -> None:
+        super().__init__(daemon=True)
+        self.peak = threading.active_count()
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self.stopped.wait(0.005):
+            self.peak = max(self.peak, threading.active_count())
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает синхронные представления под WSGI (пул потоков) и async-представления под ASGI "
+        "(одна очередь событий) при одинаковой конкурентности: задержки, пропускная способность, потоки, память. "
+        "Каждый режим запускается в отдельном процессе"
+    )
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument("--requests", type=int, default=500, help="Запросов на режим")
+        parser.add_argument("--concurrency", type=int, default=50, help="Одновременных клиентов")
+        parser.add_argument(
+            "--scenarios", type=str, default="home,product_detail,post_list,post_detail", help="Сценарии через запятую"
+        )
+        parser.add_argument("--modes", type=str, default="wsgi,asgi", help="Режимы через запятую")
+        parser.add_argument("--output", type=str, default=None, help="Файл для JSON-результата (по умолчанию stdout)")
+        parser.add_argument("--worker", choices=tuple(MODES), default=None, help="Внутренний: выполнить один режим")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["requests"] < 1 or options["concurrency"] < 1:
+            raise CommandError("--requests и --concurrency должны быть положительными")
+        if options["worker"]:
+            self.stdout.write(json.dumps(self._work(options)))
+            return
+
+        modes = [mode.strip() for mode in options["modes"].split(",") if mode.strip()]
+        unknown = set(modes) - set(MODES)
+        if unknown:
+            raise CommandError(f"Неизвестные режимы: {', '.join(sorted(unknown))}")
+
+        results = {}
+        for mode in modes:
+            results[mode] = self._spawn(mode, options)
+            self.stderr.write(f"{mode}: {results[mode]}")
+
+        report = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": RunBenchmarks._git_commit(),
+            "requests": options["requests"],
+            "concurrency": options["concurrency"],
+            "scenarios": options["scenarios"],
+            "modes": results,
+        }
+        payload = json.dumps(report, ensure_ascii=False, indent=2)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as output:
+                output.write(payload + "\n")
+        else:
+            self.stdout.write(payload)
+
+    def _spawn(self, mode: str, options: dict) -> dict:
+        """Запускает режим в чистом процессе, чтобы память и потоки не смешивались между режимами"""
+        command = [
+            sys.executable,
+            str(settings.BASE_DIR / "manage.py"),
+            "bench_asgi",
+            "--worker",
+            mode,
+            "--requests",
+            str(options["requests"]),
+            "--concurrency",
+            str(options["concurrency"]),
+            "--scenarios",
+            options["scenarios"],
+        ]
+        env = {**os.environ, "ASYNC_VIEWS": MODES[mode]}
+        completed = subprocess.run(command, env=env, capture_output=True, text=True)
+        if completed.returncode != 0:
+            raise CommandError(f"{mode}: {completed.stderr.strip()}")
+        return json.loads(completed.stdout)
+
+    def _work(self, options: dict) -> dict:
+        # Разрешает хост testserver
+        setup_test_environment()
+        scenarios = RunBenchmarks._scenarios()
+        selected = [name.strip() for name in options["scenarios"].split(",") if name.strip()]
+        unknown = set(selected) - set(scenarios)
+        if unknown:
+            raise CommandError(f"Неизвестные сценарии: {', '.join(sorted(unknown))}")
+        urls = [url for name in selected for url in scenarios[name]]
+        if not urls:
+            raise CommandError("Нет данных для сценариев, сначала выполните generate_test_data")
+        urls = list(islice(cycle(urls), options["requests"]))
+
+        baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        sampler = ThreadSampler()
+        sampler.start()
+        # Кеш страниц отключен: сравниваются представления и ORM, а не попадания в кеш
+        with override_settings(PAGE_CACHE_TIMEOUT=0):
+            started = time.perf_counter()
+            if options["worker"] == "wsgi":
+                measured = self._run_wsgi(urls, options["concurrency"])
+            else:
+                measured = asyncio.run(self._run_asgi(urls, options["concurrency"]))
+            elapsed = time.perf_counter() - started
+        sampler.stopped.set()
+
+        errors = sum(1 for status, _ in measured if status != 200)
+        latencies = sorted(latency for _, latency in measured)
+        p95_index = max(0, min(len(latencies) - 1, round(len(latencies) * 0.95) - 1))
+        return {
+            "errors": errors,
+            "p50_ms": round(statistics.median(latencies), 3),
+            "p95_ms": round(latencies[p95_index], 3),
+            "throughput_rps": round(len(latencies) / elapsed, 1),
+            "peak_threads": sampler.peak,
+            # ru_maxrss в Linux - килобайты
+            "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            "rss_growth_mb": round((resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline_rss) / 1024, 1),
+        }
+
+    @staticmethod
+    def _run_wsgi(urls: list[str], concurrency: int) -> list[tuple[int, float]]:
+        application = get_wsgi_application()
+
+        def call(url: str) -> tuple[int, float]:
+            started = time.perf_counter()
+            status = wsgi_get(application, url)
+            return status, (time.perf_counter() - started) * 1000
+
+        wsgi_get(application, urls[0])
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            return list(pool.map(call, urls))
+
+    @staticmethod
+    async def _run_asgi(urls: list[str], concurrency: int) -> list[tuple[int, float]]:
+        application = get_asgi_application()
+        pending = iter(urls)
+        measured = []
+
+        async def client() -> None:
+            for url in pending:
+                started = time.perf_counter()
+                status = await asgi_get(application, url)
+                measured.append((status, (time.perf_counter() - started) * 1000))
+
+        await asgi_get(application, urls[0])
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        return measured
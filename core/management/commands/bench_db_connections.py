@@ -0,0 +1,177 @@
+import asyncio
+import importlib.util
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db.backends.signals import connection_created
+from django.test import override_settings
+from django.test.utils import setup_test_environment
+
+from catalog.models import Product
+from core.db import pool_stats
+from core.db import server_connections
+from core.management.commands.bench_asgi import asgi_get
+from core.management.commands.bench_asgi import wsgi_get
+from core.management.commands.run_benchmarks import Command as RunBenchmarks
+
+# Режим -> переменные окружения дочернего процесса
+MODES = {
+    "fresh": {"DB_POOL": "", "CONN_MAX_AGE": "0"},
+    "persistent": {"DB_POOL": "", "CONN_MAX_AGE": "60"},
+    "pool": {"DB_POOL": "True"},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает пропускную способность /product/<pk>/ с новым соединением на каждый запрос (CONN_MAX_AGE=0), "
+        "с постоянными соединениями (CONN_MAX_AGE) и с пулом соединений psycopg (DB_POOL). "
+        "Каждый режим запускается в отдельном процессе"
+    )
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument("--requests", type=int, default=1000, help="Запросов на режим")
+        parser.add_argument("--concurrency", type=int, default=20, help="Одновременных клиентов")
+        parser.add_argument("--modes", type=str, default="fresh,persistent,pool", help="Режимы через запятую")
+        parser.add_argument("--server", choices=("wsgi", "asgi"), default="wsgi", help="Интерфейс сервера")
+        parser.add_argument("--pool-max-size", type=int, default=None, help="DB_POOL_MAX_SIZE для режима pool")
+        parser.add_argument("--output", type=str, default=None, help="Файл для JSON-результата (по умолчанию stdout)")
+        parser.add_argument("--worker", choices=tuple(MODES), default=None, help="Внутренний: выполнить один режим")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["requests"] < 1 or options["concurrency"] < 1:
+            raise CommandError("--requests и --concurrency должны быть положительными")
+        if options["worker"]:
+            self.stdout.write(json.dumps(self._work(options)))
+            return
+
+        modes = [mode.strip() for mode in options["modes"].split(",") if mode.strip()]
+        unknown = set(modes) - set(MODES)
+        if unknown:
+            raise CommandError(f"Неизвестные режимы: {', '.join(sorted(unknown))}")
+        if "pool" in modes and importlib.util.find_spec("psycopg_pool") is None:
+            self.stderr.write('pool: пропущен, не установлен psycopg_pool (pip install "psycopg[binary,pool]")')
+            modes.remove("pool")
+
+        results = {}
+        for mode in modes:
+            results[mode] = self._spawn(mode, options)
+            self.stderr.write(f"{mode}: {results[mode]}")
+
+        report = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": RunBenchmarks._git_commit(),
+            "server": options["server"],
+            "requests": options["requests"],
+            "concurrency": options["concurrency"],
+            "modes": results,
+        }
+        payload = json.dumps(report, ensure_ascii=False, indent=2)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as output:
+                output.write(payload + "\n")
+        else:
+            self.stdout.write(payload)
+
+    def _spawn(self, mode: str, options: dict) -> dict:
+        """Настройки соединений читаются при запуске, поэтому каждый режим - отдельный процесс"""
+        command = [
+            sys.executable,
+            str(settings.BASE_DIR / "manage.py"),
+            "bench_db_connections",
+            "--worker",
+            mode,
+            "--server",
+            options["server"],
+            "--requests",
+            str(options["requests"]),
+            "--concurrency",
+            str(options["concurrency"]),
+        ]
+        env = {**os.environ, **MODES[mode], "ASYNC_VIEWS": "*" if options["server"] == "asgi" else ""}
+        if options["pool_max_size"]:
+            env["DB_POOL_MAX_SIZE"] = str(options["pool_max_size"])
+        completed = subprocess.run(command, env=env, capture_output=True, text=True)
+        if completed.returncode != 0:
+            raise CommandError(f"{mode}: {completed.stderr.strip()}")
+        return json.loads(completed.stdout)
+
+    def _work(self, options: dict) -> dict:
+        # Разрешает хост testserver
+        setup_test_environment()
+        pks = list(Product.objects.order_by("?").values_list("pk", flat=True)[:200])
+        if not pks:
+            raise CommandError("Нет товаров, сначала выполните generate_test_data")
+        urls = [f"/product/{pks[index % len(pks)]}/" for index in range(options["requests"])]
+
+        opened = []
+        lock = threading.Lock()
+
+        def count_connection(sender: Any, connection: Any, **kwargs: Any) -> None:
+            with lock:
+                opened.append(connection.alias)
+
+        connection_created.connect(count_connection)
+        # Кеш страниц отключен: каждый запрос обращается к БД
+        with override_settings(PAGE_CACHE_TIMEOUT=0):
+            started = time.perf_counter()
+            if options["server"] == "wsgi":
+                measured = self._run_wsgi(urls, options["concurrency"])
+            else:
+                measured = asyncio.run(self._run_asgi(urls, options["concurrency"]))
+            elapsed = time.perf_counter() - started
+        connection_created.disconnect(count_connection)
+
+        errors = sum(1 for status, _ in measured if status != 200)
+        latencies = sorted(latency for _, latency in measured)
+        p95_index = max(0, min(len(latencies) - 1, round(len(latencies) * 0.95) - 1))
+        pools = pool_stats()
+        return {
+            "errors": errors,
+            "p50_ms": round(statistics.median(latencies), 3),
+            "p95_ms": round(latencies[p95_index], 3),
+            "throughput_rps": round(len(latencies) / elapsed, 1),
+            # С пулом connection_created срабатывает на каждую выдачу соединения, поэтому берется счетчик пула
+            "connections_opened": sum(stats["created"] for stats in pools.values()) if pools else len(opened),
+            "pool": pools,
+            "server_connections": server_connections(),
+        }
+
+    @staticmethod
+    def _run_wsgi(urls: list[str], concurrency: int) -> list[tuple[int, float]]:
+        application = get_wsgi_application()
+
+        def call(url: str) -> tuple[int, float]:
+            started = time.perf_counter()
+            status = wsgi_get(application, url)
+            return status, (time.perf_counter() - started) * 1000
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            return list(pool.map(call, urls))
+
+    @staticmethod
+    async def _run_asgi(urls: list[str], concurrency: int) -> list[tuple[int, float]]:
+        application = get_asgi_application()
+        pending = iter(urls)
+        measured = []
+
+        async def client() -> None:
+            for url in pending:
+                started = time.perf_counter()
+                status = await asgi_get(application, url)
+                measured.append((status, (time.perf_counter() - started) * 1000))
+
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        return measured
@@ -0,0 +1,74 @@
+import statistics
+import time
+import tracemalloc
+from typing import Any
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db import connections
+from django.db.models import QuerySet
+
+from blog.models import BlogPost
+from catalog.filters import ProductFilters
+from catalog.models import Product
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает запросы списков с полными строками и с for_listing() (без описания и поискового вектора): "
+        "байты строк в текстовом представлении PostgreSQL, пиковая память Python на загрузку объектов и время"
+    )
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument("--rows", type=str, default="12,1000", help="Размеры выборок через запятую")
+        parser.add_argument("--repeat", type=int, default=10, help="Повторов замера времени")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        try:
+            sizes = [int(size) for size in options["rows"].split(",") if size.strip()]
+        except ValueError:
+            raise CommandError("--rows - целые числа через запятую")
+        if not sizes or min(sizes) < 1 or options["repeat"] < 1:
+            raise CommandError("--rows и --repeat должны быть положительными")
+        if not Product.objects.exists():
+            raise CommandError("Нет товаров, сначала выполните generate_test_data")
+
+        ordering = ProductFilters().ordering
+        scenarios = {
+            "товары": (Product.objects.order_by(*ordering), Product.objects.for_listing().order_by(*ordering)),
+            "записи блога": (BlogPost.objects.published(), BlogPost.objects.published().for_listing()),
+        }
+        self.stdout.write(f"{'список':<14} {'строк':>6} {'вариант':<12} {'КБ из БД':>10} {'КБ Python':>10} {'мс':>8}")
+        for name, (full, listing) in scenarios.items():
+            for size in sizes:
+                results = {}
+                for variant, queryset in (("полные", full), ("for_listing", listing)):
+                    results[variant] = self._measure(queryset[:size], options["repeat"])
+                    db_kb, python_kb, ms = results[variant]
+                    self.stdout.write(
+                        f"{name:<14} {size:>6} {variant:<12} {db_kb:>10.1f} {python_kb:>10.1f} {ms:>8.2f}"
+                    )
+                saved = 1 - results["for_listing"][0] / results["полные"][0] if results["полные"][0] else 0
+                self.stdout.write(f"{'':<14} {'':>6} {'экономия':<12} {saved:>10.0%}")
+
+    @staticmethod
+    def _measure(queryset: QuerySet, repeat: int) -> tuple[float, float, float]:
+        """(КБ строк в текстовом виде, пик памяти Python на список объектов, КБ; медиана времени, мс)"""
+        sql, params = queryset.query.sql_with_params()
+        with connections[queryset.db].cursor() as cursor:
+            # Размер строк в текстовом протоколе - то, что передается клиенту и разбирается драйвером
+            cursor.execute(f"SELECT coalesce(sum(octet_length(t::text)), 0) FROM ({sql}) t", params)
+            (payload,) = cursor.fetchone()
+
+        tracemalloc.start()
+        objects = list(queryset.all())
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del objects
+
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            list(queryset.all())
+            timings.append((time.perf_counter() - started) * 1000)
+        return payload / 1024, peak / 1024, statistics.median(timings)
@@ -0,0 +1,47 @@
+import statistics
+import time
+from typing import Any
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from catalog.models import Product
+from core.search import search_products
+
+
+class Command(BaseCommand):
+    help = "Сравнивает поиск товаров через ILIKE '%term%' (как search_fields админки) и через GIN-индекс tsvector"
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument(
+            "terms", nargs="*", default=["телевизор", "смартфон pro", "wireless", "камера 4k"], help="Поисковые фразы"
+        )
+        parser.add_argument("--limit", type=int, default=20, help="Сколько результатов выбирать")
+        parser.add_argument("--repeat", type=int, default=5, help="Повторов замера каждой фразы")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        limit = options["limit"]
+        self.stdout.write(f"Товаров в таблице: {Product.objects.count()}")
+        self.stdout.write(f"{'фраза':>20} {'ILIKE, мс':>12} {'найдено':>9} {'FTS, мс':>10} {'найдено':>9}")
+
+        for term in options["terms"]:
+            ilike = Product.objects.all()
+            for word in term.split():
+                ilike = ilike.filter(Q(name__icontains=word) | Q(description__icontains=word))
+            fts = search_products(term)
+
+            ilike_ms = self._measure(lambda: list(ilike[:limit]), options["repeat"])
+            fts_ms = self._measure(lambda: list(fts[:limit]), options["repeat"])
+            self.stdout.write(
+                f"{term:>20} {ilike_ms:>12.2f} {ilike.count():>9} {fts_ms:>10.2f} {fts.count():>9}"
+            )
+
+    @staticmethod
+    def _measure(fetch: Any, repeat: int) -> float:
+        """Медиана времени выполнения fetch() в миллисекундах"""
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fetch()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
@@ -0,0 +1,151 @@
+import statistics
+import time
+from itertools import cycle
+from itertools import islice
+from typing import Any
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.template.backends.django import DjangoTemplates
+from django.test import RequestFactory
+from django.test import override_settings
+from django.urls import reverse
+
+from blog.models import BlogPost
+from blog.services import get_blog_stats
+from catalog.filters import SORT_LABELS
+from catalog.filters import ProductFilters
+from catalog.models import Product
+from core.rendering import attach_urls
+from core.rendering import url_formatter
+
+# Фрагменты карточек не кешируются: замеряется рендеринг, а не попадания в кеш
+NO_FRAGMENT_CACHE = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+
+
+class Command(BaseCommand):
+    help = (
+        "Микробенчмарк рендеринга шаблонов: стоимость одной карточки home.html и blog/post_list.html "
+        "для списков из 100/1000 элементов (фрагменты не из кеша и из кеша), рендеринг главной "
+        "с кеширующим загрузчиком шаблонов и без него, {% url %} против заранее собранных URL"
+    )
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument("--sizes", type=str, default="100,1000", help="Размеры списков через запятую")
+        parser.add_argument("--repeat", type=int, default=10, help="Повторов каждого замера")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        try:
+            sizes = [int(size) for size in options["sizes"].split(",") if size.strip()]
+        except ValueError:
+            raise CommandError("--sizes - целые числа через запятую")
+        if not sizes or min(sizes) < 1 or options["repeat"] < 1:
+            raise CommandError("--sizes и --repeat должны быть положительными")
+        products = list(Product.objects.order_by(*ProductFilters().ordering)[: max(sizes)])
+        posts = list(BlogPost.objects.published()[: max(sizes)])
+        if not products or not posts:
+            raise CommandError("Нет данных, сначала выполните generate_test_data")
+
+        request = RequestFactory().get("/")
+        request.user = AnonymousUser()
+        backend = self._backend(cached=True)
+        repeat = options["repeat"]
+
+        self.stdout.write(
+            f"{'шаблон':<22} {'карточек':>9} {'мс на страницу':>15} {'мкс/карточка':>13} {'мкс/карточка (кеш)':>19}"
+        )
+        pages = {
+            "home.html": (products, "catalog:product_detail", "pk", self._home_context),
+            "blog/post_list.html": (posts, "blog:post_detail", "slug", self._post_list_context),
+        }
+        for name, (objects, viewname, kwarg, make_context) in pages.items():
+            template = backend.get_template(name)
+            for size in sizes:
+                # Если объектов меньше размера списка, они повторяются
+                items = attach_urls(list(islice(cycle(objects), size)), viewname, kwarg, field=kwarg)
+
+                def render(items: list) -> None:
+                    template.render(make_context(items), request)
+
+                with override_settings(CACHES=NO_FRAGMENT_CACHE):
+                    empty = self._measure(lambda: render([]), repeat)
+                    full = self._measure(lambda: render(items), repeat)
+                # Второй замер - с фрагментами карточек из кеша
+                render(items)
+                cached_empty = self._measure(lambda: render([]), repeat)
+                cached_full = self._measure(lambda: render(items), repeat)
+                per_card = (full - empty) / size * 1000
+                per_cached_card = (cached_full - cached_empty) / size * 1000
+                self.stdout.write(f"{name:<22} {size:>9} {full:>15.2f} {per_card:>13.1f} {per_cached_card:>19.1f}")
+
+        self._compare_loaders(products, request, repeat)
+        self._compare_urls(products, repeat)
+
+    @staticmethod
+    def _backend(cached: bool) -> DjangoTemplates:
+        """Движок с настройками проекта и явно выбранными загрузчиками (с кешем или без)"""
+        params = dict(settings.TEMPLATES[0])
+        params.pop("BACKEND")
+        options = dict(params.pop("OPTIONS", {}))
+        options["loaders"] = (
+            [("django.template.loaders.cached.Loader", settings.TEMPLATE_LOADERS)]
+            if cached
+            else settings.TEMPLATE_LOADERS
+        )
+        return DjangoTemplates({**params, "NAME": f"bench-{cached}", "APP_DIRS": False, "OPTIONS": options})
+
+    @staticmethod
+    def _measure(func: Any, repeat: int) -> float:
+        """Медиана времени вызова, мс"""
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
+
+    @staticmethod
+    def _home_context(products: list) -> dict:
+        return {
+            "title": "Skystore - Главная",
+            "products": products,
+            "is_paginated": False,
+            "filters": ProductFilters(),
+            "facets": {"total": len(products), "categories": [], "price": []},
+            "sort_labels": SORT_LABELS,
+        }
+
+    @staticmethod
+    def _post_list_context(posts: list) -> dict:
+        return {"title": "Наш блог", "posts": posts, "is_paginated": False, "blog_stats": get_blog_stats()}
+
+    def _compare_loaders(self, products: list, request: Any, repeat: int) -> None:
+        """Страница из 12 карточек: каждый рендеринг с разбором шаблонов против скомпилированных в кеше загрузчика"""
+        items = attach_urls(products[:12], "catalog:product_detail", "pk")
+        context = self._home_context(items)
+        timings = {}
+        for cached in (False, True):
+            backend = self._backend(cached)
+            backend.get_template("home.html").render(context, request)
+            timings[cached] = self._measure(lambda: backend.get_template("home.html").render(context, request), repeat)
+        self.stdout.write(
+            f"\nГлавная, 12 карточек: без кеша шаблонов {timings[False]:.2f} мс, "
+            f"с кешем шаблонов {timings[True]:.2f} мс"
+        )
+
+    def _compare_urls(self, products: list, repeat: int) -> None:
+        """reverse() на каждый элемент против одного reverse() и подстановки"""
+        pks = [product.pk for product in products]
+        per_item = self._measure(lambda: [reverse("catalog:product_detail", kwargs={"pk": pk}) for pk in pks], repeat)
+
+        def formatted() -> list:
+            url = url_formatter("catalog:product_detail", "pk")
+            return [url(pk) for pk in pks]
+
+        precomputed = self._measure(formatted, repeat)
+        self.stdout.write(
+            f"URL товара: reverse() {per_item / len(pks) * 1000:.2f} мкс, "
+            f"заранее собранный {precomputed / len(pks) * 1000:.2f} мкс на элемент"
+        )
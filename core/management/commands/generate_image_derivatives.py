@@ -0,0 +1,104 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Any
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+
+from blog.models import BlogPost
+from catalog.models import Product
+from core.cache import bump_versions
+from core.images import generate_derivatives
+
+# (модель, поле изображения, поле ширины, поле высоты, поле времени изменения - метка фрагментного кеша)
+TARGETS = (
+    (Product, "image", "image_width", "image_height", "updated_at"),
+    (BlogPost, "preview_image", "preview_width", "preview_height", "last_modified"),
+)
+
+
+def cache_names(model, pks: list[int]) -> list[str]:
+    """Версии кеша страниц, в разметке которых есть размеры изображений этих объектов"""
+    if model is Product:
+        return ["catalog:products", *(f"catalog.product:{pk}" for pk in pks)]
+    slugs = BlogPost.objects.filter(pk__in=pks).values_list("slug", flat=True)
+    return ["blog:posts", *(f"blog.blogpost:{pk}" for pk in pks), *(f"blog.post:{slug}" for slug in slugs)]
+
+
+def process_image(name: str, overwrite: bool) -> tuple[str, tuple[int, int] | None, str | None]:
+    """Выполняется в дочернем процессе: только работа с файлами, без БД"""
+    try:
+        return name, generate_derivatives(name, overwrite=overwrite), None
+    except Exception as e:  # поврежденный или отсутствующий файл не должен останавливать весь прогон
+        return name, None, str(e)
+
+
+class Command(BaseCommand):
+    help = "Создает AVIF/WebP-копии для уже загруженных изображений товаров и превью блога в несколько процессов"
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Количество процессов")
+        parser.add_argument("--batch-size", type=int, default=200, help="Изображений в одной пачке")
+        parser.add_argument(
+            "--overwrite",
+            action="store_true",
+            help="Пересоздать копии всех изображений (без флага - только изображений без сохраненных размеров)",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        # Дочерние процессы не должны наследовать открытые соединения с БД
+        connections.close_all()
+        started = time.perf_counter()
+        done = updated = failed = 0
+
+        with ProcessPoolExecutor(max_workers=options["workers"], initializer=django.setup) as pool:
+            for model, image_field, width_field, height_field, stamp_field in TARGETS:
+                queryset = model.objects.exclude(**{image_field: ""}).exclude(**{f"{image_field}__isnull": True})
+                if not options["overwrite"]:
+                    # Размеры сохраняются после создания копий: повторный запуск не трогает обработанные
+                    queryset = queryset.filter(**{f"{width_field}__isnull": True})
+                rows = queryset.values_list("pk", image_field, width_field, height_field).iterator(
+                    chunk_size=options["batch_size"]
+                )
+                while batch := list(islice(rows, options["batch_size"])):
+                    # Один файл может быть у нескольких объектов (например, после копирования товара)
+                    names = {}
+                    for pk, name, width, height in batch:
+                        names.setdefault(name, []).append((pk, (width, height)))
+                    results = pool.map(process_image, names, [options["overwrite"]] * len(names))
+
+                    updates = []
+                    # bulk_update не обновляет auto_now: время изменения меняет ключи фрагментного кеша.
+                    # Объекты с прежними размерами не меняются - их разметка, ETag и lastmod остаются прежними
+                    now = timezone.now()
+                    for name, size, error in results:
+                        if error:
+                            failed += 1
+                            self.stderr.write(f"{name}: {error}")
+                            continue
+                        done += 1
+                        for pk, stored_size in names[name]:
+                            if stored_size == size:
+                                continue
+                            obj = model(pk=pk)
+                            setattr(obj, width_field, size[0])
+                            setattr(obj, height_field, size[1])
+                            setattr(obj, stamp_field, now)
+                            updates.append(obj)
+                    model.objects.bulk_update(updates, [width_field, height_field, stamp_field])
+                    if updates:
+                        bump_versions(*cache_names(model, [obj.pk for obj in updates]))
+                    updated += len(updates)
+                    self.stdout.write(f"{model._meta.verbose_name_plural}: обработано {done}")
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write("\n" + "=" * 50)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"ИТОГО: {done} изображений, обновлено размеров {updated}, ошибок {failed}, за {elapsed:.1f} с"
+            )
+        )
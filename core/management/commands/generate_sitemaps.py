@@ -0,0 +1,51 @@
+import time
+from pathlib import Path
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.sitemaps import FEED_TYPES
+from core.sitemaps import SECTIONS
+from core.sitemaps import ensure_feed
+from core.sitemaps import ensure_index
+from core.sitemaps import ensure_section_page
+from core.sitemaps import mark_changed
+from core.sitemaps import section_pages
+
+
+class Command(BaseCommand):
+    help = (
+        "Пререндерит sitemap (индекс и файлы разделов по 50 000 URL) и ленты блога RSS/Atom в SITEMAP_ROOT. "
+        "Перестраиваются только файлы, объекты которых изменились; файлы опустевших диапазонов удаляются"
+    )
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument("--force", action="store_true", help="Перестроить все файлы")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["force"]:
+            for section in SECTIONS:
+                mark_changed(section)
+
+        root = Path(settings.SITEMAP_ROOT)
+        expected = {"sitemap.xml"}
+        for section in SECTIONS:
+            for page, _ in section_pages(section):
+                name = self._timed(f"{section} #{page}", ensure_section_page, section, page)
+                expected.add(name)
+        self._timed("индекс", ensure_index)
+        for kind in FEED_TYPES:
+            self._timed(f"лента {kind}", ensure_feed, kind)
+
+        for path in root.glob("sitemap-*.xml"):
+            if path.name not in expected:
+                path.unlink()
+                self.stdout.write(f"Удален {path.name}")
+
+    def _timed(self, label: str, ensure: Any, *args: Any) -> str:
+        started = time.perf_counter()
+        path = ensure(*args)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"{label:<16} {path.name:<32} {path.stat().st_size / 1024:>8.1f} КБ {elapsed:>7.2f} с")
+        return path.name
@@ -0,0 +1,135 @@
+import json
+import platform
+import statistics
+import subprocess
+import time
+from itertools import cycle
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import Client
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+
+from blog.models import BlogPost
+from catalog.models import Product
+
+
+def summarize(latencies: list[float], queries: list[int], elapsed: float) -> dict[str, float]:
+    """Сводка сценария: перцентили задержки (мс), запросы к БД на запрос и пропускная способность"""
+    ordered = sorted(latencies)
+    p95_index = max(0, min(len(ordered) - 1, round(len(ordered) * 0.95) - 1))
+    return {
+        "requests": len(latencies),
+        "p50_ms": round(statistics.median(ordered), 3),
+        "p95_ms": round(ordered[p95_index], 3),
+        "queries_per_request": round(statistics.mean(queries), 2),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет p50/p95, запросы к БД и пропускную способность горячих страниц каталога и блога "
+        "через тестовый клиент Django и выводит результат в JSON"
+    )
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument("--iterations", type=int, default=200, help="Запросов на сценарий")
+        parser.add_argument("--warmup", type=int, default=10, help="Прогревочных запросов на сценарий")
+        parser.add_argument(
+            "--scenarios", type=str, default="home,product_detail,post_list,post_detail", help="Сценарии через запятую"
+        )
+        parser.add_argument("--page-cache", action="store_true", help="Не отключать кеш страниц")
+        parser.add_argument("--output", type=str, default=None, help="Файл для JSON-результата (по умолчанию stdout)")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["iterations"] < 1:
+            raise CommandError("--iterations должен быть положительным")
+
+        scenarios = self._scenarios()
+        selected = [name.strip() for name in options["scenarios"].split(",") if name.strip()]
+        unknown = set(selected) - set(scenarios)
+        if unknown:
+            raise CommandError(f"Неизвестные сценарии: {', '.join(sorted(unknown))}")
+
+        # Разрешает хост testserver тестового клиента
+        setup_test_environment()
+        page_cache_timeout = settings.PAGE_CACHE_TIMEOUT if options["page_cache"] else 0
+
+        results = {}
+        with override_settings(PAGE_CACHE_TIMEOUT=page_cache_timeout):
+            for name in selected:
+                urls = scenarios[name]
+                if not urls:
+                    self.stderr.write(self.style.WARNING(f"{name}: нет данных, сценарий пропущен"))
+                    continue
+                results[name] = self._run(urls, options["iterations"], options["warmup"])
+                self.stderr.write(f"{name}: {results[name]}")
+
+        report = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": self._git_commit(),
+            "python": platform.python_version(),
+            "database": connection.vendor,
+            "page_cache": options["page_cache"],
+            "iterations": options["iterations"],
+            "scenarios": results,
+        }
+        payload = json.dumps(report, ensure_ascii=False, indent=2)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as output:
+                output.write(payload + "\n")
+        else:
+            self.stdout.write(payload)
+
+    @staticmethod
+    def _scenarios() -> dict[str, list[str]]:
+        """URL каждого сценария; детальные страницы перебирают несколько объектов"""
+        product_ids = Product.objects.order_by("pk").values_list("pk", flat=True)[:100]
+        slugs = BlogPost.objects.filter(is_published=True).order_by("pk").values_list("slug", flat=True)[:100]
+        return {
+            "home": [reverse("catalog:home")],
+            "product_detail": [reverse("catalog:product_detail", kwargs={"pk": pk}) for pk in product_ids],
+            "post_list": [reverse("blog:post_list")],
+            "post_detail": [reverse("blog:post_detail", kwargs={"slug": slug}) for slug in slugs],
+        }
+
+    @staticmethod
+    def _run(urls: list[str], iterations: int, warmup: int) -> dict[str, float]:
+        client = Client()
+        pool = cycle(urls)
+        for _ in range(warmup):
+            client.get(next(pool))
+
+        latencies, queries = [], []
+        started = time.perf_counter()
+        for _ in range(iterations):
+            url = next(pool)
+            with CaptureQueriesContext(connection) as captured:
+                request_started = time.perf_counter()
+                response = client.get(url)
+                latencies.append((time.perf_counter() - request_started) * 1000)
+            if response.status_code != 200:
+                raise CommandError(f"{url} вернул {response.status_code}")
+            queries.append(len(captured))
+        return summarize(latencies, queries, time.perf_counter() - started)
+
+    @staticmethod
+    def _git_commit() -> str | None:
+        try:
+            completed = subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"],
+                cwd=settings.BASE_DIR,
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+        except (OSError, subprocess.CalledProcessError):
+            return None
+        return completed.stdout.strip()
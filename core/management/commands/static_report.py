@@ -0,0 +1,115 @@
+import re
+from pathlib import Path
+from typing import Any
+
+from django.conf import settings
+from django.contrib.staticfiles.finders import FileSystemFinder
+from django.contrib.staticfiles.finders import get_finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.template import engines
+
+from core.rendering import project_templates
+from core.staticfiles import compress
+
+STATIC_TAG_RE = re.compile(r"""{%\s*static\s+['"]([^'"]+)['"]""")
+
+
+class Command(BaseCommand):
+    help = (
+        "Размеры собранной статики (collectstatic) без сжатия, gzip и brotli, объем CSS/JS, который загружают "
+        "страницы проекта, и файлы проекта, на которые не ссылаются ни шаблоны, ни другие используемые файлы"
+    )
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument("--all", action="store_true", help="Включая статику сторонних приложений (admin)")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        manifest = getattr(staticfiles_storage, "hashed_files", None)
+        if not manifest:
+            raise CommandError("Манифест статики не найден, сначала выполните collectstatic")
+
+        project_files = self._project_static_files()
+        names = set(manifest) if options["all"] else project_files & set(manifest)
+        referenced = self._referenced(manifest)
+        root = Path(settings.STATIC_ROOT)
+
+        self.stdout.write(f"{'файл':<48} {'КБ':>8} {'gzip КБ':>8} {'br КБ':>8}  использование")
+        page_totals = [0, 0, 0]
+        for name in sorted(names):
+            hashed = root / manifest[name]
+            sizes = self._sizes(hashed)
+            if name not in project_files:
+                # шаблоны сторонних приложений не анализируются
+                usage = "приложения"
+            elif name not in referenced:
+                usage = "не используется"
+            elif name.endswith(".map"):
+                usage = "sourcemap (только devtools)"
+            else:
+                usage = "страницы"
+                # без сжатой копии файл уходит как есть
+                page_totals = [total + (size or sizes[0]) for total, size in zip(page_totals, sizes)]
+            raw, gz, br = (f"{size / 1024:.1f}" if size is not None else "-" for size in sizes)
+            self.stdout.write(f"{name:<48} {raw:>8} {gz:>8} {br:>8}  {usage}")
+
+        raw, gz, br = (total / 1024 for total in page_totals)
+        self.stdout.write(f"\nCSS/JS страниц: {raw:.1f} КБ, gzip {gz:.1f} КБ, brotli {br:.1f} КБ")
+        unused = sorted(name for name in project_files - referenced if name in manifest)
+        if unused:
+            self.stdout.write(self.style.WARNING(f"Не используются: {', '.join(unused)}"))
+
+    @staticmethod
+    def _project_static_files() -> set[str]:
+        """Файлы из STATICFILES_DIRS проекта (без статики приложений вроде admin)"""
+        names = set()
+        for finder in get_finders():
+            if not isinstance(finder, FileSystemFinder):
+                continue
+            for path, _ in finder.list([]):
+                names.add(Path(path).as_posix())
+        return names
+
+    @staticmethod
+    def _referenced(manifest: dict) -> set[str]:
+        """Файлы, подключенные в шаблонах проекта через {% static %}, и все, на что ссылаются они сами"""
+        referenced = set()
+        for backend in engines.all():
+            engine = getattr(backend, "engine", None)
+            if engine is None:
+                continue
+            for name in project_templates(engine):
+                source = engine.find_template(name)[0].source
+                referenced.update(STATIC_TAG_RE.findall(source))
+
+        # Ссылки между файлами (url() в CSS, sourceMappingURL) после collectstatic указывают на хешированные имена
+        pending = [name for name in referenced if name in manifest]
+        by_basename = {Path(hashed).name: name for name, hashed in manifest.items()}
+        root = Path(settings.STATIC_ROOT)
+        while pending:
+            name = pending.pop()
+            if Path(name).suffix not in (".css", ".js"):
+                continue
+            content = (root / manifest[name]).read_text(encoding="utf-8", errors="ignore")
+            for basename, other in by_basename.items():
+                if other not in referenced and basename in content:
+                    referenced.add(other)
+                    pending.append(other)
+        return referenced
+
+    @staticmethod
+    def _sizes(path: Path) -> list[int | None]:
+        """Размеры файла и его сжатых копий; если копий нет (не текст), сжатие оценивается на лету"""
+        raw = path.stat().st_size
+        sizes = [raw]
+        estimated = None
+        for suffix in (".gz", ".br"):
+            variant = path.with_name(path.name + suffix)
+            if variant.is_file():
+                sizes.append(variant.stat().st_size)
+                continue
+            if estimated is None:
+                estimated = compress(path.read_bytes())
+            sizes.append(len(estimated[suffix]) if suffix in estimated else None)
+        return sizes
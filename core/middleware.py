@@ -0,0 +1,263 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+from urllib.parse import urlsplit
+
+from asgiref.sync import iscoroutinefunction
+from asgiref.sync import markcoroutinefunction
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpResponse
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+
+from .db import routing_scope
+from .staticfiles import accepted_encodings
+from .staticfiles import load_static_files
+
+logger = logging.getLogger("core.instrumentation")
+
+# Списки плейсхолдеров IN (%s, %s, ...) разной длины сводятся к одному отпечатку
+IN_LIST_RE = re.compile(r"\((?:\s*%s\s*,)+\s*%s\s*\)")
+
+
+def fingerprint(sql):
+    """Отпечаток SQL без учета параметров (Django передает их отдельно от текста запроса)"""
+    return IN_LIST_RE.sub("(...)", sql)
+
+
+class RequestStats:
+    """Статистика одного запроса; создается на каждый запрос, поэтому безопасна при конкурентной обработке"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_started = None
+        self.render_time = 0.0
+        self.fingerprints = Counter()
+        self.slow_queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        # Обертка connection.execute_wrapper: вызывается для каждого SQL-запроса
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.queries += 1
+            self.db_time += duration
+            self.fingerprints[fingerprint(sql)] += 1
+            if duration * 1000 >= settings.INSTRUMENTATION_SLOW_QUERY_MS:
+                self.slow_queries.append((duration, sql))
+
+    def start_render(self):
+        self.render_started = time.perf_counter()
+
+    def finish_render(self, response):
+        if self.render_started is not None:
+            self.render_time += time.perf_counter() - self.render_started
+
+    @property
+    def duplicates(self):
+        return {sql: count for sql, count in self.fingerprints.items() if count > 1}
+
+
+class RequestInstrumentationMiddleware:
+    """
+    Считает SQL-запросы, время БД, время рендеринга шаблона и повторяющиеся запросы для каждого запроса,
+    отдает их в заголовке Server-Timing и пишет в лог медленные запросы.
+
+    Выключается настройкой INSTRUMENTATION_ENABLED: тогда middleware исключается из цепочки целиком.
+    Поддерживает синхронный (WSGI) и асинхронный (ASGI) режимы; состояние хранится только в объекте запроса.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.INSTRUMENTATION_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = RequestStats()
+        request._instrumentation = stats
+        with self._wrap_connections(stats):
+            response = self.get_response(request)
+        return self._finish(request, response, stats)
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        request._instrumentation = stats
+        # Соединения с БД привязаны к потоку: обертки ставим в том же потоке, где sync_to_async выполняет ORM
+        wrappers = await sync_to_async(self._wrap_connections)(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(wrappers.close)()
+        return self._finish(request, response, stats)
+
+    def process_template_response(self, request, response):
+        stats = getattr(request, "_instrumentation", None)
+        if stats is not None:
+            stats.start_render()
+            response.add_post_render_callback(stats.finish_render)
+        return response
+
+    @staticmethod
+    def _wrap_connections(stats):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(stats))
+        return stack
+
+    def _finish(self, request, response, stats):
+        total_ms = (time.perf_counter() - stats.started) * 1000
+        db_ms = stats.db_time * 1000
+        render_ms = stats.render_time * 1000
+        duplicates = stats.duplicates
+
+        response["Server-Timing"] = ", ".join(
+            [
+                f'db;dur={db_ms:.1f};desc="{stats.queries} queries"',
+                f"tpl;dur={render_ms:.1f}",
+                f'dup;desc="{sum(duplicates.values())} duplicated"',
+                f"total;dur={total_ms:.1f}",
+            ]
+        )
+
+        for duration, sql in stats.slow_queries:
+            logger.warning("Медленный SQL %.1f мс на %s: %s", duration * 1000, request.path, sql)
+        if total_ms >= settings.INSTRUMENTATION_SLOW_REQUEST_MS:
+            logger.warning(
+                "Медленный запрос %s %s: %.1f мс, SQL %d (%.1f мс), шаблон %.1f мс, повторы %s",
+                request.method,
+                request.path,
+                total_ms,
+                stats.queries,
+                db_ms,
+                render_ms,
+                duplicates or "нет",
+            )
+        return response
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Read-your-writes при чтении с реплик: если запрос что-то записал в primary, клиент получает cookie
+    REPLICA_STICKY_COOKIE на REPLICA_STICKY_SECONDS, и пока она жива, все его чтения идут в primary.
+    Без настроенных реплик (REPLICA_DATABASES) исключается из цепочки.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REPLICA_DATABASES:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with routing_scope(pinned=self._is_pinned(request)) as state:
+            response = self.get_response(request)
+        return self._finish(response, state)
+
+    async def __acall__(self, request):
+        with routing_scope(pinned=self._is_pinned(request)) as state:
+            response = await self.get_response(request)
+        return self._finish(response, state)
+
+    @staticmethod
+    def _is_pinned(request):
+        return settings.REPLICA_STICKY_COOKIE in request.COOKIES
+
+    @staticmethod
+    def _finish(response, state):
+        if state.wrote:
+            response.set_cookie(
+                settings.REPLICA_STICKY_COOKIE,
+                "1",
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+
+class StaticFilesMiddleware:
+    """
+    Раздача собранной статики (collectstatic) самим процессом Django - для развертывания одним контейнером
+    без nginx. Индекс файлов STATIC_ROOT строится при старте; клиенту отдается готовая копия .br или .gz
+    по Accept-Encoding, файлы с хешем в имени - с Cache-Control: immutable на год, остальные -
+    на STATIC_MAX_AGE секунд. Запрос не проходит дальше по цепочке middleware.
+
+    Включается настройкой STATIC_SERVE; без нее исключается из цепочки.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.STATIC_SERVE:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.files = load_static_files(settings.STATIC_ROOT, urlsplit(settings.STATIC_URL).path)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.serve(request)
+        return response if response is not None else self.get_response(request)
+
+    async def __acall__(self, request):
+        # Статика читается с диска синхронно: файлы небольшие и почти всегда в page cache ОС
+        response = self.serve(request)
+        return response if response is not None else await self.get_response(request)
+
+    def serve(self, request):
+        """Ответ для файла статики или None, если запрос не к статике"""
+        if request.method not in ("GET", "HEAD"):
+            return None
+        static = self.files.get(request.path_info)
+        if static is None:
+            return None
+
+        path, size, encoding, etag = static.path, static.size, None, static.etag
+        accepted = accepted_encodings(request.headers.get("Accept-Encoding", ""))
+        for candidate, (variant_path, variant_size) in static.variants.items():
+            if candidate in accepted:
+                path, size, encoding = variant_path, variant_size, candidate
+                etag = f'{static.etag[:-1]}-{candidate}"'
+                break
+
+        if etag in request.headers.get("If-None-Match", ""):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(b"" if request.method == "HEAD" else path.read_bytes())
+            response["Content-Type"] = static.content_type
+            response["Content-Length"] = str(size)
+            if encoding:
+                response["Content-Encoding"] = encoding
+        response["ETag"] = etag
+        if static.immutable:
+            response["Cache-Control"] = "public, max-age=31536000, immutable"
+        else:
+            response["Cache-Control"] = f"public, max-age={settings.STATIC_MAX_AGE}"
+        if static.variants:
+            patch_vary_headers(response, ["Accept-Encoding"])
+        return response
@@ -0,0 +1,66 @@
+import logging
+from pathlib import Path
+
+from django.conf import settings
+from django.template import TemplateSyntaxError
+from django.template import engines
+from django.template.loaders.cached import Loader as CachedLoader
+from django.urls import reverse
+
+logger = logging.getLogger(__name__)
+
+# Значение-заглушка для разворота маршрута: подходит под конвертеры int и slug
+_PLACEHOLDER = "9081726354"
+
+
+def url_formatter(viewname, kwarg):
+    """
+    Функция значение -> URL маршрута viewname с одним параметром kwarg. reverse() выполняется один раз,
+    дальше URL собирается подстановкой строки - для списков, где {% url %} на каждую карточку заметен.
+    Значения подставляются без экранирования, поэтому подходят только pk и slug.
+    """
+    prefix, _, suffix = reverse(viewname, kwargs={kwarg: _PLACEHOLDER}).rpartition(_PLACEHOLDER)
+    return lambda value: f"{prefix}{value}{suffix}"
+
+
+def attach_urls(objects, viewname, kwarg, field="pk", attr="detail_url"):
+    """Проставляет объектам списка атрибут attr с URL маршрута viewname по значению поля field"""
+    url = url_formatter(viewname, kwarg)
+    for obj in objects:
+        setattr(obj, attr, url(getattr(obj, field)))
+    return objects
+
+
+def project_templates(engine):
+    """Имена шаблонов проекта (без шаблонов сторонних приложений вроде admin) для всех загрузчиков движка"""
+    names = set()
+    for loader in engine.template_loaders:
+        for inner in getattr(loader, "loaders", [loader]):
+            for directory in inner.get_dirs():
+                directory = Path(directory)
+                if not directory.is_relative_to(settings.BASE_DIR) or not directory.is_dir():
+                    continue
+                names.update(path.relative_to(directory).as_posix() for path in directory.rglob("*.html"))
+    return sorted(names)
+
+
+def warm_templates():
+    """
+    Компилирует шаблоны проекта в кеш загрузчика django.template.loaders.cached при старте процесса,
+    чтобы первые запросы каждого воркера не разбирали шаблоны. Без кеширующего загрузчика ничего не делает.
+    Возвращает количество скомпилированных шаблонов.
+    """
+    warmed = 0
+    for backend in engines.all():
+        engine = getattr(backend, "engine", None)
+        if engine is None or not any(isinstance(loader, CachedLoader) for loader in engine.template_loaders):
+            continue
+        for name in project_templates(engine):
+            try:
+                engine.get_template(name)
+            except TemplateSyntaxError:
+                # Сломанный шаблон не должен мешать запуску: ошибка повторится при его рендеринге
+                logger.exception("Не удалось скомпилировать шаблон %s", name)
+                continue
+            warmed += 1
+    return warmed
@@ -0,0 +1,19 @@
+from django.db import connections
+from django.test.runner import DiscoverRunner
+
+
+class PoolClosingTestRunner(DiscoverRunner):
+    """
+    Тестовый раннер, закрывающий пулы соединений зеркал перед удалением тестовой БД.
+    Django закрывает пул только у алиаса, который удаляет базу; зеркало (реплика с TEST.MIRROR)
+    держит свой пул к той же БД, и DROP DATABASE падает с "is being accessed by other users"
+    """
+
+    def teardown_databases(self, old_config, **kwargs):
+        for alias in connections:
+            if connections.settings[alias]["TEST"].get("MIRROR"):
+                connection = connections[alias]
+                connection.close()
+                if connection.settings_dict["OPTIONS"].get("pool"):
+                    connection.close_pool()
+        super().teardown_databases(old_config, **kwargs)
@@ -0,0 +1,64 @@
+import re
+
+from django.contrib.postgres.search import SearchQuery
+from django.contrib.postgres.search import SearchRank
+from django.db.models import F
+
+from blog.models import BlogPost
+from catalog.models import Product
+
+# Конфигурации морфологии, с которыми построен search_vector моделей
+SEARCH_CONFIGS = ("russian", "english")
+
+TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def build_query(text, prefix=False):
+    """
+    Превращает пользовательский ввод в SearchQuery по обеим конфигурациям.
+    С prefix=True последнее слово ищется по префиксу (автодополнение: "телев" находит "телевизор").
+    Возвращает None, если в строке нет слов.
+    """
+    terms = TERM_RE.findall(text.lower())[:10]
+    if not terms:
+        return None
+    if prefix:
+        terms[-1] += ":*"
+    raw = " & ".join(terms)
+    query = None
+    for config in SEARCH_CONFIGS:
+        part = SearchQuery(raw, config=config, search_type="raw")
+        query = part if query is None else query | part
+    return query
+
+
+def search(queryset, text, prefix=False):
+    """Фильтрует queryset модели с полем search_vector по GIN-индексу и сортирует по релевантности"""
+    query = build_query(text, prefix=prefix)
+    if query is None:
+        return queryset.none()
+    return (
+        queryset.filter(search_vector=query)
+        .annotate(rank=SearchRank(F("search_vector"), query))
+        .order_by("-rank", "-pk")
+    )
+
+
+def search_products(text, prefix=False):
+    return search(Product.objects.for_listing().select_related("category"), text, prefix=prefix)
+
+
+def search_posts(text, prefix=False):
+    return search(BlogPost.objects.published().for_listing(), text, prefix=prefix)
+
+
+class FullTextAdminSearchMixin:
+    """Поиск в админке через тот же GIN-индекс вместо ILIKE '%term%' по search_fields"""
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        query = build_query(search_term, prefix=True)
+        if query is None:
+            return queryset.none(), False
+        return queryset.filter(search_vector=query), False
@@ -0,0 +1,231 @@
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db import transaction
+from django.db.models import F
+from django.db.models import Max
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.feedgenerator import Rss201rev2Feed
+
+from blog.models import BlogPost
+from catalog.models import Product
+
+from .rendering import url_formatter
+
+# Протокол sitemaps: не больше 50 000 URL в одном файле
+SITEMAP_LIMIT = 50_000
+# Строк на одну выборку курсора при потоковой записи
+CHUNK_SIZE = 2_000
+# Записей в ленте блога
+FEED_SIZE = 50
+FEED_TYPES = {"rss": Rss201rev2Feed, "atom": Atom1Feed}
+# Блокировка перегенерации файла (с) и сколько ждать чужого первого построения (с)
+LOCK_TIMEOUT = 300
+LOCK_WAIT = 30
+
+
+@dataclass(frozen=True)
+class Section:
+    """Раздел sitemap: выборка, поле URL, маршрут страницы объекта и поле даты изменения для lastmod"""
+
+    queryset: Callable
+    viewname: str
+    kwarg: str
+    field: str
+    lastmod: str
+
+
+SECTIONS = {
+    "products": Section(Product.objects.all, "catalog:product_detail", "pk", "pk", "updated_at"),
+    "posts": Section(BlogPost.objects.published, "blog:post_detail", "slug", "slug", "last_modified"),
+}
+
+
+def page_of(pk):
+    """Файл раздела определяется диапазоном pk, поэтому изменение объекта затрагивает ровно один файл"""
+    return pk // SITEMAP_LIMIT
+
+
+def _changed_key(*parts):
+    return ":".join(["sitemaps:changed", *map(str, parts)])
+
+
+def mark_changed(section, pk=None):
+    """
+    Отмечает устаревшими файл раздела с объектом pk (None - весь раздел), индекс sitemap и, для записей блога,
+    ленты. Отметка ставится после коммита, чтобы перегенерация не прочитала данные до изменения.
+    """
+
+    def mark():
+        now = time.time()
+        keys = [_changed_key("index"), _changed_key(section) if pk is None else _changed_key(section, page_of(pk))]
+        if section == "posts":
+            keys.append(_changed_key("feed"))
+        cache.set_many(dict.fromkeys(keys, now), None)
+
+    transaction.on_commit(mark)
+
+
+def _ensure(name, changed_keys, write):
+    """
+    Возвращает путь к файлу SITEMAP_ROOT/name, перегенерируя его, если он отсутствует, старше SITEMAP_MAX_AGE
+    или после его построения отмечены изменения. Файл пишется во временный и подменяется атомарно;
+    одновременную перегенерацию одного файла несколькими процессами отсекает блокировка в кеше.
+    """
+    root = Path(settings.SITEMAP_ROOT)
+    path = root / name
+    built = cache.get(f"sitemaps:built:{name}")
+    changed = max(filter(None, cache.get_many(changed_keys).values()), default=0)
+    exists = path.is_file()
+    if exists and built is not None and built >= changed and time.time() - built < settings.SITEMAP_MAX_AGE:
+        return path
+    lock = f"sitemaps:lock:{name}"
+    acquired = cache.add(lock, 1, LOCK_TIMEOUT)
+    if not acquired and exists:
+        # Файл уже перестраивает другой процесс - пока отдаем прежнюю версию
+        return path
+    # Первое построение: прежней версии нет, ждем файл от другого процесса, пока держится его блокировка.
+    # Если блокировку так и не удалось взять (процесс завис), строим файл сами
+    deadline = time.monotonic() + LOCK_WAIT
+    while not acquired and time.monotonic() < deadline:
+        time.sleep(0.1)
+        if path.is_file():
+            return path
+        acquired = cache.add(lock, 1, LOCK_TIMEOUT)
+
+    try:
+        started = time.time()
+        root.mkdir(parents=True, exist_ok=True)
+        fd, temporary = tempfile.mkstemp(suffix=".tmp", dir=root)
+        try:
+            with open(fd, "w", encoding="utf-8") as output:
+                write(output)
+            os.chmod(temporary, 0o644)
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+        cache.set(f"sitemaps:built:{name}", started, None)
+    finally:
+        if acquired:
+            cache.delete(lock)
+    return path
+
+
+def _absolute(path):
+    return settings.SITE_URL.rstrip("/") + path
+
+
+def _primary(queryset):
+    # Чтение с primary: с реплики перегенерация могла бы не увидеть только что отмеченное изменение
+    return queryset.using(DEFAULT_DB_ALIAS)
+
+
+def _page_queryset(section, page):
+    """Объекты раздела с pk из [page * SITEMAP_LIMIT, (page + 1) * SITEMAP_LIMIT) - диапазон по индексу pk"""
+    return _primary(SECTIONS[section].queryset()).filter(
+        pk__gte=page * SITEMAP_LIMIT, pk__lt=(page + 1) * SITEMAP_LIMIT
+    )
+
+
+def write_section_page(output, section, page):
+    """<urlset> файла раздела с номером page"""
+    spec = SECTIONS[section]
+    url = url_formatter(spec.viewname, spec.kwarg)
+    rows = (
+        _page_queryset(section, page)
+        .order_by("pk")
+        .values_list(spec.field, spec.lastmod)
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    output.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+    output.write('<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+    for value, lastmod in rows:
+        loc = escape(_absolute(url(value)))
+        output.write(f"<url><loc>{loc}</loc><lastmod>{lastmod.isoformat(timespec='seconds')}</lastmod></url>\n")
+    output.write("</urlset>\n")
+
+
+def section_pages(section):
+    """[(номер файла, lastmod)] непустых файлов раздела - один агрегирующий запрос"""
+    spec = SECTIONS[section]
+    return list(
+        _primary(spec.queryset())
+        .order_by()
+        .annotate(page=F("pk") / SITEMAP_LIMIT)
+        .values("page")
+        .annotate(lastmod=Max(spec.lastmod))
+        .order_by("page")
+        .values_list("page", "lastmod")
+    )
+
+
+def write_index(output):
+    output.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+    output.write('<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+    for section in SECTIONS:
+        for page, lastmod in section_pages(section):
+            loc = escape(_absolute(reverse("sitemap_section", kwargs={"section": section, "page": page})))
+            output.write(
+                f"<sitemap><loc>{loc}</loc><lastmod>{lastmod.isoformat(timespec='seconds')}</lastmod></sitemap>\n"
+            )
+    output.write("</sitemapindex>\n")
+
+
+def write_feed(output, kind):
+    """Лента последних опубликованных записей; описание - сохраненный анонс, полный текст не читается"""
+    feed = FEED_TYPES[kind](
+        title="Skystore - блог",
+        link=_absolute(reverse("blog:post_list")),
+        description="Новые записи блога Skystore",
+        language="ru",
+        feed_url=_absolute(reverse("blog:feed", kwargs={"kind": kind})),
+    )
+    url = url_formatter("blog:post_detail", "slug")
+    posts = (
+        _primary(BlogPost.objects.published())
+        .only("title", "slug", "excerpt", "created_at", "last_modified")
+        .order_by("-created_at")[:FEED_SIZE]
+    )
+    for post in posts.iterator(chunk_size=FEED_SIZE):
+        link = _absolute(url(post.slug))
+        feed.add_item(
+            title=post.title,
+            link=link,
+            description=post.excerpt,
+            unique_id=link,
+            pubdate=post.created_at,
+            updateddate=post.last_modified,
+        )
+    feed.write(output, "utf-8")
+
+
+def ensure_section_page(section, page):
+    """
+    Путь к файлу раздела или None, если файла нет в индексе (в диапазоне pk нет объектов): пустые файлы
+    не пишутся, поэтому произвольные номера страниц не создают файлов на диске
+    """
+    if not _page_queryset(section, page).exists():
+        return None
+    return _ensure(
+        f"sitemap-{section}-{page}.xml",
+        [_changed_key(section, page), _changed_key(section)],
+        lambda output: write_section_page(output, section, page),
+    )
+
+
+def ensure_index():
+    return _ensure("sitemap.xml", [_changed_key("index")], write_index)
+
+
+def ensure_feed(kind):
+    return _ensure(f"feed-{kind}.xml", [_changed_key("feed")], lambda output: write_feed(output, kind))
@@ -0,0 +1,125 @@
+import gzip
+import json
+import mimetypes
+import os
+from dataclasses import dataclass
+from dataclasses import field
+from pathlib import Path
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:  # brotli - необязательная зависимость (pip install brotli), без нее создаются только .gz
+    brotli = None
+
+# Текстовые форматы, которые имеет смысл сжимать (изображения и шрифты woff/woff2 уже сжаты)
+COMPRESSIBLE_EXTENSIONS = {".css", ".js", ".map", ".svg", ".json", ".txt", ".xml", ".html", ".ttf", ".otf", ".eot"}
+# Сжатая копия сохраняется, только если она заметно меньше исходника
+MIN_COMPRESS_SIZE = 256
+MIN_COMPRESS_RATIO = 0.95
+
+# Расширение сжатой копии -> значение Content-Encoding, в порядке предпочтения при отдаче
+ENCODINGS = {".br": "br", ".gz": "gzip"}
+
+
+def compress(content):
+    """Сжатые варианты содержимого {".gz": bytes, ".br": bytes}; варианты без заметного выигрыша пропускаются"""
+    if len(content) < MIN_COMPRESS_SIZE:
+        return {}
+    variants = {".gz": gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(content, quality=11)
+    return {suffix: data for suffix, data in variants.items() if len(data) <= len(content) * MIN_COMPRESS_RATIO}
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    ManifestStaticFilesStorage (имена с хешем содержимого и staticfiles.json), который при collectstatic
+    дополнительно кладет рядом с каждым хешированным текстовым файлом сжатые копии .gz и .br.
+    Без манифеста (collectstatic не выполнялся: тесты, разработка) {% static %} отдает исходные имена.
+    """
+
+    def stored_name(self, name):
+        if not self.hashed_files:
+            return name
+        return super().stored_name(name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        for hashed_name in sorted(set(self.hashed_files.values())):
+            if os.path.splitext(hashed_name)[1] not in COMPRESSIBLE_EXTENSIONS:
+                continue
+            with self.open(hashed_name) as original:
+                content = original.read()
+            for suffix, data in compress(content).items():
+                if self.exists(hashed_name + suffix):
+                    self.delete(hashed_name + suffix)
+                self._save(hashed_name + suffix, ContentFile(data))
+                yield hashed_name, hashed_name + suffix, True
+
+
+@dataclass
+class StaticFile:
+    """Файл из STATIC_ROOT с готовыми заголовками; variants - сжатые копии {Content-Encoding: (путь, размер)}"""
+
+    path: Path
+    size: int
+    content_type: str
+    etag: str
+    immutable: bool
+    variants: dict = field(default_factory=dict)
+
+
+def load_static_files(root, url_prefix, manifest_name="staticfiles.json"):
+    """
+    Индекс {URL: StaticFile} файлов STATIC_ROOT, собранный один раз при старте процесса.
+    Файлы с хешем в имени (значения манифеста) помечаются immutable; .gz/.br рядом с файлом - его варианты.
+    """
+    root = Path(root)
+    hashed = set()
+    manifest = root / manifest_name
+    if manifest.is_file():
+        hashed = set(json.loads(manifest.read_text(encoding="utf-8")).get("paths", {}).values())
+
+    files = {}
+    for path in sorted(root.rglob("*")):
+        if not path.is_file() or path == manifest:
+            continue
+        if path.suffix in ENCODINGS and path.with_suffix("").is_file():
+            continue
+        name = path.relative_to(root).as_posix()
+        stat = path.stat()
+        content_type, _ = mimetypes.guess_type(name)
+        content_type = content_type or "application/octet-stream"
+        if content_type.startswith("text/") or content_type in ("application/javascript", "application/json"):
+            content_type += "; charset=utf-8"
+        variants = {}
+        for suffix, encoding in ENCODINGS.items():
+            compressed = path.with_name(path.name + suffix)
+            if compressed.is_file():
+                variants[encoding] = (compressed, compressed.stat().st_size)
+        files[url_prefix + name] = StaticFile(
+            path=path,
+            size=stat.st_size,
+            content_type=content_type,
+            etag=f'"{stat.st_size:x}-{int(stat.st_mtime):x}"',
+            immutable=name in hashed,
+            variants=variants,
+        )
+    return files
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding без явно запрещенных (q=0)"""
+    accepted = set()
+    for part in header.split(","):
+        encoding, _, params = part.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        if encoding:
+            accepted.add(encoding.strip().lower())
+    return accepted
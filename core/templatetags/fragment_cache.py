@@ -0,0 +1,45 @@
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+
+from core.cache import cache_stats
+from core.cache import object_stamp
+
+register = template.Library()
+
+
+class ObjectFragmentNode(template.Node):
+    def __init__(self, nodelist, name, obj):
+        self.nodelist = nodelist
+        self.name = name
+        self.obj = obj
+
+    def render(self, context):
+        obj = self.obj.resolve(context)
+        name = self.name.resolve(context)
+        key = f"fragment:{name}:{obj._meta.label_lower}:{obj.pk}:{object_stamp(obj)}"
+        content = cache.get(key)
+        if content is not None:
+            cache_stats.hit("fragment")
+            return content
+        cache_stats.miss("fragment")
+        content = self.nodelist.render(context)
+        cache.set(key, content, getattr(settings, "FRAGMENT_CACHE_TIMEOUT", 3600))
+        return content
+
+
+@register.tag
+def objectcache(parser, token):
+    """
+    Кеширует фрагмент шаблона для конкретной версии объекта:
+
+        {% objectcache "product_card" product %} ... {% endobjectcache %}
+
+    Версия берется из updated_at объекта или из счетчика версий, который сбрасывается сигналами.
+    """
+    bits = token.split_contents()
+    if len(bits) != 3:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' принимает имя фрагмента и объект")
+    nodelist = parser.parse(("endobjectcache",))
+    parser.delete_first_token()
+    return ObjectFragmentNode(nodelist, parser.compile_filter(bits[1]), parser.compile_filter(bits[2]))
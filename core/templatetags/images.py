@@ -0,0 +1,47 @@
+from django import template
+from django.utils.html import format_html
+from django.utils.html import format_html_join
+
+from core.images import DERIVATIVE_FORMATS
+from core.images import derivative_name
+from core.images import derivative_widths
+
+register = template.Library()
+
+
+@register.simple_tag
+def responsive_image(field_file, width, height, alt="", sizes="100vw", css_class="", style="", loading="lazy"):
+    """
+    <picture> с AVIF/WebP-вариантами разных ширин и <img> с width/height исходника:
+
+        {% responsive_image product.image product.image_width product.image_height alt=product.name sizes="33vw" %}
+
+    Набор вариантов вычисляется по сохраненной ширине исходника, без обращения к хранилищу.
+    Пока размеры неизвестны (копии еще не созданы), выводится обычный <img>.
+    """
+    if not field_file:
+        return ""
+    img = format_html(
+        '<img src="{}" alt="{}" class="{}" style="{}" loading="{}" decoding="async"{}>',
+        field_file.url,
+        alt,
+        css_class,
+        style,
+        loading,
+        format_html(' width="{}" height="{}"', width, height) if width and height else "",
+    )
+    if not width:
+        return img
+
+    storage = field_file.storage
+    sources = []
+    for fmt in DERIVATIVE_FORMATS:
+        srcset = ", ".join(
+            f"{storage.url(derivative_name(field_file.name, w, fmt))} {w}w" for w in derivative_widths(width)
+        )
+        sources.append((f"image/{fmt}", srcset, sizes))
+    return format_html(
+        "<picture>{}{}</picture>",
+        format_html_join("", '<source type="{}" srcset="{}" sizes="{}">', sources),
+        img,
+    )
@@ -0,0 +1,326 @@
+import gzip
+import json
+import tempfile
+from decimal import Decimal
+from io import BytesIO
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connection
+from django.db import connections
+from django.template import Context
+from django.template import Template
+from django.test import RequestFactory
+from django.test import SimpleTestCase
+from django.test import TestCase
+from django.test import TransactionTestCase
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image
+
+from catalog.filters import ProductFilters
+from catalog.models import Category
+from catalog.models import Product
+from catalog.services import get_category_menu
+from catalog.services import get_product_facets
+
+from .db import pool_stats
+from .db import routing_scope
+from .db import server_connections
+from .images import DERIVATIVE_FORMATS
+from .images import derivative_name
+from .images import derivative_names
+from .images import derivative_widths
+from .images import generate_derivatives
+from .middleware import StaticFilesMiddleware
+from .sitemaps import ensure_index
+
+
+def save_image(name, size=(800, 600), fmt="JPEG"):
+    """Записывает в хранилище сгенерированное в памяти изображение и возвращает его имя"""
+    buffer = BytesIO()
+    Image.new("RGB", size, "teal").save(buffer, format=fmt)
+    return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+class MediaRootMixin:
+    def setUp(self):
+        super().setUp()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+
+class ImageDerivativeTests(MediaRootMixin, SimpleTestCase):
+    def test_widths_never_upscale(self):
+        self.assertEqual(derivative_widths(2000), [320, 640, 1024])
+        self.assertEqual(derivative_widths(800), [320, 640, 800])
+        self.assertEqual(derivative_widths(200), [200])
+
+    def test_names_keep_source_extension(self):
+        self.assertNotEqual(
+            derivative_name("products/photo.jpg", 640, "webp"), derivative_name("products/photo.png", 640, "webp")
+        )
+
+    def test_generate_derivatives(self):
+        name = save_image("products/photo.jpg")
+        self.assertEqual(generate_derivatives(name), (800, 600))
+        for target in derivative_names(name, 800):
+            self.assertTrue(default_storage.exists(target), target)
+        with default_storage.open(derivative_name(name, 320, DERIVATIVE_FORMATS[0])) as derivative:
+            self.assertEqual(Image.open(derivative).size, (320, 240))
+
+    def test_responsive_image_tag(self):
+        template = Template("{% load images %}{% responsive_image image width height alt='Фото' %}")
+        name = save_image("products/photo.png", fmt="PNG")
+        image = Product(image=name).image
+
+        html = template.render(Context({"image": image, "width": 800, "height": 600}))
+        self.assertIn('width="800" height="600"', html)
+        for fmt in DERIVATIVE_FORMATS:
+            self.assertIn(f'<source type="image/{fmt}"', html)
+            self.assertIn(f"/media/products/derivatives/photo.png-640w.{fmt} 640w", html)
+
+        # Размеры еще неизвестны - обычный <img> без копий
+        html = template.render(Context({"image": image, "width": None, "height": None}))
+        self.assertTrue(html.startswith("<img "))
+
+
+class GenerateImageDerivativesTests(MediaRootMixin, TransactionTestCase):
+    def test_backfill_updates_only_missing_sizes(self):
+        name = save_image("products/photo.jpg")
+        # bulk_create без сигналов: размеры не заполнены, как у изображений, загруженных до появления копий
+        Product.objects.bulk_create(
+            [Product(name=f"Товар {i}", description="", price=1, image=name) for i in range(2)]
+        )
+        call_command("generate_image_derivatives", workers=1, stdout=StringIO())
+        sizes = Product.objects.values_list("image_width", "image_height", "updated_at")
+        self.assertEqual({size[:2] for size in sizes}, {(800, 600)})
+
+        stamps = set(sizes)
+        stdout = StringIO()
+        call_command("generate_image_derivatives", workers=1, stdout=stdout)
+        self.assertEqual(set(sizes.all()), stamps)
+        self.assertIn("ИТОГО: 0 изображений", stdout.getvalue())
+
+
+class DbMetricsTests(TestCase):
+    def test_pool_stats(self):
+        stats = pool_stats()
+        if not settings.DB_POOL:
+            self.assertEqual(stats, {})
+            return
+        self.assertEqual(set(stats["default"]), {"size", "max_size", "in_use", "idle", "waiting", "created", "errors"})
+        self.assertGreaterEqual(stats["default"]["in_use"], 1)
+
+    def test_server_connections(self):
+        states = server_connections()
+        # Запрос к pg_stat_activity выполняется в собственном активном соединении
+        self.assertGreaterEqual(states.get("active", 0), 1)
+        self.assertTrue(all(isinstance(value, int) for value in states.values()))
+
+    @override_settings(METRICS_ALLOWED_IPS=["10.0.0.1"])
+    def test_forbidden_for_other_ips(self):
+        self.assertEqual(self.client.get(reverse("db_metrics")).status_code, 403)
+
+    def test_prometheus_format(self):
+        response = self.client.get(reverse("db_metrics"))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        lines = response.content.decode().splitlines()
+        self.assertIn("# TYPE skystore_db_server_connections gauge", lines)
+        self.assertRegex(response.content.decode(), r'skystore_db_server_connections\{state="active"\} [1-9]\d*\n')
+        for line in lines:
+            if not line.startswith("#"):
+                self.assertRegex(line, r'^skystore_db_\w+\{(\w+="[\w-]+",?)+\} \d+$')
+        if settings.DB_POOL:
+            self.assertIn('skystore_db_pool_connections{alias="default",state="in_use"}', response.content.decode())
+
+
+@override_settings(REPLICA_DATABASES=["replica"], PAGE_CACHE_TIMEOUT=0)
+class ReplicaRoutingTests(TransactionTestCase):
+    # replica в тестах - зеркало default: отдельное соединение к той же базе
+    databases = {"default", "replica"}
+
+    def test_reads_stick_to_primary_after_write(self):
+        with routing_scope():
+            self.assertEqual(Product.objects.all().db, "replica")
+            Category.objects.create(name="Телефоны")
+            self.assertEqual(Product.objects.all().db, "default")
+        with routing_scope(pinned=True):
+            self.assertEqual(Category.objects.all().db, "default")
+
+    def test_cached_menu_and_facets_read_from_primary(self):
+        cache.clear()
+        with routing_scope(), CaptureQueriesContext(connections["replica"]) as replica_queries:
+            get_category_menu()
+            get_product_facets(ProductFilters.from_query({}))
+        self.assertEqual(replica_queries.captured_queries, [])
+
+    def test_write_request_sets_sticky_cookie(self):
+        product = Product.objects.create(name="QLED", description="Описание", price=100)
+        response = self.client.get(reverse("catalog:product_detail", kwargs={"pk": product.pk}))
+        self.assertContains(response, "QLED")
+        self.assertNotIn(settings.REPLICA_STICKY_COOKIE, response.cookies)
+
+        user = get_user_model().objects.create_user(username="author", password="password")
+        self.client.force_login(user)
+        response = self.client.post(reverse("blog:post_create"), {"title": "Новая запись", "content": "Текст"})
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(settings.REPLICA_STICKY_COOKIE, response.cookies)
+
+
+class RequestInstrumentationTests(TestCase):
+    @override_settings(PAGE_CACHE_TIMEOUT=0)
+    def test_server_timing_reports_queries(self):
+        category = Category.objects.create(name="Телевизоры")
+        product = Product.objects.create(name="QLED", description="Описание", price=100, category=category)
+        # меню категорий кешируется между запросами
+        get_category_menu()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("catalog:product_detail", kwargs={"pk": product.pk}))
+
+        self.assertTrue(queries.captured_queries)
+        self.assertIn("db;dur=", response["Server-Timing"])
+        self.assertIn(f'desc="{len(queries)} queries"', response["Server-Timing"])
+        self.assertIn("tpl;dur=", response["Server-Timing"])
+
+
+class StaticFilesMiddlewareTests(TestCase):
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        css = Path(root.name) / "css"
+        css.mkdir()
+        content = b"body { color: black; }\n" * 100
+        (css / "site.css").write_bytes(content)
+        (css / "site.0123abcd.css").write_bytes(content)
+        (css / "site.0123abcd.css.gz").write_bytes(gzip.compress(content))
+        manifest = {"paths": {"css/site.css": "css/site.0123abcd.css"}}
+        (Path(root.name) / "staticfiles.json").write_text(json.dumps(manifest))
+        with override_settings(STATIC_SERVE=True, STATIC_ROOT=root.name):
+            self.middleware = StaticFilesMiddleware(lambda request: None)
+
+    def test_serves_precompressed_immutable_file(self):
+        request = RequestFactory().get("/static/css/site.0123abcd.css", HTTP_ACCEPT_ENCODING="gzip, br")
+        response = self.middleware(request)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+
+        request = RequestFactory().get("/static/css/site.css", HTTP_IF_NONE_MATCH=response["ETag"])
+        response = self.middleware(request)
+        # без хеша в имени - короткий срок кеширования; ETag другой кодировки не подходит
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("immutable", response["Cache-Control"])
+        self.assertNotIn("Content-Encoding", response)
+
+
+class SitemapTests(TestCase):
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        settings_override = override_settings(SITEMAP_ROOT=root.name, SITE_URL="https://shop.example")
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        cache.clear()
+
+    def test_section_page_regenerated_after_product_change(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            product = Product.objects.create(name="Телевизор", description="", price=100)
+        index = self.client.get(reverse("sitemap"))
+        self.assertIn(b"https://shop.example/sitemap-products-0.xml", b"".join(index.streaming_content))
+
+        url = reverse("sitemap_section", kwargs={"section": "products", "page": 0})
+        content = b"".join(self.client.get(url).streaming_content)
+        self.assertIn(b"<loc>https://shop.example/product/%d/</loc>" % product.pk, content)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other = Product.objects.create(name="Монитор", description="", price=50)
+        content = b"".join(self.client.get(url).streaming_content)
+        self.assertIn(b"/product/%d/" % other.pk, content)
+
+    def test_empty_section_page_not_written(self):
+        Product.objects.create(name="Телевизор", description="", price=100)
+        url = reverse("sitemap_section", kwargs={"section": "products", "page": 999_999})
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(list(Path(settings.SITEMAP_ROOT).iterdir()), [])
+
+    def test_foreign_lock_kept(self):
+        # Блокировку держит другой процесс: первое построение ждет его, но после ожидания строит файл само
+        cache.set("sitemaps:lock:sitemap.xml", 1)
+        with mock.patch("core.sitemaps.LOCK_WAIT", 0.2):
+            path = ensure_index()
+        self.assertTrue(path.is_file())
+        self.assertEqual(cache.get("sitemaps:lock:sitemap.xml"), 1)
+
+        # Файл устарел, но есть: прежняя версия отдается без перестроения, чужая блокировка не снимается
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.create(name="Телевизор", description="", price=100)
+        self.assertNotIn(b"sitemap-products-0.xml", ensure_index().read_bytes())
+        self.assertEqual(cache.get("sitemaps:lock:sitemap.xml"), 1)
+
+
+class CatalogApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Телевизоры")
+        cls.products = [
+            Product.objects.create(name=f"Товар {i}", description="", price=Decimal("1299.90"), category=category)
+            for i in range(3)
+        ]
+
+    def get_json(self, params):
+        response = self.client.get(reverse("api_list", kwargs={"resource": "products"}), params)
+        self.assertEqual(response.status_code, 200)
+        return json.loads(b"".join(response.streaming_content), parse_float=Decimal)
+
+    def test_sparse_fields_and_cursor(self):
+        with self.assertNumQueries(1):
+            first = self.get_json({"fields": "id,price,category", "limit": 2})
+        self.assertEqual(
+            first["results"][0],
+            {
+                "id": self.products[0].pk,
+                "price": Decimal("1299.90"),
+                "category": {"id": self.products[0].category_id, "name": "Телевизоры"},
+            },
+        )
+        second = self.get_json({"fields": "id", "limit": 2, "cursor": first["next_cursor"]})
+        self.assertEqual(second["results"], [{"id": self.products[2].pk}])
+        self.assertIsNone(second["next_cursor"])
+
+    def test_batch_lookup_keeps_requested_order(self):
+        ids = f"{self.products[2].pk},999999,{self.products[0].pk}"
+        with self.assertNumQueries(1):
+            data = self.get_json({"ids": ids, "fields": "id"})
+        self.assertEqual(data["results"], [{"id": self.products[2].pk}, {"id": self.products[0].pk}])
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Product.objects.create(name="Телевизор QLED", description="Яркие цвета", price=100)
+        Product.objects.create(name="Smart watch", description="Wireless charging", price=50)
+
+    def test_search_uses_russian_and_english_morphology(self):
+        response = self.client.get(reverse("search"), {"q": "телевизоры"})
+        self.assertEqual([p.name for p in response.context["products"]], ["Телевизор QLED"])
+
+        response = self.client.get(reverse("search"), {"q": "charge"})
+        self.assertEqual([p.name for p in response.context["products"]], ["Smart watch"])
+
+    def test_suggest_matches_prefix(self):
+        response = self.client.get(reverse("search_suggest"), {"q": "телев"})
+        self.assertEqual([item["title"] for item in response.json()["results"]], ["Телевизор QLED"])
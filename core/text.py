@@ -0,0 +1,16 @@
+from django.utils.text import Truncator
+
+# Длина анонса в карточках списков (то, что раньше давал truncatechars:100 в шаблонах)
+EXCERPT_LENGTH = 100
+
+
+def make_excerpt(text, length=EXCERPT_LENGTH):
+    """Анонс текста так же, как фильтр truncatechars: не длиннее length символов, с многоточием при обрезке"""
+    return Truncator(text or "").chars(length)
+
+
+def with_excerpt_field(update_fields, source, target):
+    """update_fields для save(): если сохраняется исходный текст, сохраняется и его анонс"""
+    if update_fields is None or source not in update_fields or target in update_fields:
+        return update_fields
+    return [*update_fields, target]
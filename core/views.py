@@ -0,0 +1,179 @@
+from django.conf import settings
+from django.http import FileResponse
+from django.http import Http404
+from django.http import HttpResponse
+from django.http import HttpResponseForbidden
+from django.http import JsonResponse
+from django.http import StreamingHttpResponse
+from django.urls import reverse
+from django.views.generic import TemplateView
+
+from catalog.pagination import InvalidCursor
+from catalog.pagination import KeysetPaginator
+
+from .api import RESOURCES
+from .api import InvalidRequest
+from .api import encode_str
+from .api import parse_ids
+from .api import parse_limit
+from .api import stream_json
+from .cache import cache_stats
+from .db import pool_stats
+from .db import server_connections
+from .search import search_posts
+from .search import search_products
+from .sitemaps import FEED_TYPES
+from .sitemaps import SECTIONS
+from .sitemaps import ensure_feed
+from .sitemaps import ensure_index
+from .sitemaps import ensure_section_page
+
+
+def select_view(route, sync_view, async_view, **initkwargs):
+    """Представление маршрута: async-вариант, если маршрут перечислен в настройке ASYNC_VIEWS"""
+    use_async = route in settings.ASYNC_VIEWS or "*" in settings.ASYNC_VIEWS
+    return (async_view if use_async else sync_view).as_view(**initkwargs)
+
+
+def cache_metrics(request):
+    """Счетчики попаданий/промахов кеша в текстовом формате Prometheus"""
+    if request.META.get("REMOTE_ADDR") not in settings.METRICS_ALLOWED_IPS:
+        return HttpResponseForbidden()
+
+    lines = [
+        "# HELP skystore_cache_requests_total Обращения к кешу страниц и фрагментов",
+        "# TYPE skystore_cache_requests_total counter",
+    ]
+    for (kind, result), value in sorted(cache_stats.snapshot().items()):
+        lines.append(f'skystore_cache_requests_total{{kind="{kind}",result="{result}"}} {value}')
+    return HttpResponse("\n".join(lines) + "\n", content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def db_metrics(request):
+    """
+    Соединения с БД в текстовом формате Prometheus: пулы соединений процесса, обслужившего запрос
+    (при нескольких воркерах каждый отдает свой пул), и соединения сервера из pg_stat_activity
+    """
+    if request.META.get("REMOTE_ADDR") not in settings.METRICS_ALLOWED_IPS:
+        return HttpResponseForbidden()
+
+    lines = [
+        "# HELP skystore_db_pool_connections Соединения пула процесса по состояниям",
+        "# TYPE skystore_db_pool_connections gauge",
+    ]
+    stats = pool_stats()
+    for alias, values in sorted(stats.items()):
+        for state in ("in_use", "idle", "waiting"):
+            lines.append(f'skystore_db_pool_connections{{alias="{alias}",state="{state}"}} {values[state]}')
+    lines += [
+        "# HELP skystore_db_pool_created_total Соединения, открытые пулом с запуска процесса",
+        "# TYPE skystore_db_pool_created_total counter",
+    ]
+    for alias, values in sorted(stats.items()):
+        lines.append(f'skystore_db_pool_created_total{{alias="{alias}"}} {values["created"]}')
+    lines += [
+        "# HELP skystore_db_pool_errors_total Запросы соединения у пула, завершившиеся ошибкой или таймаутом",
+        "# TYPE skystore_db_pool_errors_total counter",
+    ]
+    for alias, values in sorted(stats.items()):
+        lines.append(f'skystore_db_pool_errors_total{{alias="{alias}"}} {values["errors"]}')
+    lines += [
+        "# HELP skystore_db_server_connections Соединения сервера PostgreSQL с базой по состояниям",
+        "# TYPE skystore_db_server_connections gauge",
+    ]
+    for state, value in sorted(server_connections().items()):
+        lines.append(f'skystore_db_server_connections{{state="{state}"}} {value}')
+    return HttpResponse("\n".join(lines) + "\n", content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def _xml_file(path, content_type="application/xml; charset=utf-8"):
+    return FileResponse(path.open("rb"), content_type=content_type)
+
+
+def sitemap_index(request):
+    """Индекс sitemap; файлы пререндерятся в SITEMAP_ROOT и перестраиваются только после изменений"""
+    return _xml_file(ensure_index())
+
+
+def sitemap_section(request, section, page):
+    if section not in SECTIONS:
+        raise Http404
+    path = ensure_section_page(section, page)
+    if path is None:
+        raise Http404
+    return _xml_file(path)
+
+
+def blog_feed(request, kind):
+    """Лента опубликованных записей блога: RSS 2.0 (rss) или Atom (atom)"""
+    if kind not in FEED_TYPES:
+        raise Http404
+    return _xml_file(ensure_feed(kind), FEED_TYPES[kind].content_type)
+
+
+def api_list(request, resource):
+    """
+    JSON API только для чтения: /api/products/, /api/categories/, /api/posts/ (опубликованные).
+    ?fields=a,b - поля ответа, из БД читаются только их колонки; ?ids=1,2,3 - объекты по id одним запросом
+    в порядке ids (отсутствующие пропускаются); иначе страница по pk: ?limit= (до 1000) и ?cursor=
+    из next_cursor/previous_cursor предыдущего ответа. Некорректные параметры - ответ 400 с описанием ошибки.
+    """
+    if resource not in RESOURCES:
+        raise Http404
+    spec = RESOURCES[resource]
+    try:
+        names = spec.parse_fields(request.GET.get("fields"))
+        queryset = spec.select(names)
+        if "ids" in request.GET:
+            ids = parse_ids(request.GET["ids"])
+            found = queryset.in_bulk(ids)
+            objects = [found[pk] for pk in dict.fromkeys(ids) if pk in found]
+            tail = ""
+        else:
+            paginator = KeysetPaginator(queryset, parse_limit(request.GET.get("limit")), ordering=spec.ordering)
+            page = paginator.get_page(request.GET.get("cursor"))
+            objects = page.object_list
+            tail = (
+                f',"next_cursor":{encode_str(page.next_cursor)}'
+                f',"previous_cursor":{encode_str(page.previous_cursor)}'
+            )
+    except InvalidRequest as e:
+        error = str(e)
+    except InvalidCursor:
+        error = "Некорректный курсор страницы"
+    else:
+        rows = stream_json(objects, spec.row_encoder(names), tail)
+        return StreamingHttpResponse((part.encode() for part in rows), content_type="application/json")
+    return JsonResponse({"error": error}, status=400, json_dumps_params={"ensure_ascii": False})
+
+
+class SearchView(TemplateView):
+    """Полнотекстовый поиск по товарам и опубликованным записям блога"""
+
+    template_name = "core/search.html"
+    products_limit = 30
+    posts_limit = 10
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get("q", "").strip()
+        context["title"] = f"Поиск: {query}" if query else "Поиск"
+        context["query"] = query
+        if query:
+            context["products"] = list(search_products(query)[: self.products_limit])
+            context["posts"] = list(search_posts(query)[: self.posts_limit])
+        return context
+
+
+def search_suggest(request):
+    """Подсказки для автодополнения: поиск по префиксу последнего слова"""
+    query = request.GET.get("q", "").strip()
+    results = []
+    if query:
+        for pk, name in search_products(query, prefix=True).values_list("pk", "name")[:8]:
+            results.append(
+                {"type": "product", "title": name, "url": reverse("catalog:product_detail", kwargs={"pk": pk})}
+            )
+        for slug, title in search_posts(query, prefix=True).values_list("slug", "title")[:4]:
+            results.append({"type": "post", "title": title, "url": reverse("blog:post_detail", kwargs={"slug": slug})})
+    return JsonResponse({"query": query, "results": results})
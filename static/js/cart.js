@@ -0,0 +1,73 @@
+// Корзина без перезагрузки страницы: формы с data-cart-form="<фрагмент>" отправляются fetch-запросом,
+// ответ (только изменившийся фрагмент) заменяет элемент с data-cart-fragment="<фрагмент>".
+// Страницы каталога кешируются для всех посетителей и не содержат токен CSRF,
+// поэтому он берется из cookie, которую выдает запрос виджета корзины. Формы каталога - GET:
+// без JavaScript и при ошибке они открывают страницу подтверждения с токеном (cart:add).
+(function () {
+    function csrfToken() {
+        var match = document.cookie.match(/(?:^|;\s*)csrftoken=([^;]+)/);
+        return match ? decodeURIComponent(match[1]) : "";
+    }
+
+    function replaceFragment(name, html) {
+        var current = document.querySelector('[data-cart-fragment="' + name + '"]');
+        if (!current) {
+            return;
+        }
+        var template = document.createElement("template");
+        template.innerHTML = html.trim();
+        var fresh = template.content.querySelector('[data-cart-fragment="' + name + '"]');
+        if (fresh) {
+            current.replaceWith(fresh);
+        }
+    }
+
+    function refreshSummary() {
+        var summary = document.querySelector('[data-cart-fragment="summary"]');
+        if (!summary) {
+            return Promise.resolve();
+        }
+        return fetch(summary.dataset.url, {credentials: "same-origin"})
+            .then(function (response) { return response.text(); })
+            .then(function (html) { replaceFragment("summary", html); });
+    }
+
+    function ensureCsrfToken() {
+        // Первое посещение: cookie выдает запрос виджета, который мог еще не вернуться
+        return csrfToken() ? Promise.resolve() : refreshSummary();
+    }
+
+    document.addEventListener("submit", function (event) {
+        var form = event.target.closest("[data-cart-form]");
+        if (!form) {
+            return;
+        }
+        event.preventDefault();
+        var fragment = form.dataset.cartForm;
+        ensureCsrfToken()
+            .then(function () {
+                return fetch(form.action, {
+                    method: "POST",
+                    body: new FormData(form),
+                    credentials: "same-origin",
+                    headers: {"X-CSRFToken": csrfToken(), "X-Cart-Fragment": fragment},
+                });
+            })
+            .then(function (response) {
+                if (!response.ok) {
+                    throw new Error(response.status);
+                }
+                return response.text();
+            })
+            .then(function (html) {
+                replaceFragment(fragment, html);
+                // На странице корзины меняется таблица, виджет в шапке обновляется отдельно
+                if (fragment !== "summary") {
+                    return refreshSummary();
+                }
+            })
+            .catch(function () { form.submit(); });
+    });
+
+    document.addEventListener("DOMContentLoaded", refreshSummary);
+})();